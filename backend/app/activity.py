@@ -0,0 +1,37 @@
+import asyncio
+import logging
+from datetime import datetime
+
+from . import crud
+from .db import open_session, run_sync
+
+logger = logging.getLogger(__name__)
+
+
+class LastActiveRecorder:
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._pending: dict[int, datetime] = {}
+
+    def touch(self, user_id: int) -> None:
+        self._pending[user_id] = datetime.utcnow()
+
+    async def flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            async with open_session() as db:
+                await run_sync(db, crud.set_last_active, pending)
+        except Exception:
+            for user_id, stamp in pending.items():
+                self._pending.setdefault(user_id, stamp)
+            raise
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception:  # noqa: BLE001
+                logger.exception('Failed to flush last_active stamps')
@@ -1,33 +1,61 @@
 from datetime import datetime, timedelta
+from typing import NamedTuple
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt
-from passlib.context import CryptContext
+from jose import JWTError, jwt
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from .cache import TTLCache
 from .config import settings
-from .db import SessionLocal
+from .db import DbSession, open_session, run_sync
 from .models import User
+from .replicas import WRITE_MARKER_COOKIE, current_wal_lsn, decode_write_marker, encode_write_marker, router
 
-pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='/auth/login')
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+class Principal(NamedTuple):
+    id: int
+    tenant_id: int
+    role: str
+    status: str
+
+
+principal_cache = TTLCache(
+    maxsize=settings.principal_cache_max_entries,
+    ttl=settings.principal_cache_ttl_seconds,
+)
 
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+READ_METHODS = {'GET', 'HEAD'}
 
 
-def verify_password(password: str, hashed: str) -> bool:
-    return pwd_context.verify(password, hashed)
+def _token_tenant(request: Request) -> int | None:
+    # Only used to pick a database; the token is verified in get_current_user.
+    scheme, _, token = request.headers.get('authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return None
+    try:
+        return jwt.get_unverified_claims(token).get('tenant_id')
+    except JWTError:
+        return None
+
+
+async def get_db(request: Request):
+    tenant_id = _token_tenant(request)
+    if request.method in READ_METHODS and router.replicas:
+        after = decode_write_marker(request.cookies.get(WRITE_MARKER_COOKIE), tenant_id)
+        async with router.read_session(after) as db:
+            yield db
+        return
+    async with open_session() as db:
+        yield db
+        if router.replicas and tenant_id is not None and request.method not in READ_METHODS:
+            # Read after the handler committed; WriteMarkerMiddleware sends it back.
+            lsn = await run_sync(db, current_wal_lsn)
+            request.state.write_marker = encode_write_marker(tenant_id, lsn)
 
 
 def create_access_token(subject: str, tenant_id: int, role: str) -> str:
@@ -41,10 +69,27 @@ def create_access_token(subject: str, tenant_id: int, role: str) -> str:
     return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
 
 
-def get_current_user(
+def cache_principal(user: User) -> Principal:
+    principal = Principal(user.id, user.tenant_id, user.role, user.status)
+    principal_cache.set(user.id, principal)
+    return principal
+
+
+def invalidate_principal(user_id: int) -> None:
+    principal_cache.pop(user_id)
+
+
+def _load_principal(db: Session, user_id: int) -> Principal | None:
+    row = db.execute(
+        select(User.id, User.tenant_id, User.role, User.status).where(User.id == user_id)
+    ).first()
+    return Principal(*row) if row else None
+
+
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> User:
+    db: DbSession = Depends(get_db),
+) -> Principal:
     try:
         payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
     except Exception as exc:  # noqa: BLE001
@@ -57,7 +102,12 @@ def get_current_user(
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid token')
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if not user:
+    principal = principal_cache.get(int(user_id))
+    if principal is not None:
+        return principal
+
+    principal = await run_sync(db, _load_principal, int(user_id))
+    if not principal:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='User not found')
-    return user
+    principal_cache.set(principal.id, principal)
+    return principal
@@ -0,0 +1,270 @@
+import hashlib
+import json
+import logging
+import re
+from collections.abc import Callable
+from typing import NamedTuple
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import DataError, DBAPIError, IntegrityError
+
+from . import crud
+from .bulk import format_validation_error
+from .config import settings
+from .db import SessionLocal
+from .events import lock_tenant_events
+from .hashing import hashing
+from .schemas import (
+    AuditPlanCreate,
+    AuditPlanOut,
+    AuditPlanUpdate,
+    AuditTemplateBase,
+    AuditTemplateOut,
+    BatchOperationResult,
+    BatchRequest,
+    BatchResponse,
+    DepartmentBase,
+    DepartmentOut,
+    PasswordReset,
+    RegionBase,
+    RegionOut,
+    ResponseTypeBase,
+    ResponseTypeOut,
+    SiteBase,
+    SiteOut,
+    UserCreate,
+    UserOut,
+    UserUpdate,
+)
+
+logger = logging.getLogger(__name__)
+
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+
+class BatchRoute(NamedTuple):
+    method: str
+    pattern: re.Pattern
+    handler: Callable
+    schema: type[BaseModel] | None
+    out: type[BaseModel] | None
+    status: int
+    not_found: str | None = None
+    # Field of the body whose value is replaced by its bcrypt hash.
+    password: str | None = None
+
+
+def _route(method: str, path: str, *args, **kwargs) -> BatchRoute:
+    return BatchRoute(method, re.compile('^' + path.replace('{id}', r'(\d+)') + '$'), *args, **kwargs)
+
+
+_CREATED = status.HTTP_201_CREATED
+_OK = status.HTTP_200_OK
+_DELETED = status.HTTP_204_NO_CONTENT
+
+# Mirrors the write routes in app.main, with the same crud calls and errors.
+BATCH_ROUTES = (
+    _route('POST', '/users', crud.create_user, UserCreate, UserOut, _CREATED, password='password'),
+    _route('PUT', '/users/{id}', crud.update_user, UserUpdate, UserOut, _OK, 'User not found'),
+    _route(
+        'POST',
+        '/users/{id}/reset-password',
+        crud.reset_password,
+        PasswordReset,
+        UserOut,
+        _OK,
+        'User not found',
+        password='new_password',
+    ),
+    _route('POST', '/departments', crud.create_department, DepartmentBase, DepartmentOut, _CREATED),
+    _route('DELETE', '/departments/{id}', crud.delete_department, None, None, _DELETED, 'Department not found'),
+    _route('POST', '/sites', crud.create_site, SiteBase, SiteOut, _CREATED),
+    _route('DELETE', '/sites/{id}', crud.delete_site, None, None, _DELETED, 'Site not found'),
+    _route('POST', '/regions', crud.create_region, RegionBase, RegionOut, _CREATED),
+    _route('DELETE', '/regions/{id}', crud.delete_region, None, None, _DELETED, 'Region not found'),
+    _route('POST', '/response-types', crud.create_response_type, ResponseTypeBase, ResponseTypeOut, _CREATED),
+    _route(
+        'DELETE', '/response-types/{id}', crud.delete_response_type, None, None, _DELETED, 'Response type not found'
+    ),
+    _route('POST', '/templates', crud.create_template, AuditTemplateBase, AuditTemplateOut, _CREATED),
+    _route(
+        'PUT', '/templates/{id}', crud.update_template, AuditTemplateBase, AuditTemplateOut, _OK, 'Template not found'
+    ),
+    _route('DELETE', '/templates/{id}', crud.delete_template, None, None, _DELETED, 'Template not found'),
+    _route('POST', '/audit-plans', crud.create_audit_plan, AuditPlanCreate, AuditPlanOut, _CREATED),
+    _route(
+        'PUT', '/audit-plans/{id}', crud.update_audit_plan, AuditPlanUpdate, AuditPlanOut, _OK, 'Audit plan not found'
+    ),
+    _route('DELETE', '/audit-plans/{id}', crud.delete_audit_plan, None, None, _DELETED, 'Audit plan not found'),
+)
+
+
+class _Call(NamedTuple):
+    index: int
+    route: BatchRoute
+    row_id: int | None
+    payload: BaseModel | None
+
+
+def _error(index: int, code: int, detail: str) -> BatchOperationResult:
+    return BatchOperationResult(index=index, status=code, body={'detail': detail})
+
+
+def _prepare(index: int, method: str, path: str, body: dict | None) -> _Call | BatchOperationResult:
+    for route in BATCH_ROUTES:
+        match = route.pattern.match(path.rstrip('/') or '/')
+        if route.method != method or match is None:
+            continue
+        row_id = int(match.group(1)) if match.groups() else None
+        if route.schema is None:
+            return _Call(index, route, row_id, None)
+        try:
+            return _Call(index, route, row_id, route.schema.model_validate(body or {}))
+        except ValidationError as exc:
+            return _error(index, status.HTTP_422_UNPROCESSABLE_ENTITY, format_validation_error(exc))
+    return _error(index, status.HTTP_404_NOT_FOUND, f'No batch operation for {method} {path}')
+
+
+def _arguments(call: _Call, password_hash: str | None) -> tuple:
+    if call.route.password and call.row_id is not None:
+        return (call.row_id, password_hash)
+    if call.route.password:
+        return (call.payload, password_hash)
+    return tuple(value for value in (call.row_id, call.payload) if value is not None)
+
+
+def _database_error(index: int, exc: DBAPIError) -> BatchOperationResult:
+    if isinstance(exc, IntegrityError):
+        return _error(index, status.HTTP_409_CONFLICT, 'Conflicts with existing data')
+    if isinstance(exc, DataError):
+        return _error(index, status.HTTP_400_BAD_REQUEST, 'Invalid data')
+    logger.exception('Batch operation %d failed', index)
+    return _error(index, status.HTTP_500_INTERNAL_SERVER_ERROR, 'Internal Server Error')
+
+
+def _result(call: _Call, value) -> BatchOperationResult:
+    if value is None or value is False:
+        return _error(call.index, status.HTTP_404_NOT_FOUND, call.route.not_found or 'Not Found')
+    if call.route.out is None:
+        return BatchOperationResult(index=call.index, status=call.route.status)
+    body = call.route.out.model_validate(value, from_attributes=True).model_dump(mode='json')
+    return BatchOperationResult(index=call.index, status=call.route.status, body=body)
+
+
+def _rolled_back(results: list[BatchOperationResult | None]) -> BatchResponse:
+    return BatchResponse(
+        committed=False,
+        results=[
+            result
+            if result is not None and result.status >= 400
+            else _error(index, status.HTTP_424_FAILED_DEPENDENCY, 'Batch rolled back')
+            for index, result in enumerate(results)
+        ],
+    )
+
+
+def _execute(
+    tenant_id: int,
+    batch: BatchRequest,
+    calls: list[_Call],
+    results: list[BatchOperationResult | None],
+    password_hashes: dict[int, str],
+    idempotency_key: str | None,
+    request_hash: str,
+) -> BatchResponse | dict:
+    # crud functions commit as they go; bound to a connection that is already
+    # in a transaction, each commit only releases a savepoint and one failed
+    # operation rolls back to its own savepoint.
+    deferred: list[tuple[Callable, tuple]] = []
+    with SessionLocal() as outer, SessionLocal(
+        bind=outer.connection(), join_transaction_mode='create_savepoint', info={'after_commit': deferred}
+    ) as db:
+        # Held by the outer transaction, so an operation that records events
+        # never waits for it while holding row locks taken by earlier ones.
+        lock_tenant_events(outer, tenant_id)
+        if idempotency_key:
+            # Claimed on the outer transaction, so rolling back an operation's
+            # savepoint cannot release the key.
+            stored = crud.claim_idempotency_key(outer, tenant_id, idempotency_key, request_hash)
+            if stored is not None:
+                _check_request_hash(stored, request_hash)
+                return stored.response
+        for call in calls:
+            try:
+                value = call.route.handler(db, tenant_id, *_arguments(call, password_hashes.get(call.index)))
+            except DBAPIError as exc:
+                # Only the operation's savepoint is rolled back; anything that
+                # is not a database error fails the whole request.
+                db.rollback()
+                results[call.index] = _database_error(call.index, exc)
+            else:
+                results[call.index] = _result(call, value)
+            if batch.atomic and results[call.index].status >= 400:
+                outer.rollback()
+                return _rolled_back(results)
+        response = BatchResponse(committed=True, results=results)
+        if idempotency_key:
+            crud.store_idempotent_response(db, tenant_id, idempotency_key, response.model_dump(mode='json'))
+        outer.commit()
+    for fn, args in deferred:
+        fn(*args)
+    return response
+
+
+def _check_request_hash(stored, request_hash: str) -> None:
+    if stored.request_hash != request_hash:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail='Idempotency key was already used for a different batch',
+        )
+
+
+def _stored_response(tenant_id: int, idempotency_key: str):
+    with SessionLocal() as db:
+        return crud.get_idempotent_response(db, tenant_id, idempotency_key)
+
+
+def _request_hash(batch: BatchRequest) -> str:
+    return hashlib.sha256(json.dumps(batch.model_dump(mode='json'), sort_keys=True).encode()).hexdigest()
+
+
+def _replayed(response: dict) -> JSONResponse:
+    return JSONResponse(response, headers={REPLAYED_HEADER: 'true'})
+
+
+async def run_batch(tenant_id: int, batch: BatchRequest, idempotency_key: str | None) -> BatchResponse | JSONResponse:
+    if len(batch.operations) > settings.batch_max_operations:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f'At most {settings.batch_max_operations} operations per batch',
+        )
+    request_hash = _request_hash(batch)
+    if idempotency_key:
+        # Checked up front so a retry does not pay for password hashing.
+        stored = await run_in_threadpool(_stored_response, tenant_id, idempotency_key)
+        if stored is not None:
+            _check_request_hash(stored, request_hash)
+            return _replayed(stored.response)
+
+    results: list[BatchOperationResult | None] = [None] * len(batch.operations)
+    calls = []
+    for index, operation in enumerate(batch.operations):
+        prepared = _prepare(index, operation.method, operation.path, operation.body)
+        if isinstance(prepared, _Call):
+            calls.append(prepared)
+        else:
+            results[index] = prepared
+    if batch.atomic and len(calls) < len(results):
+        return _rolled_back(results)
+
+    password_calls = [call for call in calls if call.route.password]
+    hashes = await hashing.hash_many([getattr(call.payload, call.route.password) for call in password_calls])
+    password_hashes = {call.index: password_hash for call, password_hash in zip(password_calls, hashes)}
+
+    response = await run_in_threadpool(
+        _execute, tenant_id, batch, calls, results, password_hashes, idempotency_key, request_hash
+    )
+    return _replayed(response) if isinstance(response, dict) else response
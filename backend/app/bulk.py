@@ -0,0 +1,68 @@
+import json
+from collections.abc import AsyncIterator
+from typing import TypeVar
+
+from fastapi import HTTPException, Request, status
+from pydantic import BaseModel, ValidationError
+
+from .pagination import NDJSON_MEDIA_TYPE
+from .schemas import BulkRowResult
+
+ModelT = TypeVar('ModelT', bound=BaseModel)
+
+
+def format_validation_error(exc: ValidationError) -> str:
+    return '; '.join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+async def _ndjson_lines(request: Request) -> AsyncIterator[bytes]:
+    buffer = b''
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            yield line
+    yield buffer
+
+
+async def _json_array_items(request: Request) -> AsyncIterator[object]:
+    try:
+        items = json.loads(await request.body())
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid JSON body') from exc
+    if not isinstance(items, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Expected a JSON array')
+    for item in items:
+        yield item
+
+
+async def read_bulk_rows(
+    request: Request,
+    schema: type[ModelT],
+    max_rows: int,
+) -> tuple[list[tuple[int, ModelT]], list[BulkRowResult]]:
+    rows: list[tuple[int, ModelT]] = []
+    errors: list[BulkRowResult] = []
+    ndjson = request.headers.get('content-type', '').startswith(NDJSON_MEDIA_TYPE)
+    items = _ndjson_lines(request) if ndjson else _json_array_items(request)
+    index = 0
+    async for item in items:
+        if ndjson and not item.strip():
+            continue
+        if index >= max_rows:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f'At most {max_rows} rows per request',
+            )
+        try:
+            if ndjson:
+                rows.append((index, schema.model_validate_json(item)))
+            else:
+                rows.append((index, schema.model_validate(item)))
+        except ValidationError as exc:
+            errors.append(BulkRowResult(index=index, error=format_validation_error(exc)))
+        index += 1
+    return rows, errors
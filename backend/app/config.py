@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
@@ -9,10 +11,70 @@ class Settings(BaseSettings):
     db_password: str
     db_sslmode: str = 'require'
     db_schema: str = 'public'
+    db_async: bool = True
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: int = 30
+    db_pool_recycle_seconds: int = 1800
+    db_pre_ping: Literal['always', 'idle', 'never'] = 'idle'
+    db_pre_ping_idle_seconds: int = 30
+    db_pool_prewarm: int = 2
+    db_replica_hosts: str = ''
+    replica_read_your_writes_seconds: int = 5
+    replica_retry_seconds: int = 30
+    replica_probe_seconds: int = 10
     jwt_secret: str
     jwt_algorithm: str = 'HS256'
     access_token_expire_minutes: int = 60
     frontend_origin: str = 'http://localhost:4200'
+    list_stream_chunk_size: int = 500
+    export_batch_size: int = 2000
+    fast_list_json: bool = False
+    metrics_enabled: bool = True
+    slow_query_ms: int = 500
+    query_profile_sample_rate: float = 0.0
+    query_profile_repeat_threshold: int = 10
+    reference_version_ttl_seconds: int = 5
+    reference_cache_max_entries: int = 2048
+    bulk_max_rows: int = 10000
+    answer_batch_size: int = 500
+    import_batch_size: int = 500
+    import_max_bytes: int = 50 * 1024 * 1024
+    principal_cache_ttl_seconds: int = 60
+    principal_cache_max_entries: int = 10000
+    last_active_flush_seconds: int = 30
+    bcrypt_rounds: int = 12
+    hash_pool_workers: int = 2
+    hash_queue_limit: int = 32
+    sync_overlap_seconds: int = 5
+    sync_tombstone_retention_days: int = 30
+    evidence_store: Literal['local', 's3'] = 'local'
+    evidence_local_dir: str = 'evidence'
+    evidence_s3_bucket: str = ''
+    evidence_s3_prefix: str = 'evidence/'
+    evidence_s3_endpoint_url: str = ''
+    evidence_s3_region: str = ''
+    evidence_max_bytes: int = 25 * 1024 * 1024
+    evidence_chunk_size: int = 256 * 1024
+    evidence_offload_data_urls: bool = False
+    job_runner_enabled: bool = True
+    job_workers: int = 4
+    job_concurrency: dict[str, int] = {}
+    job_poll_seconds: float = 2.0
+    job_stale_seconds: int = 300
+    job_max_attempts: int = 3
+    job_artifact_retention_hours: int = 24
+    job_artifact_s3_prefix: str = 'job-artifacts/'
+    nc_register_sync_enabled: bool = True
+    nc_register_sync_seconds: float = 2.0
+    nc_register_sync_batch_size: int = 1000
+    events_enabled: bool = True
+    events_heartbeat_seconds: int = 15
+    events_queue_size: int = 1000
+    events_replay_limit: int = 1000
+    events_retention_hours: int = 24
+    batch_max_operations: int = 100
+    idempotency_key_retention_hours: int = 24
 
     class Config:
         env_file = '.env'
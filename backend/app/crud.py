@@ -1,166 +1,355 @@
-from datetime import datetime
+from collections.abc import Callable, Sequence
+from datetime import datetime, timedelta
 import random
 
+from sqlalchemy import (
+    ColumnElement,
+    Row,
+    Select,
+    and_,
+    bindparam,
+    delete,
+    false,
+    func,
+    insert,
+    or_,
+    select,
+    true,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
-from .auth import hash_password
+from .auth import invalidate_principal
+from .config import settings
+from .dashboard import read_summary, record_nc_changes, refresh_plan_progress
+from .events import lock_tenant_events
+from .evidence import StoredBlob
 from .models import (
+    AuditAnswer,
     AuditPlan,
+    AuditPlanProgress,
     AuditTemplate,
+    DashboardCounter,
     Department,
+    EvidenceBlob,
+    IdempotencyKey,
+    Job,
+    JobArtifact,
+    NcAction,
+    NcRegisterChange,
+    NcRegisterEntry,
+    ReferenceVersion,
     Region,
     ResponseType,
     Site,
+    SyncTombstone,
     User,
 )
+from .pagination import Cursor, keyset
+from .reference_cache import remember_version
+from .search import search_statement
 from .schemas import (
+    AuditAnswerBase,
     AuditPlanCreate,
     AuditPlanUpdate,
     AuditTemplateBase,
+    DashboardSummary,
     DepartmentBase,
+    NcActionCreate,
     RegionBase,
     ResponseTypeBase,
     SiteBase,
     UserCreate,
     UserUpdate,
 )
+from .sync import SYNC_MODELS
 
 
-def list_users(db: Session, tenant_id: int) -> list[User]:
+def select_tenant_rows(model, tenant_id: int) -> Select:
     return (
-        db.query(User)
-        .filter(User.tenant_id == tenant_id)
-        .order_by(User.created_at.desc())
-        .all()
+        select(model)
+        .where(model.tenant_id == tenant_id)
+        .order_by(model.created_at.desc(), model.id.desc())
+    )
+
+
+def get_tenant_row(db: Session, model, tenant_id: int, row_id: int):
+    return db.query(model).filter(model.id == row_id, model.tenant_id == tenant_id).first()
+
+
+def update_tenant_row(db: Session, model, tenant_id: int, row_id: int, changes: dict):
+    if not changes:
+        return get_tenant_row(db, model, tenant_id, row_id)
+    return db.scalar(
+        update(model)
+        .where(model.id == row_id, model.tenant_id == tenant_id)
+        .values(**changes)
+        .returning(model)
+    )
+
+
+def delete_tenant_row(db: Session, model, tenant_id: int, row_id: int) -> bool:
+    deleted = db.scalar(
+        delete(model).where(model.id == row_id, model.tenant_id == tenant_id).returning(model.id)
     )
+    return deleted is not None
+
+
+def after_commit(db: Session, fn: Callable[..., None], *args) -> None:
+    # Inside a batch db.commit() only releases a savepoint, so in-process cache
+    # updates wait until the batch's transaction commits.
+    deferred = db.info.get('after_commit')
+    if deferred is None:
+        fn(*args)
+    else:
+        deferred.append((fn, args))
+
+
+def commit_reference_change(db: Session, tenant_id: int, resource: str) -> None:
+    statement = pg_insert(ReferenceVersion).values(tenant_id=tenant_id, resource=resource)
+    version = db.scalar(
+        statement.on_conflict_do_update(
+            index_elements=[ReferenceVersion.tenant_id, ReferenceVersion.resource],
+            set_={'version': ReferenceVersion.version + 1},
+        ).returning(ReferenceVersion.version)
+    )
+    db.commit()
+    after_commit(db, remember_version, tenant_id, resource, version)
+
+
+def list_columns(
+    db: Session,
+    model,
+    fields: list[str],
+    tenant_id: int,
+    limit: int | None = None,
+    cursor: Cursor | None = None,
+) -> list[Row]:
+    statement = select(*(getattr(model, field) for field in fields)).where(model.tenant_id == tenant_id)
+    return db.execute(keyset(statement, model, limit, cursor)).all()
+
+
+def list_changes(
+    db: Session,
+    tenant_id: int,
+    since: datetime | None,
+) -> tuple[datetime, bool, dict[str, list], dict[str, list[int]]]:
+    now = db.scalar(select(func.now()))
+    full = since is None or since < now - timedelta(days=settings.sync_tombstone_retention_days)
+    # updated_at is the writer's transaction start, so a row can commit after a
+    # later token was issued; the overlap re-reads that window.
+    floor = None if full else since - timedelta(seconds=settings.sync_overlap_seconds)
+    changes: dict[str, list] = {}
+    for entity, model in SYNC_MODELS.items():
+        query = select(model).where(model.tenant_id == tenant_id)
+        if floor is not None:
+            query = query.where(model.updated_at > floor)
+        changes[entity] = db.scalars(query.order_by(model.updated_at, model.id)).all()
+    deleted: dict[str, list[int]] = {}
+    if floor is not None:
+        tombstones = db.execute(
+            select(SyncTombstone.entity, SyncTombstone.entity_id).where(
+                SyncTombstone.tenant_id == tenant_id,
+                SyncTombstone.deleted_at > floor,
+            )
+        )
+        for entity, entity_id in tombstones:
+            deleted.setdefault(entity, []).append(entity_id)
+    return now, full, changes, deleted
+
+
+def list_users(
+    db: Session,
+    tenant_id: int,
+    limit: int | None = None,
+    cursor: Cursor | None = None,
+) -> list[User]:
+    query = db.query(User).filter(User.tenant_id == tenant_id)
+    return keyset(query, User, limit, cursor).all()
 
 
-def create_user(db: Session, tenant_id: int, payload: UserCreate) -> User:
+def get_user_by_email(db: Session, email: str) -> User | None:
+    return db.query(User).filter(User.email == email.lower()).first()
+
+
+def create_user(db: Session, tenant_id: int, payload: UserCreate, password_hash: str) -> User:
     user = User(
         tenant_id=tenant_id,
         email=payload.email.lower(),
-        password_hash=hash_password(payload.password),
+        password_hash=password_hash,
         first_name=payload.first_name,
         last_name=payload.last_name,
         phone=payload.phone,
         department=payload.department,
         role=payload.role,
         status=payload.status,
-        created_at=datetime.utcnow(),
     )
     db.add(user)
     db.commit()
-    db.refresh(user)
     return user
 
 
-def update_user(db: Session, user: User, payload: UserUpdate) -> User:
-    for field, value in payload.model_dump(exclude_unset=True).items():
-        setattr(user, field, value)
+def existing_user_emails(db: Session, emails: list[str]) -> set[str]:
+    return set(db.scalars(select(User.email).where(User.email.in_(emails))))
+
+
+def import_users(db: Session, tenant_id: int, payloads: list[UserCreate], password_hashes: list[str]) -> list[int]:
+    rows = [
+        {
+            **payload.model_dump(exclude={'password'}),
+            'email': payload.email.lower(),
+            'tenant_id': tenant_id,
+            'password_hash': password_hash,
+        }
+        for payload, password_hash in zip(payloads, password_hashes)
+    ]
+    created = db.scalars(insert(User).returning(User.id, sort_by_parameter_order=True), rows).all()
+    db.commit()
+    return list(created)
+
+
+def update_user(db: Session, tenant_id: int, user_id: int, payload: UserUpdate) -> User | None:
+    changes = payload.model_dump(exclude_unset=True)
+    renamed = bool(changes.keys() & {'first_name', 'last_name'})
+    if renamed:
+        lock_tenant_events(db, tenant_id)
+    user = update_tenant_row(db, User, tenant_id, user_id, changes)
+    if user and renamed:
+        refresh_nc_register(
+            db,
+            tenant_id,
+            NcRegisterEntry.assigned_user_id == user_id,
+            NcAction.assigned_user_id == user_id,
+        )
     db.commit()
-    db.refresh(user)
+    after_commit(db, invalidate_principal, user_id)
     return user
 
 
-def set_last_active(db: Session, user: User) -> User:
-    user.last_active = datetime.utcnow()
+def set_last_active(db: Session, stamps: dict[int, datetime]) -> None:
+    # Run on the table so the ORM does not bump updated_at: a login alone must
+    # not send the user to every client again in GET /sync.
+    users = User.__table__
+    db.execute(
+        update(users)
+        .where(users.c.id == bindparam('user_id'))
+        .values(last_active=bindparam('stamp'), updated_at=users.c.updated_at),
+        [{'user_id': user_id, 'stamp': stamp} for user_id, stamp in stamps.items()],
+    )
     db.commit()
-    db.refresh(user)
-    return user
 
 
-def reset_password(db: Session, user: User, new_password: str) -> User:
-    user.password_hash = hash_password(new_password)
+def reset_password(db: Session, tenant_id: int, user_id: int, password_hash: str) -> User | None:
+    user = update_tenant_row(db, User, tenant_id, user_id, {'password_hash': password_hash})
     db.commit()
-    db.refresh(user)
+    after_commit(db, invalidate_principal, user_id)
     return user
 
 
-def list_departments(db: Session, tenant_id: int) -> list[Department]:
-    return (
-        db.query(Department)
-        .filter(Department.tenant_id == tenant_id)
-        .order_by(Department.created_at.desc())
-        .all()
-    )
+def existing_names(db: Session, model, tenant_id: int, names: list[str]) -> set[str]:
+    return set(db.scalars(select(model.name).where(model.tenant_id == tenant_id, model.name.in_(names))))
+
+
+def import_named_rows(db: Session, tenant_id: int, model, resource: str, names: list[str]) -> list[int]:
+    created = db.scalars(
+        insert(model).returning(model.id, sort_by_parameter_order=True),
+        [{'tenant_id': tenant_id, 'name': name} for name in names],
+    ).all()
+    commit_reference_change(db, tenant_id, resource)
+    return list(created)
+
+
+def list_departments(
+    db: Session,
+    tenant_id: int,
+    limit: int | None = None,
+    cursor: Cursor | None = None,
+) -> list[Department]:
+    query = db.query(Department).filter(Department.tenant_id == tenant_id)
+    return keyset(query, Department, limit, cursor).all()
 
 
 def create_department(db: Session, tenant_id: int, payload: DepartmentBase) -> Department:
     department = Department(
         tenant_id=tenant_id,
         name=payload.name,
-        created_at=datetime.utcnow(),
     )
     db.add(department)
-    db.commit()
-    db.refresh(department)
+    commit_reference_change(db, tenant_id, 'departments')
     return department
 
 
-def delete_department(db: Session, department: Department) -> None:
-    db.delete(department)
-    db.commit()
+def delete_department(db: Session, tenant_id: int, department_id: int) -> bool:
+    deleted = delete_tenant_row(db, Department, tenant_id, department_id)
+    if deleted:
+        commit_reference_change(db, tenant_id, 'departments')
+    return deleted
 
 
-def list_sites(db: Session, tenant_id: int) -> list[Site]:
-    return (
-        db.query(Site)
-        .filter(Site.tenant_id == tenant_id)
-        .order_by(Site.created_at.desc())
-        .all()
-    )
+def list_sites(
+    db: Session,
+    tenant_id: int,
+    limit: int | None = None,
+    cursor: Cursor | None = None,
+) -> list[Site]:
+    query = db.query(Site).filter(Site.tenant_id == tenant_id)
+    return keyset(query, Site, limit, cursor).all()
 
 
 def create_site(db: Session, tenant_id: int, payload: SiteBase) -> Site:
     site = Site(
         tenant_id=tenant_id,
         name=payload.name,
-        created_at=datetime.utcnow(),
     )
     db.add(site)
-    db.commit()
-    db.refresh(site)
+    commit_reference_change(db, tenant_id, 'sites')
     return site
 
 
-def delete_site(db: Session, site: Site) -> None:
-    db.delete(site)
-    db.commit()
+def delete_site(db: Session, tenant_id: int, site_id: int) -> bool:
+    deleted = delete_tenant_row(db, Site, tenant_id, site_id)
+    if deleted:
+        commit_reference_change(db, tenant_id, 'sites')
+    return deleted
 
 
-def list_regions(db: Session, tenant_id: int) -> list[Region]:
-    return (
-        db.query(Region)
-        .filter(Region.tenant_id == tenant_id)
-        .order_by(Region.created_at.desc())
-        .all()
-    )
+def list_regions(
+    db: Session,
+    tenant_id: int,
+    limit: int | None = None,
+    cursor: Cursor | None = None,
+) -> list[Region]:
+    query = db.query(Region).filter(Region.tenant_id == tenant_id)
+    return keyset(query, Region, limit, cursor).all()
 
 
 def create_region(db: Session, tenant_id: int, payload: RegionBase) -> Region:
     region = Region(
         tenant_id=tenant_id,
         name=payload.name,
-        created_at=datetime.utcnow(),
     )
     db.add(region)
-    db.commit()
-    db.refresh(region)
+    commit_reference_change(db, tenant_id, 'regions')
     return region
 
 
-def delete_region(db: Session, region: Region) -> None:
-    db.delete(region)
-    db.commit()
+def delete_region(db: Session, tenant_id: int, region_id: int) -> bool:
+    deleted = delete_tenant_row(db, Region, tenant_id, region_id)
+    if deleted:
+        commit_reference_change(db, tenant_id, 'regions')
+    return deleted
 
 
-def list_response_types(db: Session, tenant_id: int) -> list[ResponseType]:
-    return (
-        db.query(ResponseType)
-        .filter(ResponseType.tenant_id == tenant_id)
-        .order_by(ResponseType.created_at.desc())
-        .all()
-    )
+def list_response_types(
+    db: Session,
+    tenant_id: int,
+    limit: int | None = None,
+    cursor: Cursor | None = None,
+) -> list[ResponseType]:
+    query = db.query(ResponseType).filter(ResponseType.tenant_id == tenant_id)
+    return keyset(query, ResponseType, limit, cursor).all()
 
 
 def create_response_type(db: Session, tenant_id: int, payload: ResponseTypeBase) -> ResponseType:
@@ -168,74 +357,107 @@ def create_response_type(db: Session, tenant_id: int, payload: ResponseTypeBase)
         tenant_id=tenant_id,
         name=payload.name,
         types=payload.types,
-        created_at=datetime.utcnow(),
     )
     db.add(response_type)
-    db.commit()
-    db.refresh(response_type)
+    commit_reference_change(db, tenant_id, 'response_types')
     return response_type
 
 
-def delete_response_type(db: Session, response_type: ResponseType) -> None:
-    db.delete(response_type)
-    db.commit()
+def delete_response_type(db: Session, tenant_id: int, response_type_id: int) -> bool:
+    deleted = delete_tenant_row(db, ResponseType, tenant_id, response_type_id)
+    if deleted:
+        commit_reference_change(db, tenant_id, 'response_types')
+    return deleted
 
 
-def list_templates(db: Session, tenant_id: int) -> list[AuditTemplate]:
-    return (
-        db.query(AuditTemplate)
-        .filter(AuditTemplate.tenant_id == tenant_id)
-        .order_by(AuditTemplate.created_at.desc())
-        .all()
-    )
+def list_templates(
+    db: Session,
+    tenant_id: int,
+    limit: int | None = None,
+    cursor: Cursor | None = None,
+) -> list[AuditTemplate]:
+    query = db.query(AuditTemplate).filter(AuditTemplate.tenant_id == tenant_id)
+    return keyset(query, AuditTemplate, limit, cursor).all()
 
 
 def create_template(db: Session, tenant_id: int, payload: AuditTemplateBase) -> AuditTemplate:
+    lock_tenant_events(db, tenant_id)
     template = AuditTemplate(
         tenant_id=tenant_id,
         name=payload.name,
         note=payload.note,
         tags=payload.tags,
         questions=payload.questions,
-        created_at=datetime.utcnow(),
     )
     db.add(template)
-    db.commit()
-    db.refresh(template)
+    _refresh_template_plans(db, tenant_id, [payload.name])
+    commit_reference_change(db, tenant_id, 'templates')
     return template
 
 
-def delete_template(db: Session, template: AuditTemplate) -> None:
-    db.delete(template)
-    db.commit()
+def import_templates(db: Session, tenant_id: int, payloads: list[AuditTemplateBase]) -> list[int]:
+    lock_tenant_events(db, tenant_id)
+    created = db.scalars(
+        insert(AuditTemplate).returning(AuditTemplate.id, sort_by_parameter_order=True),
+        [{**payload.model_dump(), 'tenant_id': tenant_id} for payload in payloads],
+    ).all()
+    _refresh_template_plans(db, tenant_id, [payload.name for payload in payloads])
+    commit_reference_change(db, tenant_id, 'templates')
+    return list(created)
+
+
+def delete_template(db: Session, tenant_id: int, template_id: int) -> bool:
+    lock_tenant_events(db, tenant_id)
+    name = _template_name(db, tenant_id, template_id)
+    deleted = delete_tenant_row(db, AuditTemplate, tenant_id, template_id)
+    if deleted:
+        _refresh_template_plans(db, tenant_id, [name])
+        commit_reference_change(db, tenant_id, 'templates')
+    return deleted
 
 
 def update_template(
     db: Session,
-    template: AuditTemplate,
+    tenant_id: int,
+    template_id: int,
     payload: AuditTemplateBase,
-) -> AuditTemplate:
-    template.name = payload.name
-    template.note = payload.note
-    template.tags = payload.tags
-    template.questions = payload.questions
-    db.commit()
-    db.refresh(template)
+) -> AuditTemplate | None:
+    lock_tenant_events(db, tenant_id)
+    name = _template_name(db, tenant_id, template_id)
+    template = update_tenant_row(db, AuditTemplate, tenant_id, template_id, payload.model_dump())
+    if template:
+        _refresh_template_plans(db, tenant_id, [name, template.name])
+        commit_reference_change(db, tenant_id, 'templates')
     return template
 
 
+def _template_name(db: Session, tenant_id: int, template_id: int) -> str | None:
+    return db.scalar(
+        select(AuditTemplate.name).where(AuditTemplate.id == template_id, AuditTemplate.tenant_id == tenant_id)
+    )
 
 
-def list_audit_plans(db: Session, tenant_id: int) -> list[AuditPlan]:
-    return (
-        db.query(AuditPlan)
-        .filter(AuditPlan.tenant_id == tenant_id)
-        .order_by(AuditPlan.created_at.desc())
-        .all()
-    )
+def _refresh_template_plans(db: Session, tenant_id: int, names: list[str | None]) -> None:
+    # Plan completion depends on the question count of the template named by
+    # the plan's audit type.
+    plan_ids = db.scalars(
+        select(AuditPlan.id).where(AuditPlan.tenant_id == tenant_id, AuditPlan.audit_type.in_(names))
+    ).all()
+    refresh_plan_progress(db, tenant_id, plan_ids)
+
+
+def list_audit_plans(
+    db: Session,
+    tenant_id: int,
+    limit: int | None = None,
+    cursor: Cursor | None = None,
+) -> list[AuditPlan]:
+    query = db.query(AuditPlan).filter(AuditPlan.tenant_id == tenant_id)
+    return keyset(query, AuditPlan, limit, cursor).all()
 
 
 def create_audit_plan(db: Session, tenant_id: int, payload: AuditPlanCreate) -> AuditPlan:
+    lock_tenant_events(db, tenant_id)
     plan = AuditPlan(
         tenant_id=tenant_id,
         code=generate_audit_code(),
@@ -252,29 +474,536 @@ def create_audit_plan(db: Session, tenant_id: int, payload: AuditPlanCreate) ->
         audit_note=payload.audit_note,
         response_type=payload.response_type,
         asset_scope=payload.asset_scope,
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow(),
     )
     db.add(plan)
+    db.flush()
+    refresh_plan_progress(db, tenant_id, [plan.id])
     db.commit()
-    db.refresh(plan)
     return plan
 
 
-def update_audit_plan(db: Session, plan: AuditPlan, payload: AuditPlanUpdate) -> AuditPlan:
-    for field, value in payload.model_dump(exclude_unset=True).items():
-        setattr(plan, field, value)
-    plan.updated_at = datetime.utcnow()
+def create_audit_plans(
+    db: Session,
+    tenant_id: int,
+    payloads: list[AuditPlanCreate],
+) -> list[tuple[int, str]]:
+    if not payloads:
+        return []
+    lock_tenant_events(db, tenant_id)
+    codes = generate_audit_codes(db, tenant_id, len(payloads))
+    rows = [
+        {**payload.model_dump(), 'tenant_id': tenant_id, 'code': code}
+        for payload, code in zip(payloads, codes)
+    ]
+    created = db.execute(
+        insert(AuditPlan).returning(AuditPlan.id, AuditPlan.code, sort_by_parameter_order=True),
+        rows,
+    ).all()
+    refresh_plan_progress(db, tenant_id, [row.id for row in created])
+    db.commit()
+    return [(row.id, row.code) for row in created]
+
+
+def update_audit_plan(
+    db: Session,
+    tenant_id: int,
+    plan_id: int,
+    payload: AuditPlanUpdate,
+) -> AuditPlan | None:
+    lock_tenant_events(db, tenant_id)
+    changes = {**payload.model_dump(exclude_unset=True), 'updated_at': func.now()}
+    plan = update_tenant_row(db, AuditPlan, tenant_id, plan_id, changes)
+    if plan:
+        refresh_nc_register(
+            db,
+            tenant_id,
+            NcRegisterEntry.audit_plan_id == plan_id,
+            AuditAnswer.audit_plan_id == plan_id,
+        )
+        refresh_plan_progress(db, tenant_id, [plan_id])
     db.commit()
-    db.refresh(plan)
     return plan
 
 
-def delete_audit_plan(db: Session, plan: AuditPlan) -> None:
-    db.delete(plan)
+def delete_audit_plan(db: Session, tenant_id: int, audit_plan_id: int) -> bool:
+    lock_tenant_events(db, tenant_id)
+    deleted = delete_tenant_row(db, AuditPlan, tenant_id, audit_plan_id)
+    if deleted:
+        refresh_plan_progress(db, tenant_id, [audit_plan_id])
     db.commit()
+    return deleted
+
+
+def delete_audit_plans(db: Session, tenant_id: int, plan_ids: list[int]) -> list[int]:
+    # Unlike delete_audit_plan this also removes the plans' answers; their NC
+    # actions and register rows go with them, and the counters follow.
+    lock_tenant_events(db, tenant_id)
+    refresh_nc_register(db, tenant_id, NcRegisterEntry.audit_plan_id.in_(plan_ids), false())
+    db.execute(
+        delete(AuditAnswer).where(AuditAnswer.tenant_id == tenant_id, AuditAnswer.audit_plan_id.in_(plan_ids))
+    )
+    deleted = db.scalars(
+        delete(AuditPlan).where(AuditPlan.tenant_id == tenant_id, AuditPlan.id.in_(plan_ids)).returning(AuditPlan.id)
+    ).all()
+    refresh_plan_progress(db, tenant_id, deleted)
+    db.commit()
+    return list(deleted)
+
+
+def upsert_audit_answers(
+    db: Session,
+    tenant_id: int,
+    plan_id: int,
+    payloads: list[AuditAnswerBase],
+    blobs: Sequence[StoredBlob] = (),
+) -> list[Row]:
+    # A statement may not touch the same conflict key twice, so the last answer
+    # for each (asset, question) wins.
+    lock_tenant_events(db, tenant_id)
+    unique = {(payload.asset_number, payload.question_index): payload for payload in payloads}
+    rows = [
+        {**payload.model_dump(), 'tenant_id': tenant_id, 'audit_plan_id': plan_id}
+        for payload in unique.values()
+    ]
+    answers: list[Row] = []
+    for start in range(0, len(rows), settings.answer_batch_size):
+        statement = pg_insert(AuditAnswer).values(rows[start:start + settings.answer_batch_size])
+        statement = statement.on_conflict_do_update(
+            index_elements=[
+                AuditAnswer.tenant_id,
+                AuditAnswer.audit_plan_id,
+                AuditAnswer.asset_number,
+                AuditAnswer.question_index,
+            ],
+            set_={
+                **{
+                    field: statement.excluded[field]
+                    for field in AuditAnswerBase.model_fields
+                    if field not in ('asset_number', 'question_index')
+                },
+                'updated_at': func.now(),
+            },
+        ).returning(*AuditAnswer.__table__.c)
+        batch = db.execute(statement).all()
+        answer_ids = [answer.id for answer in batch]
+        refresh_nc_register(
+            db,
+            tenant_id,
+            NcRegisterEntry.answer_id.in_(answer_ids),
+            AuditAnswer.id.in_(answer_ids),
+        )
+        answers.extend(batch)
+    refresh_plan_progress(db, tenant_id, [plan_id])
+    add_evidence_blobs(db, tenant_id, blobs)
+    db.commit()
+    return answers
+
+
+def add_evidence_blobs(db: Session, tenant_id: int, blobs: Sequence[StoredBlob]) -> None:
+    if not blobs:
+        return
+    db.execute(
+        pg_insert(EvidenceBlob)
+        .values([{**blob._asdict(), 'tenant_id': tenant_id} for blob in blobs])
+        .on_conflict_do_nothing(index_elements=[EvidenceBlob.tenant_id, EvidenceBlob.sha256])
+    )
+
+
+def register_evidence(db: Session, tenant_id: int, blobs: list[StoredBlob]) -> None:
+    add_evidence_blobs(db, tenant_id, blobs)
+    db.commit()
+
+
+def get_evidence_blob(db: Session, tenant_id: int, digest: str) -> EvidenceBlob | None:
+    return db.get(EvidenceBlob, (tenant_id, digest))
+
+
+def get_nc_action_context(
+    db: Session,
+    tenant_id: int,
+    user_id: int,
+    answer_id: int,
+    assigned_user_id: int | None,
+) -> tuple[Row | None, Row | None, str | None]:
+    user = db.execute(
+        select(User.first_name, User.last_name, User.department).where(
+            User.id == user_id, User.tenant_id == tenant_id
+        )
+    ).first()
+    answer = db.execute(
+        select(AuditPlan.auditor_name, AuditAnswer.assigned_nc)
+        .join(AuditPlan, AuditPlan.id == AuditAnswer.audit_plan_id)
+        .where(AuditAnswer.id == answer_id, AuditAnswer.tenant_id == tenant_id)
+    ).first()
+    assignee_department = None
+    if assigned_user_id:
+        assignee_department = db.scalar(
+            select(User.department).where(User.id == assigned_user_id, User.tenant_id == tenant_id)
+        )
+    return user, answer, assignee_department
+
+
+def upsert_nc_action(db: Session, tenant_id: int, payload: NcActionCreate) -> NcAction:
+    lock_tenant_events(db, tenant_id)
+    values = payload.model_dump(exclude={'answer_id'})
+    statement = pg_insert(NcAction).values(
+        **values, tenant_id=tenant_id, audit_answer_id=payload.answer_id
+    )
+    action = db.scalar(
+        statement.on_conflict_do_update(
+            index_elements=[NcAction.tenant_id, NcAction.audit_answer_id],
+            set_={**{field: statement.excluded[field] for field in values}, 'updated_at': func.now()},
+        ).returning(NcAction)
+    )
+    plan_ids = refresh_nc_register(
+        db,
+        tenant_id,
+        NcRegisterEntry.answer_id == payload.answer_id,
+        AuditAnswer.id == payload.answer_id,
+    )
+    refresh_plan_progress(db, tenant_id, plan_ids)
+    db.commit()
+    return action
+
+
+NC_REGISTER_SOURCE = {
+    'answer_id': AuditAnswer.id,
+    'tenant_id': AuditAnswer.tenant_id,
+    'audit_plan_id': AuditAnswer.audit_plan_id,
+    'audit_code': AuditPlan.code,
+    'audit_type': AuditPlan.audit_type,
+    'audit_subtype': AuditPlan.audit_subtype,
+    'start_date': AuditPlan.start_date,
+    'end_date': AuditPlan.end_date,
+    'auditor_name': AuditPlan.auditor_name,
+    'customer_id': AuditPlan.customer_id,
+    'asset_number': AuditAnswer.asset_number,
+    'question_text': AuditAnswer.question_text,
+    'response': AuditAnswer.response,
+    'assigned_nc': AuditAnswer.assigned_nc,
+    'note': AuditAnswer.note,
+    'submitted_at': AuditAnswer.updated_at,
+    'root_cause': NcAction.root_cause,
+    'containment_action': NcAction.containment_action,
+    'corrective_action': NcAction.corrective_action,
+    'preventive_action': NcAction.preventive_action,
+    'evidence_name': NcAction.evidence_name,
+    'assigned_user_id': NcAction.assigned_user_id,
+    'assigned_user_first_name': User.first_name,
+    'assigned_user_last_name': User.last_name,
+    'assigned_user_email': User.email,
+    'nc_status': func.coalesce(NcAction.status, 'Assigned'),
+}
+
+NC_REGISTER_COUNTED = (
+    NcRegisterEntry.answer_id,
+    NcRegisterEntry.audit_plan_id,
+    NcRegisterEntry.assigned_nc,
+    NcRegisterEntry.nc_status,
+    NcRegisterEntry.customer_id,
+)
+
+
+def refresh_nc_register(
+    db: Session,
+    tenant_id: int,
+    stale: ColumnElement[bool],
+    source: ColumnElement[bool],
+) -> set[int]:
+    # Rewrites the register rows matched by `stale` from the answers matched by
+    # `source`, in the caller's transaction. Answers that are no longer
+    # submitted non-conformances simply are not re-inserted. Returns the plans
+    # whose register rows changed.
+    removed = db.execute(
+        delete(NcRegisterEntry)
+        .where(NcRegisterEntry.tenant_id == tenant_id, stale)
+        .returning(*NC_REGISTER_COUNTED)
+        .execution_options(synchronize_session=False)
+    ).all()
+    rows = (
+        select(*NC_REGISTER_SOURCE.values())
+        .join(AuditPlan, AuditPlan.id == AuditAnswer.audit_plan_id)
+        .outerjoin(
+            NcAction,
+            and_(NcAction.audit_answer_id == AuditAnswer.id, NcAction.tenant_id == AuditAnswer.tenant_id),
+        )
+        .outerjoin(User, and_(User.id == NcAction.assigned_user_id, User.tenant_id == AuditAnswer.tenant_id))
+        .where(
+            AuditAnswer.tenant_id == tenant_id,
+            AuditAnswer.status == 'Submitted',
+            AuditAnswer.response_is_negative.is_(True),
+            source,
+        )
+    )
+    added = db.execute(
+        insert(NcRegisterEntry).from_select(list(NC_REGISTER_SOURCE), rows).returning(*NC_REGISTER_COUNTED)
+    ).all()
+    record_nc_changes(db, tenant_id, removed, added)
+    return {row.audit_plan_id for row in removed + added}
+
+
+def _nc_register_filters(
+    tenant_id: int,
+    customer_id: str | None,
+    assigned_nc: str | None,
+    audit_code: str | None,
+    assigned_user_id: int | None,
+) -> list[ColumnElement[bool]]:
+    filters = [NcRegisterEntry.tenant_id == tenant_id]
+    if customer_id is not None:
+        filters.append(NcRegisterEntry.customer_id == customer_id)
+    if assigned_nc is not None:
+        filters.append(NcRegisterEntry.assigned_nc == assigned_nc)
+    if audit_code is not None:
+        filters.append(NcRegisterEntry.audit_code == audit_code)
+    if assigned_user_id is not None:
+        filters.append(NcRegisterEntry.assigned_user_id == assigned_user_id)
+    return filters
+
+
+def list_nc_register(
+    db: Session,
+    tenant_id: int,
+    customer_id: str | None = None,
+    nc_status: str | None = None,
+    assigned_nc: str | None = None,
+    audit_code: str | None = None,
+    assigned_user_id: int | None = None,
+    limit: int | None = None,
+    cursor: Cursor | None = None,
+) -> list[NcRegisterEntry]:
+    query = select(NcRegisterEntry).where(
+        *_nc_register_filters(tenant_id, customer_id, assigned_nc, audit_code, assigned_user_id)
+    )
+    if nc_status is not None:
+        query = query.where(NcRegisterEntry.nc_status == nc_status)
+    if cursor:
+        query = query.where(
+            tuple_(NcRegisterEntry.submitted_at, NcRegisterEntry.answer_id)
+            < tuple_(cursor.created_at, cursor.id)
+        )
+    query = query.order_by(NcRegisterEntry.submitted_at.desc(), NcRegisterEntry.answer_id.desc())
+    if limit:
+        query = query.limit(limit)
+    return db.scalars(query).all()
+
+
+def count_nc_register(
+    db: Session,
+    tenant_id: int,
+    customer_id: str | None = None,
+    assigned_nc: str | None = None,
+    audit_code: str | None = None,
+    assigned_user_id: int | None = None,
+) -> dict[str, int]:
+    rows = db.execute(
+        select(NcRegisterEntry.nc_status, func.count())
+        .where(*_nc_register_filters(tenant_id, customer_id, assigned_nc, audit_code, assigned_user_id))
+        .group_by(NcRegisterEntry.nc_status)
+    )
+    return {nc_status: count for nc_status, count in rows}
 
 
 def generate_audit_code() -> str:
     alphabet = 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789'
     return ''.join(random.choice(alphabet) for _ in range(6))
+
+
+def generate_audit_codes(db: Session, tenant_id: int, count: int) -> list[str]:
+    codes: set[str] = set()
+    while len(codes) < count:
+        codes.update(generate_audit_code() for _ in range(count - len(codes)))
+        taken = db.scalars(
+            select(AuditPlan.code).where(AuditPlan.tenant_id == tenant_id, AuditPlan.code.in_(codes))
+        )
+        codes.difference_update(taken)
+    return list(codes)
+
+
+def search(db: Session, tenant_id: int, text: str, limit: int, customer_id: str | None = None) -> list[Row]:
+    return db.execute(search_statement(tenant_id, text, limit, customer_id)).all()
+
+
+REBUILD_CHUNK_SIZE = 1000
+
+
+def get_dashboard_summary(db: Session, tenant_id: int, customer_id: str | None = None) -> DashboardSummary:
+    return read_summary(db, tenant_id, customer_id)
+
+
+def rebuild_dashboard(db: Session, tenant_id: int) -> None:
+    # Re-derives the NC register and the rollups from the source tables, e.g.
+    # after writes that bypassed this API. Only register rows whose status
+    # actually changed produce events.
+    lock_tenant_events(db, tenant_id)
+    refresh_nc_register(db, tenant_id, true(), true())
+    db.execute(delete(AuditPlanProgress).where(AuditPlanProgress.tenant_id == tenant_id))
+    db.execute(delete(DashboardCounter).where(DashboardCounter.tenant_id == tenant_id))
+    added = db.execute(select(*NC_REGISTER_COUNTED).where(NcRegisterEntry.tenant_id == tenant_id)).all()
+    record_nc_changes(db, tenant_id, [], added, emit_events=False)
+    plan_ids = db.scalars(select(AuditPlan.id).where(AuditPlan.tenant_id == tenant_id)).all()
+    for start in range(0, len(plan_ids), REBUILD_CHUNK_SIZE):
+        refresh_plan_progress(db, tenant_id, plan_ids[start:start + REBUILD_CHUNK_SIZE], emit_events=False)
+    db.commit()
+
+
+def apply_nc_register_changes(db: Session, limit: int) -> int:
+    # Folds writes captured by the nc_register_changes triggers into the
+    # register and the rollups. The claimed rows are deleted in the same
+    # transaction, so a failed refresh leaves them queued; SKIP LOCKED lets
+    # several workers drain the queue at once.
+    claimed = select(NcRegisterChange.id).order_by(NcRegisterChange.id).limit(limit).with_for_update(skip_locked=True)
+    changes = db.execute(
+        delete(NcRegisterChange)
+        .where(NcRegisterChange.id.in_(claimed.scalar_subquery()))
+        .returning(
+            NcRegisterChange.tenant_id,
+            NcRegisterChange.audit_plan_id,
+            NcRegisterChange.answer_id,
+            NcRegisterChange.user_id,
+            NcRegisterChange.template_name,
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+    by_tenant: dict[int, list[Row]] = {}
+    for change in changes:
+        by_tenant.setdefault(change.tenant_id, []).append(change)
+    # All tenants are locked up front and in order; the claimed queue rows are
+    # only ever locked by other drains, which skip them.
+    for tenant_id in sorted(by_tenant):
+        lock_tenant_events(db, tenant_id)
+    for tenant_id, tenant_changes in sorted(by_tenant.items()):
+        answer_ids = sorted({change.answer_id for change in tenant_changes if change.answer_id is not None})
+        user_ids = sorted({change.user_id for change in tenant_changes if change.user_id is not None})
+        # Plans named directly, i.e. not through one of their answers, are
+        # re-read as a whole.
+        plan_ids = sorted(
+            {change.audit_plan_id for change in tenant_changes if change.answer_id is None and change.audit_plan_id}
+        )
+        touched = refresh_nc_register(
+            db,
+            tenant_id,
+            or_(
+                NcRegisterEntry.answer_id.in_(answer_ids),
+                NcRegisterEntry.audit_plan_id.in_(plan_ids),
+                NcRegisterEntry.assigned_user_id.in_(user_ids),
+            ),
+            or_(
+                AuditAnswer.id.in_(answer_ids),
+                AuditAnswer.audit_plan_id.in_(plan_ids),
+                NcAction.assigned_user_id.in_(user_ids),
+            ),
+        )
+        touched.update(change.audit_plan_id for change in tenant_changes if change.audit_plan_id is not None)
+        template_names = sorted({change.template_name for change in tenant_changes if change.template_name})
+        if template_names:
+            touched.update(
+                db.scalars(
+                    select(AuditPlan.id).where(
+                        AuditPlan.tenant_id == tenant_id, AuditPlan.audit_type.in_(template_names)
+                    )
+                )
+            )
+        refresh_plan_progress(db, tenant_id, touched)
+    db.commit()
+    return len(changes)
+
+
+def create_job(db: Session, tenant_id: int, user_id: int, job_type: str, payload: dict) -> Job:
+    job = Job(tenant_id=tenant_id, user_id=user_id, type=job_type, payload=payload)
+    db.add(job)
+    db.commit()
+    return job
+
+
+def get_job(db: Session, tenant_id: int, job_id: int) -> Job | None:
+    return get_tenant_row(db, Job, tenant_id, job_id)
+
+
+def register_job_artifact(db: Session, tenant_id: int, job_id: int, blob: StoredBlob) -> datetime:
+    # A retried job replaces the artifact of its earlier attempt.
+    values = {**blob._asdict(), 'expires_at': func.now() + timedelta(hours=settings.job_artifact_retention_hours)}
+    statement = pg_insert(JobArtifact).values(job_id=job_id, tenant_id=tenant_id, **values)
+    expires_at = db.scalar(
+        statement.on_conflict_do_update(index_elements=[JobArtifact.job_id], set_=values).returning(
+            JobArtifact.expires_at
+        )
+    )
+    db.commit()
+    return expires_at
+
+
+def get_job_artifact(db: Session, tenant_id: int, user_id: int, job_id: int) -> JobArtifact | None:
+    return db.scalar(
+        select(JobArtifact)
+        .join(Job, Job.id == JobArtifact.job_id)
+        .where(
+            JobArtifact.job_id == job_id,
+            JobArtifact.tenant_id == tenant_id,
+            Job.user_id == user_id,
+            JobArtifact.expires_at > func.now(),
+        )
+    )
+
+
+def delete_expired_job_artifacts(db: Session) -> list[str]:
+    # Returns the digests no artifact refers to any more; identical exports
+    # share one stored blob.
+    expired = set(
+        db.scalars(delete(JobArtifact).where(JobArtifact.expires_at <= func.now()).returning(JobArtifact.sha256))
+    )
+    kept = set(db.scalars(select(JobArtifact.sha256).where(JobArtifact.sha256.in_(expired)))) if expired else set()
+    db.commit()
+    return sorted(expired - kept)
+
+
+def delete_expired_sync_tombstones(db: Session) -> int:
+    # A token older than the retention gets a full snapshot, so older tombstones
+    # are never read again.
+    deleted = db.execute(
+        delete(SyncTombstone).where(
+            SyncTombstone.deleted_at < func.now() - timedelta(days=settings.sync_tombstone_retention_days)
+        )
+    ).rowcount
+    db.commit()
+    return deleted
+
+
+def get_idempotent_response(db: Session, tenant_id: int, key: str) -> Row | None:
+    return db.execute(
+        select(IdempotencyKey.request_hash, IdempotencyKey.response).where(
+            IdempotencyKey.tenant_id == tenant_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.created_at > func.now() - timedelta(hours=settings.idempotency_key_retention_hours),
+        )
+    ).first()
+
+
+def claim_idempotency_key(db: Session, tenant_id: int, key: str, request_hash: str) -> Row | None:
+    # A concurrent request with the same key blocks on the insert until the
+    # first one commits or rolls back. Returns the stored row when the key was
+    # already used, None when it is now claimed by this transaction.
+    db.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.tenant_id == tenant_id,
+            IdempotencyKey.created_at <= func.now() - timedelta(hours=settings.idempotency_key_retention_hours),
+        )
+    )
+    claimed = db.scalar(
+        pg_insert(IdempotencyKey)
+        .values(tenant_id=tenant_id, key=key, request_hash=request_hash)
+        .on_conflict_do_nothing(index_elements=[IdempotencyKey.tenant_id, IdempotencyKey.key])
+        .returning(IdempotencyKey.key)
+    )
+    if claimed is not None:
+        return None
+    return get_idempotent_response(db, tenant_id, key)
+
+
+def store_idempotent_response(db: Session, tenant_id: int, key: str, response: dict) -> None:
+    db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.tenant_id == tenant_id, IdempotencyKey.key == key)
+        .values(response=response)
+    )
+    db.commit()
@@ -0,0 +1,240 @@
+from collections import Counter
+from collections.abc import Collection, Iterable, Mapping
+
+from sqlalchemy import Row, delete, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from .events import record_events, status_events
+from .models import AuditAnswer, AuditPlan, AuditPlanProgress, AuditTemplate, DashboardCounter, NcRegisterEntry
+from .schemas import DashboardSummary
+
+OPEN_NC_STATUSES = ('Assigned', 'In Progress', 'Rework')
+PENDING_REVIEW_STATUS = 'Resolution Submitted'
+PLAN_DIMENSIONS = ('site', 'region', 'department')
+
+CounterKey = tuple[str, str, str]
+
+
+def _plan_keys(row: Mapping) -> list[CounterKey]:
+    metric = f'plans:{row["status"]}'
+    keys = [('tenant', '', metric)]
+    keys.extend((dimension, row[dimension], metric) for dimension in PLAN_DIMENSIONS if row[dimension])
+    if row['customer_id']:
+        keys.append(('customer', row['customer_id'], metric))
+    return keys
+
+
+def _nc_keys(row: Mapping) -> list[CounterKey]:
+    metric = f'ncs:{row["nc_status"]}'
+    keys = [('tenant', '', metric)]
+    if row['assigned_nc']:
+        keys.append(('department', row['assigned_nc'], metric))
+    if row['customer_id']:
+        keys.append(('customer', row['customer_id'], metric))
+    return keys
+
+
+def apply_counter_deltas(db: Session, tenant_id: int, deltas: Counter) -> None:
+    # Sorted so that concurrent writers lock counter rows in the same order.
+    rows = [
+        {'tenant_id': tenant_id, 'dimension': dimension, 'dimension_value': value, 'metric': metric, 'value': delta}
+        for (dimension, value, metric), delta in sorted(deltas.items())
+        if delta
+    ]
+    if not rows:
+        return
+    statement = pg_insert(DashboardCounter).values(rows)
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[
+                DashboardCounter.tenant_id,
+                DashboardCounter.dimension,
+                DashboardCounter.dimension_value,
+                DashboardCounter.metric,
+            ],
+            set_={'value': DashboardCounter.value + statement.excluded.value},
+        )
+    )
+
+
+def record_nc_changes(
+    db: Session,
+    tenant_id: int,
+    removed: Iterable[Row],
+    added: Iterable[Row],
+    emit_events: bool = True,
+) -> None:
+    deltas: Counter = Counter()
+    for row in removed:
+        for key in _nc_keys(row._mapping):
+            deltas[key] -= 1
+    for row in added:
+        for key in _nc_keys(row._mapping):
+            deltas[key] += 1
+    apply_counter_deltas(db, tenant_id, deltas)
+    if not emit_events:
+        return
+    record_events(
+        db,
+        tenant_id,
+        status_events(
+            'nc.status',
+            {row.answer_id: {**row._mapping, 'status': row.nc_status} for row in removed},
+            {row.answer_id: {**row._mapping, 'status': row.nc_status} for row in added},
+            ('audit_plan_id',),
+        ),
+    )
+
+
+def _plan_status(answer_count: int, submitted_count: int, question_count: int, open_ncs: int, pending: int) -> str:
+    if not answer_count:
+        return 'Created'
+    if question_count and submitted_count >= question_count and not open_ncs and not pending:
+        return 'Completed'
+    return 'In Progress'
+
+
+def refresh_plan_progress(
+    db: Session,
+    tenant_id: int,
+    plan_ids: Collection[int],
+    emit_events: bool = True,
+) -> None:
+    # Recomputes the given plans' progress rows and moves their counter
+    # contributions, in the caller's transaction. Locking the plans serializes
+    # concurrent refreshes of the same plan; deleted plans just drop out.
+    # Status changes are recorded as events unless `emit_events` is off.
+    if not plan_ids:
+        return
+    plan_ids = sorted(plan_ids)
+    plans = db.execute(
+        select(
+            AuditPlan.id,
+            AuditPlan.audit_type,
+            AuditPlan.site,
+            AuditPlan.region,
+            AuditPlan.department,
+            AuditPlan.customer_id,
+        )
+        .where(AuditPlan.tenant_id == tenant_id, AuditPlan.id.in_(plan_ids))
+        .order_by(AuditPlan.id)
+        .with_for_update()
+    ).all()
+    previous = db.execute(
+        select(
+            AuditPlanProgress.audit_plan_id,
+            AuditPlanProgress.status,
+            AuditPlanProgress.site,
+            AuditPlanProgress.region,
+            AuditPlanProgress.department,
+            AuditPlanProgress.customer_id,
+        ).where(AuditPlanProgress.tenant_id == tenant_id, AuditPlanProgress.audit_plan_id.in_(plan_ids))
+    ).all()
+    answers = {
+        plan_id: (total, submitted)
+        for plan_id, total, submitted in db.execute(
+            select(
+                AuditAnswer.audit_plan_id,
+                func.count(),
+                func.count().filter(AuditAnswer.status == 'Submitted'),
+            )
+            .where(AuditAnswer.tenant_id == tenant_id, AuditAnswer.audit_plan_id.in_(plan_ids))
+            .group_by(AuditAnswer.audit_plan_id)
+        )
+    }
+    ncs = {
+        plan_id: (open_ncs, pending)
+        for plan_id, open_ncs, pending in db.execute(
+            select(
+                NcRegisterEntry.audit_plan_id,
+                func.count().filter(NcRegisterEntry.nc_status.in_(OPEN_NC_STATUSES)),
+                func.count().filter(NcRegisterEntry.nc_status == PENDING_REVIEW_STATUS),
+            )
+            .where(NcRegisterEntry.tenant_id == tenant_id, NcRegisterEntry.audit_plan_id.in_(plan_ids))
+            .group_by(NcRegisterEntry.audit_plan_id)
+        )
+    }
+    question_counts = {
+        name: len(questions or [])
+        for name, questions in db.execute(
+            select(AuditTemplate.name, AuditTemplate.questions).where(
+                AuditTemplate.tenant_id == tenant_id,
+                AuditTemplate.name.in_(sorted({plan.audit_type for plan in plans})),
+            )
+        )
+    }
+
+    progress = []
+    for plan in plans:
+        answer_count, submitted_count = answers.get(plan.id, (0, 0))
+        open_ncs, pending = ncs.get(plan.id, (0, 0))
+        progress.append(
+            {
+                'audit_plan_id': plan.id,
+                'tenant_id': tenant_id,
+                'status': _plan_status(
+                    answer_count, submitted_count, question_counts.get(plan.audit_type, 0), open_ncs, pending
+                ),
+                'site': plan.site,
+                'region': plan.region,
+                'department': plan.department,
+                'customer_id': plan.customer_id,
+                'answer_count': answer_count,
+                'submitted_count': submitted_count,
+                'open_nc_count': open_ncs,
+                'pending_review_count': pending,
+            }
+        )
+
+    deltas: Counter = Counter()
+    for row in previous:
+        for key in _plan_keys(row._mapping):
+            deltas[key] -= 1
+    for row in progress:
+        for key in _plan_keys(row):
+            deltas[key] += 1
+
+    db.execute(
+        delete(AuditPlanProgress).where(
+            AuditPlanProgress.tenant_id == tenant_id, AuditPlanProgress.audit_plan_id.in_(plan_ids)
+        )
+    )
+    if progress:
+        db.execute(insert(AuditPlanProgress), progress)
+    apply_counter_deltas(db, tenant_id, deltas)
+    if not emit_events:
+        return
+    record_events(
+        db,
+        tenant_id,
+        status_events(
+            'audit_plan.status',
+            {row.audit_plan_id: row._mapping for row in previous},
+            {row['audit_plan_id']: row for row in progress},
+        ),
+    )
+
+
+def read_summary(db: Session, tenant_id: int, customer_id: str | None) -> DashboardSummary:
+    query = select(
+        DashboardCounter.dimension,
+        DashboardCounter.dimension_value,
+        DashboardCounter.metric,
+        DashboardCounter.value,
+    ).where(DashboardCounter.tenant_id == tenant_id, DashboardCounter.value != 0)
+    if customer_id is not None:
+        query = query.where(
+            DashboardCounter.dimension == 'customer', DashboardCounter.dimension_value == customer_id
+        )
+    else:
+        query = query.where(DashboardCounter.dimension != 'customer')
+
+    summary = DashboardSummary()
+    for dimension, dimension_value, metric, value in db.execute(query):
+        kind, _, status = metric.partition(':')
+        if dimension in ('tenant', 'customer'):
+            getattr(summary, kind)[status] = value
+        else:
+            getattr(summary, f'{kind}_by_{dimension}').setdefault(dimension_value, {})[status] = value
+    return summary
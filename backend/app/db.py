@@ -1,16 +1,30 @@
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from typing import Any, TypeVar
 from urllib.parse import quote
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.exc import DisconnectionError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
 
+from . import metrics, profiling
 from .config import settings
 
+T = TypeVar('T')
+DbSession = Session | AsyncSession
+# Triggers that capture writes from other clients skip connections with this
+# name (migrations/021_create_nc_register_changes.sql).
+APPLICATION_NAME = 'audir-api'
 
-def build_database_url() -> str:
+
+def build_database_url(host: str | None = None, port: int | None = None) -> str:
     base_url = (
         f"postgresql+psycopg://{settings.db_user}:{settings.db_password}"
-        f"@{settings.db_host}:{settings.db_port}/{settings.db_name}"
-        f"?sslmode={settings.db_sslmode}"
+        f"@{host or settings.db_host}:{port or settings.db_port}/{settings.db_name}"
+        f"?sslmode={settings.db_sslmode}&application_name={APPLICATION_NAME}"
     )
     if settings.db_schema:
         options = quote(f"-c search_path={settings.db_schema}")
@@ -18,5 +32,94 @@ def build_database_url() -> str:
     return base_url
 
 
-engine = create_engine(build_database_url(), pool_pre_ping=True)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+def _engine_options(read_only: bool) -> dict[str, Any]:
+    options: dict[str, Any] = {
+        'pool_size': settings.db_pool_size,
+        'max_overflow': settings.db_max_overflow,
+        'pool_timeout': settings.db_pool_timeout_seconds,
+        'pool_recycle': settings.db_pool_recycle_seconds,
+        'pool_pre_ping': settings.db_pre_ping == 'always',
+    }
+    if read_only:
+        # Every transaction starts READ ONLY, so a write on a replica session
+        # fails on the spot rather than only against a hot standby.
+        options['execution_options'] = {'postgresql_readonly': True}
+    return options
+
+
+def _ping_idle_connections(engine: Engine) -> None:
+    # Connections checked in less than DB_PRE_PING_IDLE_SECONDS ago were just
+    # used successfully, so only older ones pay for a round trip on checkout.
+    @event.listens_for(engine, 'checkin')
+    def checkin(dbapi_connection, record) -> None:
+        if dbapi_connection is not None:
+            record.info['checked_in_at'] = time.monotonic()
+
+    @event.listens_for(engine, 'checkout')
+    def checkout(dbapi_connection, record, proxy) -> None:
+        checked_in_at = record.info.get('checked_in_at')
+        if checked_in_at is None or time.monotonic() - checked_in_at < settings.db_pre_ping_idle_seconds:
+            return
+        try:
+            cursor = dbapi_connection.cursor()
+            cursor.execute('SELECT 1')
+            cursor.close()
+        except Exception as exc:  # noqa: BLE001
+            raise DisconnectionError() from exc
+
+
+def _configure_engine(engine: Engine, label: str) -> None:
+    metrics.instrument_engine(engine, label)
+    profiling.instrument_engine(engine)
+    if settings.db_pre_ping == 'idle':
+        _ping_idle_connections(engine)
+
+
+def make_engine(url: str, label: str, read_only: bool = False) -> Engine:
+    created = create_engine(url, poolclass=metrics.TimedQueuePool, **_engine_options(read_only))
+    _configure_engine(created, label)
+    return created
+
+
+def make_async_engine(url: str, label: str, read_only: bool = False) -> AsyncEngine:
+    created = create_async_engine(url, poolclass=metrics.TimedAsyncQueuePool, **_engine_options(read_only))
+    _configure_engine(created.sync_engine, label)
+    return created
+
+
+engine = make_engine(build_database_url(), 'sync')
+SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False)
+
+async_engine = make_async_engine(build_database_url(), 'async') if settings.db_async else None
+AsyncSessionLocal = (
+    async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    if async_engine is not None
+    else None
+)
+
+
+async def run_sync(db: DbSession, fn: Callable[..., T], *args: Any) -> T:
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args)
+    return await run_in_threadpool(fn, db, *args)
+
+
+@asynccontextmanager
+async def open_session() -> AsyncIterator[DbSession]:
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        await run_in_threadpool(db.close)
+
+
+async def close_session(db: DbSession) -> None:
+    # Returns the request's connection to the pool before a long-lived response.
+    if isinstance(db, AsyncSession):
+        await db.close()
+    else:
+        await run_in_threadpool(db.close)
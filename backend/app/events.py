@@ -0,0 +1,267 @@
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator, Mapping
+from datetime import timedelta
+
+import psycopg
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from psycopg.conninfo import make_conninfo
+from sqlalchemy import Row, and_, delete, func, insert, or_, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .db import SessionLocal, build_database_url
+from .models import Event
+
+logger = logging.getLogger(__name__)
+
+EVENT_CHANNEL = 'tenant_events'
+EVENT_MEDIA_TYPE = 'text/event-stream'
+EVENT_COLUMNS = (Event.id, Event.tenant_id, Event.customer_id, Event.type, Event.data)
+RECONNECT_SECONDS = 2.0
+PRUNE_INTERVAL_SECONDS = 3600
+RETRY_FRAME = b'retry: 3000\n\n'
+HEARTBEAT_FRAME = b': ping\n\n'
+
+
+def status_events(
+    event_type: str,
+    before: Mapping[int, Mapping],
+    after: Mapping[int, Mapping],
+    fields: tuple[str, ...] = (),
+) -> list[dict]:
+    # One event per key whose status changed, appeared or disappeared.
+    events = []
+    for key in sorted(before.keys() | after.keys()):
+        old, new = before.get(key), after.get(key)
+        previous = old['status'] if old else None
+        current = new['status'] if new else None
+        if previous == current:
+            continue
+        row = new or old
+        events.append(
+            {
+                'type': event_type,
+                'customer_id': row['customer_id'],
+                'data': {
+                    'id': key,
+                    **{field: row[field] for field in fields},
+                    'status': current,
+                    'previous': previous,
+                },
+            }
+        )
+    return events
+
+
+def lock_tenant_events(db: Session, tenant_id: int) -> None:
+    # Event ids come from a sequence when the row is inserted, not when it
+    # commits. Holding this lock until commit keeps a tenant's events committing
+    # in id order, so resuming after Last-Event-ID never skips a slower commit.
+    # Take it first in any transaction that can record events, before it locks
+    # rows, so that every writer acquires the two in the same order.
+    if settings.events_enabled:
+        db.execute(select(func.pg_advisory_xact_lock(tenant_id)))
+
+
+def record_events(db: Session, tenant_id: int, events: list[dict]) -> None:
+    # Written in the caller's transaction. NOTIFY is only delivered on commit,
+    # so listeners never see events of a rolled back write.
+    # The transaction must already hold lock_tenant_events(tenant_id).
+    if not events or not settings.events_enabled:
+        return
+    ids = db.scalars(
+        insert(Event).returning(Event.id), [{**event, 'tenant_id': tenant_id} for event in events]
+    ).all()
+    db.execute(select(func.pg_notify(EVENT_CHANNEL, f'{tenant_id}:{min(ids)}:{max(ids)}')))
+
+
+def read_events(db: Session, tenant_id: int, after: int, customer_id: str | None, limit: int) -> list[Row]:
+    query = select(*EVENT_COLUMNS).where(Event.tenant_id == tenant_id, Event.id > after)
+    if customer_id is not None:
+        query = query.where(Event.customer_id == customer_id)
+    return db.execute(query.order_by(Event.id).limit(limit)).all()
+
+
+def latest_event_id(db: Session) -> int:
+    return db.scalar(select(func.max(Event.id))) or 0
+
+
+def _read_ranges(ranges: list[tuple[int, int, int]]) -> list[Row]:
+    matches = [and_(Event.tenant_id == tenant_id, Event.id.between(first, last)) for tenant_id, first, last in ranges]
+    with SessionLocal() as db:
+        return db.execute(select(*EVENT_COLUMNS).where(or_(*matches)).order_by(Event.id)).all()
+
+
+def _replay(tenant_id: int, customer_id: str | None, after: int) -> tuple[list[Row], int | None]:
+    # Returns the events after `after`, or no events and the id to reset to
+    # when the client is too far behind to catch up event by event.
+    with SessionLocal() as db:
+        events = read_events(db, tenant_id, after, customer_id, settings.events_replay_limit + 1)
+        if len(events) > settings.events_replay_limit:
+            return [], latest_event_id(db)
+        return events, None
+
+
+def _prune() -> None:
+    with SessionLocal() as db:
+        db.execute(
+            delete(Event).where(Event.created_at < func.now() - timedelta(hours=settings.events_retention_hours))
+        )
+        db.commit()
+
+
+def _frame(event: Row) -> bytes:
+    data = json.dumps(event.data, separators=(',', ':'))
+    return f'id: {event.id}\nevent: {event.type}\ndata: {data}\n\n'.encode()
+
+
+def _listen_conninfo() -> str:
+    # Built from the parsed URL: rendering it back to a URL would encode the
+    # space in `options=-c search_path=...` as '+', which libpq rejects.
+    url = make_url(build_database_url())
+    return make_conninfo(
+        host=url.host, port=url.port, dbname=url.database, user=url.username, password=url.password, **url.query
+    )
+
+
+class Subscription:
+    def __init__(self, tenant_id: int, customer_id: str | None) -> None:
+        self.tenant_id = tenant_id
+        self.customer_id = customer_id
+        self.queue: asyncio.Queue[Row] = asyncio.Queue(maxsize=settings.events_queue_size)
+        self.overflowed = False
+
+    def offer(self, event: Row) -> None:
+        if self.customer_id is not None and event.customer_id != self.customer_id:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class EventBroker:
+    # One LISTEN connection per worker. Notifications only carry the tenant and
+    # id range of a commit; the events are read once and fanned out to every
+    # subscription of that tenant.
+    def __init__(self) -> None:
+        self._subscriptions: dict[int, set[Subscription]] = {}
+        self._pending: asyncio.Queue[tuple[int, int, int]] = asyncio.Queue()
+        self._watermark: int | None = None
+        self.connected = False
+
+    def subscribe(self, tenant_id: int, customer_id: str | None) -> Subscription:
+        subscription = Subscription(tenant_id, customer_id)
+        self._subscriptions.setdefault(tenant_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.tenant_id)
+        if subscriptions is None:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.tenant_id]
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(_listen_conninfo(), autocommit=True) as conn:
+                    await conn.execute(f'LISTEN {EVENT_CHANNEL}')
+                    cursor = await conn.execute('SELECT COALESCE(MAX(id), 0) FROM events')
+                    (latest,) = await cursor.fetchone()
+                    if self._watermark is not None:
+                        # Notifications sent while the listener was down are
+                        # lost; the event log fills the gap.
+                        for tenant_id in self._subscriptions:
+                            self._pending.put_nowait((tenant_id, self._watermark + 1, latest))
+                    self._watermark = latest
+                    self.connected = True
+                    async for notify in conn.notifies():
+                        tenant_id, first, last = (int(part) for part in notify.payload.split(':'))
+                        self._watermark = max(self._watermark, last)
+                        self._pending.put_nowait((tenant_id, first, last))
+            except Exception:  # noqa: BLE001
+                logger.exception('Event listener connection failed')
+            finally:
+                self.connected = False
+            await asyncio.sleep(RECONNECT_SECONDS)
+
+    async def _dispatch(self) -> None:
+        while True:
+            pending = [await self._pending.get()]
+            while not self._pending.empty():
+                pending.append(self._pending.get_nowait())
+            ranges = [item for item in pending if item[0] in self._subscriptions]
+            if not ranges:
+                continue
+            try:
+                events = await run_in_threadpool(_read_ranges, ranges)
+            except Exception:  # noqa: BLE001
+                logger.exception('Failed to read events')
+                continue
+            for event in events:
+                for subscription in list(self._subscriptions.get(event.tenant_id, ())):
+                    subscription.offer(event)
+
+    async def _prune(self) -> None:
+        while True:
+            try:
+                await run_in_threadpool(_prune)
+            except Exception:  # noqa: BLE001
+                logger.exception('Failed to prune events')
+            await asyncio.sleep(PRUNE_INTERVAL_SECONDS)
+
+    async def run(self) -> None:
+        await asyncio.gather(self._listen(), self._dispatch(), self._prune())
+
+    async def stream(
+        self, tenant_id: int, customer_id: str | None, last_event_id: int | None
+    ) -> AsyncIterator[bytes]:
+        # Subscribing before the replay query means no commit falls between the
+        # two; events seen by both are sent once.
+        subscription = self.subscribe(tenant_id, customer_id)
+        try:
+            yield RETRY_FRAME
+            seen: set[int] = set()
+            if last_event_id is not None:
+                backlog, reset_id = await run_in_threadpool(_replay, tenant_id, customer_id, last_event_id)
+                if reset_id is not None:
+                    yield f'id: {reset_id}\nevent: reset\ndata: {{}}\n\n'.encode()
+                for event in backlog:
+                    seen.add(event.id)
+                    yield _frame(event)
+            # A client that fell behind is disconnected once its queue drains
+            # and resumes from its Last-Event-ID.
+            while not (subscription.overflowed and subscription.queue.empty()):
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), settings.events_heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT_FRAME
+                    continue
+                if event.id not in seen:
+                    yield _frame(event)
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self) -> dict:
+        return {
+            'connected': self.connected,
+            'tenants': len(self._subscriptions),
+            'subscribers': sum(len(subscriptions) for subscriptions in self._subscriptions.values()),
+        }
+
+
+broker = EventBroker()
+
+
+def event_response(tenant_id: int, customer_id: str | None, last_event_id: int | None) -> StreamingResponse:
+    return StreamingResponse(
+        broker.stream(tenant_id, customer_id, last_event_id),
+        media_type=EVENT_MEDIA_TYPE,
+        headers={'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no'},
+    )
@@ -0,0 +1,349 @@
+import base64
+import binascii
+import hashlib
+import os
+import re
+import tempfile
+from collections.abc import Iterable, Iterator
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import quote, unquote_to_bytes
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from .config import settings
+from .schemas import AuditAnswerBase
+
+DIGEST_PATTERN = '^[0-9a-f]{64}$'
+DEFAULT_CONTENT_TYPE = 'application/octet-stream'
+# Uploaded types the browser may render in place. Anything else, notably HTML
+# and SVG, which can run script in the API's origin, is served as a download.
+INLINE_CONTENT_TYPES = frozenset(
+    {'image/png', 'image/jpeg', 'image/gif', 'image/webp', 'image/heic', 'application/pdf'}
+)
+
+_DATA_URL = re.compile(r'data:(?P<type>[^;,]*)(?P<params>(?:;[^;,]*)*),(?P<data>.*)', re.DOTALL)
+_RANGE = re.compile(r'bytes=(\d*)-(\d*)')
+
+
+class StoredBlob(NamedTuple):
+    sha256: str
+    size: int
+    content_type: str
+    filename: str | None
+
+
+def evidence_url(digest: str) -> str:
+    return f'/evidence/{digest}'
+
+
+class LocalStore:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def put(self, digest: str, spooled: Path, content_type: str) -> None:
+        target = self._path(digest)
+        if target.exists():
+            spooled.unlink()
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(spooled, target)
+
+    def read(self, digest: str, start: int, end: int) -> Iterator[bytes]:
+        with open(self._path(digest), 'rb') as handle:
+            handle.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = handle.read(min(settings.evidence_chunk_size, remaining))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, digest: str) -> None:
+        self._path(digest).unlink(missing_ok=True)
+
+
+class S3Store:
+    def __init__(self, bucket: str, prefix: str) -> None:
+        import boto3
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client(
+            's3',
+            endpoint_url=settings.evidence_s3_endpoint_url or None,
+            region_name=settings.evidence_s3_region or None,
+        )
+
+    def _key(self, digest: str) -> str:
+        return f'{self.prefix}{digest}'
+
+    def _exists(self, digest: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(digest))
+        except ClientError as exc:
+            if exc.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+        return True
+
+    def put(self, digest: str, spooled: Path, content_type: str) -> None:
+        try:
+            if not self._exists(digest):
+                self.client.upload_file(
+                    str(spooled), self.bucket, self._key(digest), ExtraArgs={'ContentType': content_type}
+                )
+        finally:
+            spooled.unlink()
+
+    def read(self, digest: str, start: int, end: int) -> Iterator[bytes]:
+        body = self.client.get_object(
+            Bucket=self.bucket, Key=self._key(digest), Range=f'bytes={start}-{end}'
+        )['Body']
+        try:
+            yield from body.iter_chunks(settings.evidence_chunk_size)
+        finally:
+            body.close()
+
+    def delete(self, digest: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(digest))
+
+
+@lru_cache(maxsize=1)
+def get_store() -> LocalStore | S3Store:
+    if settings.evidence_store == 's3':
+        return S3Store(settings.evidence_s3_bucket, settings.evidence_s3_prefix)
+    return LocalStore(Path(settings.evidence_local_dir))
+
+
+@lru_cache(maxsize=1)
+def get_artifact_store() -> LocalStore | S3Store:
+    # Job output (exports) lives next to the evidence but under its own prefix,
+    # so expiring it can never touch audit evidence.
+    if settings.evidence_store == 's3':
+        return S3Store(settings.evidence_s3_bucket, settings.job_artifact_s3_prefix)
+    return LocalStore(Path(settings.evidence_local_dir) / 'job-artifacts')
+
+
+class _Spool:
+    # Uploads are hashed while they are written to a temporary file, so the
+    # content address is known without reading the file back.
+    def __init__(
+        self, filename: str | None, content_type: str, limited: bool = True, store: LocalStore | S3Store | None = None
+    ) -> None:
+        directory = Path(settings.evidence_local_dir) / 'tmp'
+        directory.mkdir(parents=True, exist_ok=True)
+        self.file = tempfile.NamedTemporaryFile(dir=directory, delete=False)
+        self.path = Path(self.file.name)
+        self.filename = filename
+        self.content_type = content_type
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        self.max_bytes = settings.evidence_max_bytes if limited else None
+        self.target = store
+        self.pending: list[bytes] = []
+
+    def write(self, data: bytes) -> None:
+        self.size += len(data)
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail='Evidence file too large'
+            )
+        self.hasher.update(data)
+        self.file.write(data)
+
+    def flush(self) -> None:
+        data = b''.join(self.pending)
+        self.pending.clear()
+        self.write(data)
+
+    def store(self) -> StoredBlob:
+        self.file.close()
+        digest = self.hasher.hexdigest()
+        (self.target or get_store()).put(digest, self.path, self.content_type)
+        return StoredBlob(digest, self.size, self.content_type, self.filename)
+
+    def discard(self) -> None:
+        self.file.close()
+        self.path.unlink(missing_ok=True)
+
+
+def store_bytes(data: bytes, content_type: str, filename: str | None = None) -> StoredBlob:
+    return store_stream((data,), content_type, filename)
+
+
+def store_stream(
+    chunks: Iterable[bytes],
+    content_type: str,
+    filename: str | None = None,
+    limited: bool = True,
+    store: LocalStore | S3Store | None = None,
+) -> StoredBlob:
+    spool = _Spool(filename, content_type, limited, store)
+    try:
+        for chunk in chunks:
+            spool.write(chunk)
+        return spool.store()
+    except BaseException:
+        spool.discard()
+        raise
+
+
+async def receive_uploads(request: Request) -> list[StoredBlob]:
+    # Parses the multipart body as it arrives instead of letting Starlette
+    # spool the whole form first; only parts with a filename are stored.
+    media_type, options = parse_options_header(request.headers.get('content-type', ''))
+    if media_type != b'multipart/form-data' or b'boundary' not in options:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Expected multipart/form-data')
+
+    spools: list[_Spool] = []
+    current: list[_Spool | None] = [None]
+    headers: dict[bytes, bytes] = {}
+    header = [b'', b'']
+
+    def on_part_begin() -> None:
+        headers.clear()
+        current[0] = None
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        header[0] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        header[1] += data[start:end]
+
+    def on_header_end() -> None:
+        headers[header[0].lower()] = header[1]
+        header[0] = header[1] = b''
+
+    def on_headers_finished() -> None:
+        _, disposition = parse_options_header(headers.get(b'content-disposition', b''))
+        if b'filename' in disposition:
+            content_type = headers.get(b'content-type', b'').decode('latin-1') or DEFAULT_CONTENT_TYPE
+            current[0] = _Spool(disposition[b'filename'].decode('utf-8', 'replace'), content_type)
+            spools.append(current[0])
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        if current[0] is not None:
+            current[0].pending.append(data[start:end])
+
+    parser = MultipartParser(
+        options[b'boundary'],
+        {
+            'on_part_begin': on_part_begin,
+            'on_header_field': on_header_field,
+            'on_header_value': on_header_value,
+            'on_header_end': on_header_end,
+            'on_headers_finished': on_headers_finished,
+            'on_part_data': on_part_data,
+        },
+    )
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for spool in spools:
+                if spool.pending:
+                    await run_in_threadpool(spool.flush)
+        parser.finalize()
+        return [await run_in_threadpool(spool.store) for spool in spools]
+    except BaseException:
+        for spool in spools:
+            spool.discard()
+        raise
+
+
+def decode_data_url(value: str) -> tuple[bytes, str] | None:
+    match = _DATA_URL.fullmatch(value.strip())
+    if match is None:
+        return None
+    content_type = match['type'] or 'text/plain'
+    try:
+        if ';base64' in match['params'].lower():
+            return base64.b64decode(match['data'], validate=False), content_type
+        return unquote_to_bytes(match['data']), content_type
+    except (binascii.Error, ValueError):
+        return None
+
+
+def _offload(payloads: list[AuditAnswerBase]) -> list[StoredBlob]:
+    blobs = []
+    for payload in payloads:
+        decoded = decode_data_url(payload.evidence_data_url) if payload.evidence_data_url else None
+        if decoded is None:
+            continue
+        blob = store_bytes(*decoded, payload.evidence_name)
+        urls = payload.evidence_urls or []
+        if evidence_url(blob.sha256) not in urls:
+            payload.evidence_urls = [*urls, evidence_url(blob.sha256)]
+        payload.evidence_data_url = None
+        blobs.append(blob)
+    return blobs
+
+
+async def offload_data_urls(payloads: list[AuditAnswerBase]) -> list[StoredBlob]:
+    return await run_in_threadpool(_offload, payloads)
+
+
+def _byte_range(header: str | None, size: int) -> tuple[int, int] | None:
+    match = _RANGE.fullmatch(header.strip()) if header else None
+    if match is None or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail='Range not satisfiable',
+            headers={'Content-Range': f'bytes */{size}'},
+        )
+    return start, end
+
+
+def _attachment(filename: str | None, digest: str) -> str:
+    name = filename or digest
+    fallback = re.sub(r'[^A-Za-z0-9._-]', '_', name)
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(name, safe='')}"
+
+
+def evidence_response(
+    blob,
+    request: Request,
+    store: LocalStore | S3Store | None = None,
+    cache_control: str = 'private, max-age=31536000, immutable',
+) -> Response:
+    headers = {
+        'ETag': f'"{blob.sha256}"',
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': cache_control,
+        'X-Content-Type-Options': 'nosniff',
+    }
+    if blob.content_type.split(';')[0].strip().lower() not in INLINE_CONTENT_TYPES:
+        headers['Content-Disposition'] = _attachment(blob.filename, blob.sha256)
+    if request.headers.get('if-none-match') == headers['ETag']:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    # Multi-range requests are answered with the whole blob.
+    byte_range = _byte_range(request.headers.get('range'), blob.size) if blob.size else None
+    start, end = byte_range or (0, blob.size - 1)
+    headers['Content-Length'] = str(end - start + 1)
+    if byte_range:
+        headers['Content-Range'] = f'bytes {start}-{end}/{blob.size}'
+    body = (store or get_store()).read(blob.sha256, start, end) if blob.size else iter(())
+    return StreamingResponse(
+        body,
+        status_code=status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK,
+        media_type=blob.content_type,
+        headers=headers,
+    )
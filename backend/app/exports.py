@@ -0,0 +1,152 @@
+import csv
+import io
+import json
+import zlib
+from collections.abc import AsyncIterator, Callable, Iterator, Sequence
+from datetime import date, datetime
+from enum import Enum
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .db import AsyncSessionLocal, SessionLocal
+from .models import AuditAnswer, AuditPlan, NcAction
+from .pagination import NDJSON_MEDIA_TYPE
+
+EXPORT_MODELS = {
+    'audit-plans': AuditPlan,
+    'audit-answers': AuditAnswer,
+    'nc-actions': NcAction,
+}
+
+
+class ExportFormat(str, Enum):
+    csv = 'csv'
+    ndjson = 'ndjson'
+
+
+MEDIA_TYPES = {ExportFormat.csv: 'text/csv', ExportFormat.ndjson: NDJSON_MEDIA_TYPE}
+
+
+# Joins from each exported model up to the audit plan that owns its rows.
+PLAN_JOINS = {
+    AuditPlan: (),
+    AuditAnswer: ((AuditPlan, AuditPlan.id == AuditAnswer.audit_plan_id),),
+    NcAction: (
+        (AuditAnswer, AuditAnswer.id == NcAction.audit_answer_id),
+        (AuditPlan, AuditPlan.id == AuditAnswer.audit_plan_id),
+    ),
+}
+
+
+def export_statement(entity: str, tenant_id: int, customer_id: str | None = None) -> Select:
+    model = EXPORT_MODELS.get(entity)
+    if model is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Unknown export')
+    statement = select(*model.__table__.c).where(model.tenant_id == tenant_id)
+    if customer_id is not None:
+        for target, onclause in PLAN_JOINS[model]:
+            statement = statement.join(target, onclause)
+        statement = statement.where(AuditPlan.customer_id == customer_id)
+    return statement.order_by(model.id).execution_options(yield_per=settings.export_batch_size)
+
+
+def _json_default(value: object) -> str:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def _csv_value(value: object) -> object:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+class _Encoder:
+    def __init__(self, columns: list[str], fmt: ExportFormat) -> None:
+        self.columns = columns
+        self.fmt = fmt
+
+    def header(self) -> bytes:
+        if self.fmt is not ExportFormat.csv:
+            return b''
+        return self._csv([self.columns])
+
+    def batch(self, rows: Sequence[tuple]) -> bytes:
+        if self.fmt is ExportFormat.csv:
+            return self._csv([[_csv_value(value) for value in row] for row in rows])
+        columns = self.columns
+        return ''.join(
+            json.dumps(dict(zip(columns, row)), default=_json_default) + '\n' for row in rows
+        ).encode()
+
+    def _csv(self, rows: list) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode()
+
+
+def export_filename(entity: str, fmt: ExportFormat, compress: bool) -> str:
+    return f'{entity}.{fmt.value}' + ('.gz' if compress else '')
+
+
+def export_media_type(fmt: ExportFormat, compress: bool) -> str:
+    return 'application/gzip' if compress else MEDIA_TYPES[fmt]
+
+
+def export_chunks(
+    db: Session,
+    statement: Select,
+    fmt: ExportFormat,
+    compress: bool,
+    on_rows: Callable[[int], None] | None = None,
+) -> Iterator[bytes]:
+    encoder = _Encoder([column.name for column in statement.selected_columns], fmt)
+    gzip = zlib.compressobj(wbits=31) if compress else None
+
+    def encode(data: bytes) -> bytes:
+        return gzip.compress(data) if gzip else data
+
+    yield encode(encoder.header())
+    for rows in db.execute(statement).partitions():
+        yield encode(encoder.batch(rows))
+        if on_rows:
+            on_rows(len(rows))
+    if gzip:
+        yield gzip.flush()
+
+
+def export_response(statement: Select, fmt: ExportFormat, compress: bool, filename: str) -> StreamingResponse:
+    # Like ndjson_response, the stream holds its own session so the export runs
+    # on one server-side cursor for as long as the client keeps reading.
+    async def generate_async() -> AsyncIterator[bytes]:
+        encoder = _Encoder([column.name for column in statement.selected_columns], fmt)
+        gzip = zlib.compressobj(wbits=31) if compress else None
+
+        def encode(data: bytes) -> bytes:
+            return gzip.compress(data) if gzip else data
+
+        yield encode(encoder.header())
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(statement)
+            async for rows in result.partitions():
+                yield encode(encoder.batch(rows))
+        if gzip:
+            yield gzip.flush()
+
+    def generate_sync() -> Iterator[bytes]:
+        with SessionLocal() as db:
+            yield from export_chunks(db, statement, fmt, compress)
+
+    body = generate_async() if AsyncSessionLocal is not None else generate_sync()
+    return StreamingResponse(
+        body,
+        media_type=export_media_type(fmt, compress),
+        headers={'Content-Disposition': f'attachment; filename="{export_filename(filename, fmt, compress)}"'},
+    )
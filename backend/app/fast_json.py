@@ -0,0 +1,27 @@
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+from . import crud
+from .db import DbSession, run_sync
+from .pagination import PageParams, set_next_cursor
+
+
+def encode_rows(fields: list[str], rows: list) -> bytes:
+    # Matches the pydantic JSON output of the *Out schemas: field order, compact
+    # separators, ISO dates and Z for UTC timestamps.
+    return orjson.dumps([dict(zip(fields, row)) for row in rows], option=orjson.OPT_UTC_Z)
+
+
+async def fast_list_response(
+    db: DbSession,
+    model,
+    schema: type[BaseModel],
+    tenant_id: int,
+    page: PageParams,
+) -> Response:
+    fields = list(schema.model_fields)
+    rows = await run_sync(db, crud.list_columns, model, fields, tenant_id, page.limit, page.cursor)
+    response = Response(content=encode_rows(fields, rows), media_type='application/json')
+    set_next_cursor(response, rows, page.limit)
+    return response
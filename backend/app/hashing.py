@@ -0,0 +1,143 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
+
+from fastapi import HTTPException, status
+
+from .config import settings
+
+
+@lru_cache
+def _context(rounds: int):
+    # Only the worker processes hash, so the API process never imports passlib.
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=['bcrypt'],
+        deprecated='auto',
+        bcrypt__rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+def _hash(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def _verify(password: str, hashed: str, rounds: int) -> tuple[bool, str | None]:
+    return _context(rounds).verify_and_update(password, hashed)
+
+
+def _warm(rounds: int) -> None:
+    _context(rounds)
+
+
+class HashingService:
+    def __init__(self, workers: int, max_pending: int, rounds: int) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._rejected = 0
+        self._timings: dict[str, list[float]] = {}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+            return self._executor
+
+    def _submit(self, operation: str, fn, *args) -> Future:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail='Password hashing queue is full',
+                    headers={'Retry-After': '1'},
+                )
+            self._pending += 1
+        started = time.perf_counter()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._finish(operation, started)
+            raise
+        future.add_done_callback(lambda _: self._finish(operation, started))
+        return future
+
+    def _finish(self, operation: str, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._pending -= 1
+            timing = self._timings.setdefault(operation, [0, 0.0, 0.0])
+            timing[0] += 1
+            timing[1] += elapsed
+            timing[2] = max(timing[2], elapsed)
+
+    async def hash(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit('hash', _hash, password, self.rounds))
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        # Bulk work keeps one hash per worker in flight, so logins still find
+        # room in the queue, and waits rather than failing when it is full.
+        slots = asyncio.Semaphore(self.workers)
+
+        async def hash_one(password: str) -> str:
+            async with slots:
+                while True:
+                    try:
+                        return await self.hash(password)
+                    except HTTPException as exc:
+                        if exc.status_code != status.HTTP_503_SERVICE_UNAVAILABLE:
+                            raise
+                    await asyncio.sleep(0.05)
+
+        return list(await asyncio.gather(*(hash_one(password) for password in passwords)))
+
+    async def verify(self, password: str, hashed: str) -> tuple[bool, str | None]:
+        # The second element is a replacement hash when the stored one was made
+        # with a different cost factor.
+        return await asyncio.wrap_future(
+            self._submit('verify', _verify, password, hashed, self.rounds)
+        )
+
+    async def prewarm(self) -> None:
+        executor = self._get_executor()
+        await asyncio.gather(
+            *(asyncio.wrap_future(executor.submit(_warm, self.rounds)) for _ in range(self.workers))
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            operations = {
+                operation: {
+                    'count': int(count),
+                    'total_ms': round(total * 1000, 3),
+                    'max_ms': round(peak * 1000, 3),
+                }
+                for operation, (count, total, peak) in self._timings.items()
+            }
+            return {'pending': self._pending, 'rejected': self._rejected, 'operations': operations}
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+hashing = HashingService(
+    workers=settings.hash_pool_workers,
+    max_pending=settings.hash_queue_limit,
+    rounds=settings.bcrypt_rounds,
+)
@@ -0,0 +1,323 @@
+import codecs
+import csv
+import io
+import re
+import tempfile
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Iterator
+from enum import Enum
+from itertools import islice
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+
+from . import crud
+from .bulk import format_validation_error
+from .config import settings
+from .db import DbSession, run_sync
+from .hashing import hashing
+from .models import AuditTemplate, Department, Site
+from .schemas import AuditTemplateBase, BulkResult, BulkRowResult, DepartmentBase, SiteBase, UserCreate
+
+CSV_MEDIA_TYPES = ('text/csv', 'application/csv')
+XLSX_MEDIA_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+_RECORD_BOUNDARY = re.compile(r'["\n]')
+_LIST_SEPARATOR = re.compile(r'[;,|]')
+
+
+class ImportEntity(str, Enum):
+    users = 'users'
+    sites = 'sites'
+    departments = 'departments'
+    templates = 'templates'
+
+
+def _complete_records(buffer: str, start: int, quoted: bool) -> tuple[int, bool]:
+    # Finds the end of the last record in `buffer` that is complete, i.e. the
+    # last newline outside quotes. Scanning resumes at `start` with the quote
+    # state left by the previous call.
+    end = 0
+    for match in _RECORD_BOUNDARY.finditer(buffer, start):
+        if match.group() == '"':
+            quoted = not quoted
+        elif not quoted:
+            end = match.end()
+    return end, quoted
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail='Import file too large')
+
+
+async def _csv_rows(request: Request) -> AsyncIterator[list]:
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    buffer = ''
+    scanned = 0
+    quoted = False
+    size = 0
+    async for chunk in request.stream():
+        # Checked per chunk: an unterminated quoted field would otherwise grow
+        # the buffer until the request ends.
+        size += len(chunk)
+        if size > settings.import_max_bytes:
+            raise _too_large()
+        buffer += decoder.decode(chunk)
+        end, quoted = _complete_records(buffer, scanned, quoted)
+        if end:
+            for row in csv.reader(io.StringIO(buffer[:end])):
+                yield row
+            buffer = buffer[end:]
+        scanned = len(buffer)
+    buffer += decoder.decode(b'', final=True)
+    for row in csv.reader(io.StringIO(buffer)):
+        yield row
+
+
+def _xlsx_sheet(spooled) -> Iterator[tuple]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail='XLSX imports are not available'
+        ) from exc
+    try:
+        workbook = load_workbook(spooled, read_only=True, data_only=True)
+    except Exception as exc:  # noqa: BLE001
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid XLSX file') from exc
+    return workbook.worksheets[0].iter_rows(values_only=True)
+
+
+async def _xlsx_rows(request: Request) -> AsyncIterator[tuple]:
+    # XLSX is a zip archive whose directory sits at the end, so the upload is
+    # spooled to disk and the first sheet is then read row by row.
+    with tempfile.TemporaryFile() as spooled:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > settings.import_max_bytes:
+                raise _too_large()
+            await run_in_threadpool(spooled.write, chunk)
+        rows = await run_in_threadpool(_xlsx_sheet, spooled)
+        while batch := await run_in_threadpool(list, islice(rows, settings.import_batch_size)):
+            for row in batch:
+                yield row
+
+
+def _cell(value: object) -> str | None:
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip() or None
+
+
+def _column(name: object) -> str:
+    return re.sub(r'\W+', '_', str(name or '').strip().lower()).strip('_')
+
+
+async def read_records(request: Request) -> AsyncIterator[tuple[int, dict[str, str]]]:
+    media_type = request.headers.get('content-type', '').split(';')[0].strip().lower()
+    if media_type in CSV_MEDIA_TYPES:
+        rows = _csv_rows(request)
+    elif media_type == XLSX_MEDIA_TYPE:
+        rows = _xlsx_rows(request)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail='Expected text/csv or an XLSX file'
+        )
+    header: list[str] | None = None
+    index = 0
+    try:
+        async for row in rows:
+            if header is None:
+                header = [_column(name) for name in row]
+                continue
+            values = {key: value for key, value in zip(header, map(_cell, row)) if key and value is not None}
+            if not values:
+                continue
+            if index >= settings.bulk_max_rows:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f'At most {settings.bulk_max_rows} rows per import',
+                )
+            yield index, values
+            index += 1
+    except csv.Error as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f'Invalid CSV: {exc}') from exc
+
+
+class _Importer(ABC):
+    schema: type[BaseModel]
+
+    def __init__(self, db: DbSession, tenant_id: int) -> None:
+        self.db = db
+        self.tenant_id = tenant_id
+        self.results: list[BulkRowResult] = []
+        self.pending: list[tuple[list[int], BaseModel]] = []
+
+    def parse(self, record: dict[str, str]) -> BaseModel:
+        return self.schema.model_validate(record)
+
+    def fail(self, indexes: list[int], error: str) -> None:
+        self.results.extend(BulkRowResult(index=index, error=error) for index in indexes)
+
+    async def add(self, index: int, record: dict[str, str]) -> None:
+        try:
+            payload = self.parse(record)
+        except ValidationError as exc:
+            self.fail([index], format_validation_error(exc))
+            return
+        await self.queue([index], payload)
+
+    async def queue(self, indexes: list[int], payload: BaseModel) -> None:
+        self.pending.append((indexes, payload))
+        if len(self.pending) >= settings.import_batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        pending, self.pending = self.pending, []
+        if pending:
+            await self.insert(pending)
+
+    @abstractmethod
+    async def insert(self, pending: list[tuple[list[int], BaseModel]]) -> None: ...
+
+    def created(self, pending: list[tuple[list[int], BaseModel]], ids: list[int]) -> None:
+        self.results.extend(
+            BulkRowResult(index=index, id=row_id) for (indexes, _), row_id in zip(pending, ids) for index in indexes
+        )
+
+    async def finish(self) -> BulkResult:
+        await self.flush()
+        self.results.sort(key=lambda result: result.index)
+        failed = sum(1 for result in self.results if result.error)
+        return BulkResult(created=len(self.results) - failed, failed=failed, results=self.results)
+
+
+class _UserImporter(_Importer):
+    schema = UserCreate
+
+    def __init__(self, db: DbSession, tenant_id: int) -> None:
+        super().__init__(db, tenant_id)
+        self.seen: set[str] = set()
+
+    async def insert(self, pending: list[tuple[list[int], UserCreate]]) -> None:
+        # Rows that would fail anyway are dropped before they cost a bcrypt hash.
+        taken = await run_sync(
+            self.db, crud.existing_user_emails, sorted({payload.email.lower() for _, payload in pending})
+        )
+        fresh = []
+        for indexes, payload in pending:
+            email = payload.email.lower()
+            if email in taken or email in self.seen:
+                self.fail(indexes, 'email: already exists')
+                continue
+            self.seen.add(email)
+            fresh.append((indexes, payload))
+        if not fresh:
+            return
+        password_hashes = await hashing.hash_many([payload.password for _, payload in fresh])
+        ids = await run_sync(
+            self.db, crud.import_users, self.tenant_id, [payload for _, payload in fresh], password_hashes
+        )
+        self.created(fresh, ids)
+
+
+class _NamedImporter(_Importer):
+    def __init__(self, db: DbSession, tenant_id: int, schema: type[BaseModel], model, resource: str) -> None:
+        super().__init__(db, tenant_id)
+        self.schema = schema
+        self.model = model
+        self.resource = resource
+        self.seen: set[str] = set()
+
+    async def unique(self, pending: list[tuple[list[int], BaseModel]]) -> list[tuple[list[int], BaseModel]]:
+        taken = await run_sync(
+            self.db, crud.existing_names, self.model, self.tenant_id, sorted({payload.name for _, payload in pending})
+        )
+        fresh = []
+        for indexes, payload in pending:
+            if payload.name in taken or payload.name in self.seen:
+                self.fail(indexes, 'name: already exists')
+                continue
+            self.seen.add(payload.name)
+            fresh.append((indexes, payload))
+        return fresh
+
+    async def insert(self, pending: list[tuple[list[int], BaseModel]]) -> None:
+        fresh = await self.unique(pending)
+        if fresh:
+            ids = await run_sync(
+                self.db,
+                crud.import_named_rows,
+                self.tenant_id,
+                self.model,
+                self.resource,
+                [payload.name for _, payload in fresh],
+            )
+            self.created(fresh, ids)
+
+
+class _TemplateImporter(_NamedImporter):
+    # One row per question; consecutive rows with the same name form one
+    # template, whose note and tags come from its first row.
+    def __init__(self, db: DbSession, tenant_id: int) -> None:
+        super().__init__(db, tenant_id, AuditTemplateBase, AuditTemplate, 'templates')
+        self.current: tuple[list[int], AuditTemplateBase] | None = None
+        self.names: set[str] = set()
+
+    def parse(self, record: dict[str, str]) -> AuditTemplateBase:
+        tags = [tag.strip() for tag in _LIST_SEPARATOR.split(record.get('tags', '')) if tag.strip()]
+        question = record.get('question')
+        return AuditTemplateBase.model_validate(
+            {
+                'name': record.get('name'),
+                'note': record.get('note'),
+                'tags': tags,
+                'questions': [question] if question else [],
+            }
+        )
+
+    async def queue(self, indexes: list[int], payload: AuditTemplateBase) -> None:
+        if self.current and self.current[1].name == payload.name:
+            self.current[0].extend(indexes)
+            self.current[1].questions.extend(payload.questions)
+            return
+        if payload.name in self.names:
+            self.fail(indexes, f'name: rows of template {payload.name!r} must be adjacent')
+            return
+        self.names.add(payload.name)
+        current, self.current = self.current, (indexes, payload)
+        if current:
+            await super().queue(*current)
+
+    async def insert(self, pending: list[tuple[list[int], AuditTemplateBase]]) -> None:
+        fresh = await self.unique(pending)
+        if fresh:
+            ids = await run_sync(self.db, crud.import_templates, self.tenant_id, [payload for _, payload in fresh])
+            self.created(fresh, ids)
+
+    async def finish(self) -> BulkResult:
+        current, self.current = self.current, None
+        if current:
+            self.pending.append(current)
+        return await super().finish()
+
+
+def _importer(entity: ImportEntity, db: DbSession, tenant_id: int) -> _Importer:
+    if entity is ImportEntity.users:
+        return _UserImporter(db, tenant_id)
+    if entity is ImportEntity.sites:
+        return _NamedImporter(db, tenant_id, SiteBase, Site, 'sites')
+    if entity is ImportEntity.departments:
+        return _NamedImporter(db, tenant_id, DepartmentBase, Department, 'departments')
+    return _TemplateImporter(db, tenant_id)
+
+
+async def import_records(request: Request, db: DbSession, tenant_id: int, entity: ImportEntity) -> BulkResult:
+    importer = _importer(entity, db, tenant_id)
+    async for index, record in read_records(request):
+        await importer.add(index, record)
+    return await importer.finish()
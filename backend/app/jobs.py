@@ -0,0 +1,352 @@
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from datetime import timedelta
+from typing import NamedTuple
+
+from fastapi import status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field, ValidationError, field_validator
+from sqlalchemy import Row, and_, func, select, update
+from sqlalchemy.orm import Session
+
+from . import crud
+from .auth import Principal
+from .config import settings
+from .db import DbSession, SessionLocal, run_sync
+from .evidence import get_artifact_store, store_stream
+from .exports import (
+    EXPORT_MODELS,
+    ExportFormat,
+    export_chunks,
+    export_filename,
+    export_media_type,
+    export_statement,
+)
+from .models import Job
+from .schemas import AuditPlanCreate, BulkResult, BulkRowResult, JobOut
+
+logger = logging.getLogger(__name__)
+
+JOB_CHUNK_SIZE = 500
+PROGRESS_INTERVAL_SECONDS = 1.0
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+def job_artifact_url(job_id: int) -> str:
+    return f'/jobs/{job_id}/artifact'
+
+
+class Progress:
+    # Written in its own session so that GET /jobs/{id} sees it while the
+    # job's transaction is still open.
+    def __init__(self, job_id: int) -> None:
+        self.job_id = job_id
+        self.done = 0
+        self._written_at = 0.0
+
+    def __call__(self, done: int, total: int | None = None) -> None:
+        self.done = done
+        now = time.monotonic()
+        if total is None and now - self._written_at < PROGRESS_INTERVAL_SECONDS:
+            return
+        self._written_at = now
+        values = {'progress': done} if total is None else {'progress': done, 'total': total}
+        with SessionLocal() as db:
+            db.execute(update(Job).where(Job.id == self.job_id).values(**values))
+            db.commit()
+
+    def advance(self, count: int) -> None:
+        self(self.done + count)
+
+    def flush(self) -> None:
+        self._written_at = 0.0
+        self(self.done)
+
+
+class BulkPlansParams(BaseModel):
+    rows: list[AuditPlanCreate] = Field(max_length=settings.bulk_max_rows)
+    indexes: list[int] | None = None
+    errors: list[BulkRowResult] = []
+
+
+class DeletePlansParams(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=settings.bulk_max_rows)
+
+
+class ExportParams(BaseModel):
+    entity: str
+    format: ExportFormat = ExportFormat.ndjson
+    gzip: bool = False
+
+    @field_validator('entity')
+    @classmethod
+    def known_entity(cls, value: str) -> str:
+        if value not in EXPORT_MODELS:
+            raise ValueError(f'must be one of {", ".join(EXPORT_MODELS)}')
+        return value
+
+
+class RebuildParams(BaseModel):
+    pass
+
+
+def _create_plans(db: Session, tenant_id: int, params: BulkPlansParams, progress: Progress) -> dict:
+    indexes = params.indexes or list(range(len(params.rows)))
+    results = list(params.errors)
+    progress(0, len(params.rows))
+    for start in range(0, len(params.rows), JOB_CHUNK_SIZE):
+        chunk = params.rows[start:start + JOB_CHUNK_SIZE]
+        created = crud.create_audit_plans(db, tenant_id, chunk)
+        results.extend(
+            BulkRowResult(index=index, id=plan_id, code=code)
+            for index, (plan_id, code) in zip(indexes[start:], created)
+        )
+        progress.advance(len(chunk))
+    results.sort(key=lambda result: result.index)
+    return BulkResult(
+        created=len(results) - len(params.errors), failed=len(params.errors), results=results
+    ).model_dump()
+
+
+def _delete_plans(db: Session, tenant_id: int, params: DeletePlansParams, progress: Progress) -> dict:
+    ids = sorted(set(params.ids))
+    deleted: list[int] = []
+    progress(0, len(ids))
+    for start in range(0, len(ids), JOB_CHUNK_SIZE):
+        chunk = ids[start:start + JOB_CHUNK_SIZE]
+        deleted.extend(crud.delete_audit_plans(db, tenant_id, chunk))
+        progress.advance(len(chunk))
+    return {'deleted': len(deleted), 'missing': sorted(set(ids) - set(deleted))}
+
+
+def _export(db: Session, tenant_id: int, params: ExportParams, progress: Progress) -> dict:
+    statement = export_statement(params.entity, tenant_id)
+    progress(0, db.scalar(select(func.count()).select_from(statement.subquery())))
+    blob = store_stream(
+        export_chunks(db, statement, params.format, params.gzip, progress.advance),
+        export_media_type(params.format, params.gzip),
+        export_filename(params.entity, params.format, params.gzip),
+        limited=False,
+        store=get_artifact_store(),
+    )
+    expires_at = crud.register_job_artifact(db, tenant_id, progress.job_id, blob)
+    return {
+        **blob._asdict(),
+        'url': job_artifact_url(progress.job_id),
+        'expires_at': expires_at.isoformat(),
+    }
+
+
+def _rebuild_dashboard(db: Session, tenant_id: int, params: RebuildParams, progress: Progress) -> None:
+    crud.rebuild_dashboard(db, tenant_id)
+
+
+class JobType(NamedTuple):
+    params: type[BaseModel]
+    handler: Callable[[Session, int, BaseModel, Progress], dict | None]
+    concurrency: int
+    # Only idempotent jobs are re-queued after their worker disappeared.
+    retry: bool
+
+
+JOB_TYPES = {
+    'audit_plans.bulk': JobType(BulkPlansParams, _create_plans, 2, False),
+    'audit_plans.delete': JobType(DeletePlansParams, _delete_plans, 1, True),
+    'export': JobType(ExportParams, _export, 2, True),
+    'dashboard.rebuild': JobType(RebuildParams, _rebuild_dashboard, 1, True),
+}
+
+
+def concurrency(job_type: str) -> int:
+    return settings.job_concurrency.get(job_type, JOB_TYPES[job_type].concurrency)
+
+
+def parse_params(job_type: str, payload: dict) -> BaseModel:
+    try:
+        return JOB_TYPES[job_type].params.model_validate(payload)
+    except ValidationError as exc:
+        raise RequestValidationError(
+            [{**error, 'loc': ('body', 'payload', *error['loc'])} for error in exc.errors()]
+        ) from exc
+
+
+async def enqueue_job(db: DbSession, current_user: Principal, job_type: str, params: BaseModel) -> JSONResponse:
+    job = await run_sync(
+        db, crud.create_job, current_user.tenant_id, current_user.id, job_type, params.model_dump(mode='json')
+    )
+    runner.notify()
+    return JSONResponse(
+        JobOut.model_validate(job).model_dump(mode='json'),
+        status_code=status.HTTP_202_ACCEPTED,
+        headers={'Location': f'/jobs/{job.id}'},
+    )
+
+
+def _claim(db: Session, job_type: str, count: int) -> list[Row]:
+    ready = (
+        select(Job.id)
+        .where(Job.status == 'queued', Job.type == job_type)
+        .order_by(Job.id)
+        .limit(count)
+        .with_for_update(skip_locked=True)
+    )
+    return db.execute(
+        update(Job)
+        .where(Job.id.in_(ready))
+        .values(status='running', attempts=Job.attempts + 1, started_at=func.now(), heartbeat_at=func.now())
+        .returning(Job.id, Job.type, Job.tenant_id, Job.payload)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+
+def _recover_stale(db: Session) -> None:
+    # Jobs whose runner stopped heartbeating are re-queued, or failed when
+    # they are not safe to repeat or have used up their attempts.
+    stale = and_(
+        Job.status == 'running',
+        Job.heartbeat_at < func.now() - timedelta(seconds=settings.job_stale_seconds),
+    )
+    retryable = [name for name, job_type in JOB_TYPES.items() if job_type.retry]
+    db.execute(
+        update(Job)
+        .where(stale, Job.type.in_(retryable), Job.attempts < settings.job_max_attempts)
+        .values(status='queued')
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        update(Job)
+        .where(stale)
+        .values(status='failed', error='Job runner stopped while running the job', finished_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _poll(running: list[int], slots: dict[str, int]) -> list[Row]:
+    with SessionLocal() as db:
+        if running:
+            db.execute(
+                update(Job)
+                .where(Job.id.in_(running))
+                .values(heartbeat_at=func.now())
+                .execution_options(synchronize_session=False)
+            )
+        _recover_stale(db)
+        claimed = [row for job_type, count in slots.items() for row in _claim(db, job_type, count)]
+        db.commit()
+        return claimed
+
+
+def _prune_artifacts() -> None:
+    with SessionLocal() as db:
+        digests = crud.delete_expired_job_artifacts(db)
+    store = get_artifact_store()
+    for digest in digests:
+        store.delete(digest)
+
+
+def _prune_sync_tombstones() -> None:
+    with SessionLocal() as db:
+        crud.delete_expired_sync_tombstones(db)
+
+
+def _finish(db: Session, job_id: int, status: str, result: dict | None = None, error: str | None = None) -> None:
+    db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == 'running')
+        .values(status=status, result=result, error=error, finished_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def _execute(job_id: int, job_type: str, tenant_id: int, payload: dict) -> None:
+    spec = JOB_TYPES[job_type]
+    with SessionLocal() as db:
+        progress = Progress(job_id)
+        try:
+            result = spec.handler(db, tenant_id, spec.params.model_validate(payload), progress)
+            progress.flush()
+        except Exception as exc:  # noqa: BLE001
+            db.rollback()
+            logger.exception('Job %s (%s) failed', job_id, job_type)
+            _finish(db, job_id, 'failed', error=str(getattr(exc, 'detail', None) or exc) or type(exc).__name__)
+        else:
+            _finish(db, job_id, 'succeeded', result=result)
+
+
+class JobRunner:
+    def __init__(self, workers: int, poll_seconds: float) -> None:
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self._executor: ThreadPoolExecutor | None = None
+        self._running: dict[int, str] = {}
+        self._wake = asyncio.Event()
+        self._pruned_at = 0.0
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def _free_slots(self) -> dict[str, int]:
+        capacity = self.workers - len(self._running)
+        slots = {}
+        for job_type in JOB_TYPES:
+            busy = sum(1 for running in self._running.values() if running == job_type)
+            free = min(concurrency(job_type) - busy, capacity)
+            if free > 0:
+                slots[job_type] = free
+        return slots
+
+    def _done(self, job_id: int) -> None:
+        self._running.pop(job_id, None)
+        self._wake.set()
+
+    async def run(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='job')
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wake.clear()
+            try:
+                claimed = await run_in_threadpool(_poll, list(self._running), self._free_slots())
+            except Exception:  # noqa: BLE001
+                logger.exception('Failed to poll the job queue')
+                claimed = []
+            for job in claimed:
+                self._running[job.id] = job.type
+                future = loop.run_in_executor(
+                    self._executor, _execute, job.id, job.type, job.tenant_id, job.payload
+                )
+                future.add_done_callback(lambda _, job_id=job.id: self._done(job_id))
+            if time.monotonic() - self._pruned_at >= PRUNE_INTERVAL_SECONDS:
+                self._pruned_at = time.monotonic()
+                try:
+                    await run_in_threadpool(_prune_artifacts)
+                except Exception:  # noqa: BLE001
+                    logger.exception('Failed to prune job artifacts')
+                try:
+                    await run_in_threadpool(_prune_sync_tombstones)
+                except Exception:  # noqa: BLE001
+                    logger.exception('Failed to prune sync tombstones')
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), self.poll_seconds)
+
+    def stats(self) -> dict:
+        running: dict[str, int] = {}
+        for job_type in self._running.values():
+            running[job_type] = running.get(job_type, 0) + 1
+        return {'workers': self.workers, 'running': running}
+
+    def shutdown(self) -> None:
+        # Jobs still running are picked up again by _recover_stale once their
+        # heartbeat goes stale.
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+runner = JobRunner(settings.job_workers, settings.job_poll_seconds)
@@ -1,34 +1,119 @@
-from fastapi import Depends, FastAPI, HTTPException, status
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Path, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
 
-from . import crud
-from .auth import create_access_token, get_current_user, get_db, verify_password
+from . import crud, register_changes
+from .activity import LastActiveRecorder
+from .auth import (
+    Principal,
+    cache_principal,
+    create_access_token,
+    get_current_user,
+    get_db,
+    principal_cache,
+)
+from .batch import run_batch
+from .bulk import read_bulk_rows
 from .config import settings
+from .db import DbSession, async_engine, close_session, run_sync
+from .evidence import (
+    DIGEST_PATTERN,
+    evidence_response,
+    evidence_url,
+    get_artifact_store,
+    offload_data_urls,
+    receive_uploads,
+)
+from .events import broker as events, event_response
+from .exports import ExportFormat, export_response, export_statement
+from .fast_json import fast_list_response
+from .hashing import hashing
+from .imports import ImportEntity, import_records
+from .jobs import JOB_TYPES, BulkPlansParams, enqueue_job, parse_params, runner as jobs
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, registry
 from .models import AuditPlan, AuditTemplate, Department, Region, ResponseType, Site, User
+from .pagination import (
+    NEXT_CURSOR_HEADER,
+    PageParams,
+    encode_cursor,
+    ndjson_response,
+    page_params,
+    set_next_cursor,
+)
+from .profiling import QueryProfileMiddleware
+from .reference_cache import cached_list_response
+from .replicas import WriteMarkerMiddleware, router as replicas
 from .schemas import (
+    AuditAnswerBase,
+    AuditAnswerOut,
     AuditPlanCreate,
     AuditPlanOut,
     AuditPlanUpdate,
     AuditTemplateBase,
     AuditTemplateOut,
+    BatchRequest,
+    BatchResponse,
+    BulkResult,
+    BulkRowResult,
+    DashboardSummary,
     DepartmentBase,
     DepartmentOut,
+    EvidenceOut,
+    JobCreate,
+    JobOut,
+    NcActionCreate,
+    NcActionOut,
+    NcRegisterCounts,
+    NcRegisterOut,
     PasswordReset,
     RegionBase,
     RegionOut,
     ResponseTypeBase,
     ResponseTypeOut,
+    SearchResult,
     SiteBase,
     SiteOut,
+    SyncResponse,
     Token,
     UserCreate,
     UserOut,
     UserUpdate,
 )
-
-app = FastAPI(title='Audir API')
+from .sync import decode_sync_token, encode_sync_token
+from .warmup import readiness, warm_up
+
+
+last_active = LastActiveRecorder(settings.last_active_flush_seconds)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    tasks = [asyncio.create_task(last_active.run()), asyncio.create_task(warm_up())]
+    if settings.job_runner_enabled:
+        tasks.append(asyncio.create_task(jobs.run()))
+    if settings.nc_register_sync_enabled:
+        tasks.append(asyncio.create_task(register_changes.run()))
+    if settings.events_enabled:
+        tasks.append(asyncio.create_task(events.run()))
+    if replicas.replicas:
+        tasks.append(asyncio.create_task(replicas.run()))
+    yield
+    for task in reversed(tasks):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await last_active.flush()
+    jobs.shutdown()
+    hashing.shutdown()
+    if async_engine is not None:
+        await async_engine.dispose()
+    await replicas.dispose()
+
+
+app = FastAPI(title='Audir API', lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -36,304 +121,656 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=['*'],
     allow_headers=['*'],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
+app.add_middleware(QueryProfileMiddleware)
+app.add_middleware(WriteMarkerMiddleware)
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+
+@app.get('/health')
+async def health():
+    return {
+        'ok': True,
+        'principal_cache': principal_cache.stats(),
+        'hashing': hashing.stats(),
+        'replicas': replicas.stats(),
+        'jobs': jobs.stats(),
+        'events': events.stats(),
+    }
+
+
+@app.get('/ready')
+async def ready(response: Response):
+    if not readiness.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return readiness.stats()
+
+
+@app.get('/metrics', include_in_schema=False)
+async def metrics():
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Not Found')
+    return Response(content=registry.render(), media_type=METRICS_CONTENT_TYPE)
 
 
 @app.post('/auth/login', response_model=Token)
-def login(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == form.username.lower()).first()
-    if not user or not verify_password(form.password, user.password_hash):
+async def login(form: OAuth2PasswordRequestForm = Depends(), db: DbSession = Depends(get_db)):
+    user = await run_sync(db, crud.get_user_by_email, form.username)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid login')
+    verified, new_hash = await hashing.verify(form.password, user.password_hash)
+    if not verified:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid login')
+    if new_hash:
+        await run_sync(db, crud.reset_password, user.tenant_id, user.id, new_hash)
 
     token = create_access_token(str(user.id), user.tenant_id, user.role)
-    crud.set_last_active(db, user)
+    last_active.touch(user.id)
+    cache_principal(user)
     return Token(access_token=token)
 
 
 @app.get('/users', response_model=list[UserOut])
-def list_users(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    return crud.list_users(db, current_user.tenant_id)
+async def list_users(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
+):
+    if page.stream:
+        return ndjson_response(crud.select_tenant_rows(User, current_user.tenant_id), UserOut)
+    if settings.fast_list_json:
+        return await fast_list_response(db, User, UserOut, current_user.tenant_id, page)
+    users = await run_sync(db, crud.list_users, current_user.tenant_id, page.limit, page.cursor)
+    set_next_cursor(response, users, page.limit)
+    return users
 
 
 @app.post('/users', response_model=UserOut, status_code=status.HTTP_201_CREATED)
-def create_user(
+async def create_user(
     payload: UserCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
 ):
-    return crud.create_user(db, current_user.tenant_id, payload)
+    password_hash = await hashing.hash(payload.password)
+    return await run_sync(db, crud.create_user, current_user.tenant_id, payload, password_hash)
 
 
 @app.put('/users/{user_id}', response_model=UserOut)
-def update_user(
+async def update_user(
     user_id: int,
     payload: UserUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
 ):
-    user = (
-        db.query(User)
-        .filter(User.id == user_id, User.tenant_id == current_user.tenant_id)
-        .first()
-    )
+    user = await run_sync(db, crud.update_user, current_user.tenant_id, user_id, payload)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='User not found')
-    return crud.update_user(db, user, payload)
+    return user
 
 
 @app.post('/users/{user_id}/reset-password', response_model=UserOut)
-def reset_password(
+async def reset_password(
     user_id: int,
     payload: PasswordReset,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
 ):
-    user = (
-        db.query(User)
-        .filter(User.id == user_id, User.tenant_id == current_user.tenant_id)
-        .first()
-    )
+    password_hash = await hashing.hash(payload.new_password)
+    user = await run_sync(db, crud.reset_password, current_user.tenant_id, user_id, password_hash)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='User not found')
-    return crud.reset_password(db, user, payload.new_password)
+    return user
 
 
 @app.get('/departments', response_model=list[DepartmentOut])
-def list_departments(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def list_departments(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(page_params),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
 ):
-    return crud.list_departments(db, current_user.tenant_id)
+    if page.stream:
+        return ndjson_response(crud.select_tenant_rows(Department, current_user.tenant_id), DepartmentOut)
+    if page.limit is None and page.cursor is None:
+        return await cached_list_response(
+            request, db, current_user.tenant_id, 'departments', crud.list_departments, DepartmentOut
+        )
+    if settings.fast_list_json:
+        return await fast_list_response(db, Department, DepartmentOut, current_user.tenant_id, page)
+    departments = await run_sync(db, crud.list_departments, current_user.tenant_id, page.limit, page.cursor)
+    set_next_cursor(response, departments, page.limit)
+    return departments
 
 
 @app.post('/departments', response_model=DepartmentOut, status_code=status.HTTP_201_CREATED)
-def create_department(
+async def create_department(
     payload: DepartmentBase,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
 ):
-    return crud.create_department(db, current_user.tenant_id, payload)
+    return await run_sync(db, crud.create_department, current_user.tenant_id, payload)
 
 
 @app.delete('/departments/{department_id}', status_code=status.HTTP_204_NO_CONTENT)
-def delete_department(
+async def delete_department(
     department_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
 ):
-    department = (
-        db.query(Department)
-        .filter(Department.id == department_id, Department.tenant_id == current_user.tenant_id)
-        .first()
-    )
-    if not department:
+    if not await run_sync(db, crud.delete_department, current_user.tenant_id, department_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Department not found')
-    crud.delete_department(db, department)
 
 
 @app.get('/sites', response_model=list[SiteOut])
-def list_sites(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def list_sites(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(page_params),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
 ):
-    return crud.list_sites(db, current_user.tenant_id)
+    if page.stream:
+        return ndjson_response(crud.select_tenant_rows(Site, current_user.tenant_id), SiteOut)
+    if page.limit is None and page.cursor is None:
+        return await cached_list_response(
+            request, db, current_user.tenant_id, 'sites', crud.list_sites, SiteOut
+        )
+    if settings.fast_list_json:
+        return await fast_list_response(db, Site, SiteOut, current_user.tenant_id, page)
+    sites = await run_sync(db, crud.list_sites, current_user.tenant_id, page.limit, page.cursor)
+    set_next_cursor(response, sites, page.limit)
+    return sites
 
 
 @app.post('/sites', response_model=SiteOut, status_code=status.HTTP_201_CREATED)
-def create_site(
+async def create_site(
     payload: SiteBase,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
 ):
-    return crud.create_site(db, current_user.tenant_id, payload)
+    return await run_sync(db, crud.create_site, current_user.tenant_id, payload)
 
 
 @app.delete('/sites/{site_id}', status_code=status.HTTP_204_NO_CONTENT)
-def delete_site(
+async def delete_site(
     site_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
 ):
-    site = (
-        db.query(Site)
-        .filter(Site.id == site_id, Site.tenant_id == current_user.tenant_id)
-        .first()
-    )
-    if not site:
+    if not await run_sync(db, crud.delete_site, current_user.tenant_id, site_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Site not found')
-    crud.delete_site(db, site)
 
 
 @app.get('/regions', response_model=list[RegionOut])
-def list_regions(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def list_regions(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(page_params),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
 ):
-    return crud.list_regions(db, current_user.tenant_id)
+    if page.stream:
+        return ndjson_response(crud.select_tenant_rows(Region, current_user.tenant_id), RegionOut)
+    if page.limit is None and page.cursor is None:
+        return await cached_list_response(
+            request, db, current_user.tenant_id, 'regions', crud.list_regions, RegionOut
+        )
+    if settings.fast_list_json:
+        return await fast_list_response(db, Region, RegionOut, current_user.tenant_id, page)
+    regions = await run_sync(db, crud.list_regions, current_user.tenant_id, page.limit, page.cursor)
+    set_next_cursor(response, regions, page.limit)
+    return regions
 
 
 @app.post('/regions', response_model=RegionOut, status_code=status.HTTP_201_CREATED)
-def create_region(
+async def create_region(
     payload: RegionBase,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
 ):
-    return crud.create_region(db, current_user.tenant_id, payload)
+    return await run_sync(db, crud.create_region, current_user.tenant_id, payload)
 
 
 @app.delete('/regions/{region_id}', status_code=status.HTTP_204_NO_CONTENT)
-def delete_region(
+async def delete_region(
     region_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
 ):
-    region = (
-        db.query(Region)
-        .filter(Region.id == region_id, Region.tenant_id == current_user.tenant_id)
-        .first()
-    )
-    if not region:
+    if not await run_sync(db, crud.delete_region, current_user.tenant_id, region_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Region not found')
-    crud.delete_region(db, region)
 
 
 @app.get('/response-types', response_model=list[ResponseTypeOut])
-def list_response_types(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def list_response_types(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(page_params),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
 ):
-    return crud.list_response_types(db, current_user.tenant_id)
+    if page.stream:
+        return ndjson_response(crud.select_tenant_rows(ResponseType, current_user.tenant_id), ResponseTypeOut)
+    if page.limit is None and page.cursor is None:
+        return await cached_list_response(
+            request, db, current_user.tenant_id, 'response_types', crud.list_response_types, ResponseTypeOut
+        )
+    if settings.fast_list_json:
+        return await fast_list_response(db, ResponseType, ResponseTypeOut, current_user.tenant_id, page)
+    response_types = await run_sync(db, crud.list_response_types, current_user.tenant_id, page.limit, page.cursor)
+    set_next_cursor(response, response_types, page.limit)
+    return response_types
 
 
 @app.post('/response-types', response_model=ResponseTypeOut, status_code=status.HTTP_201_CREATED)
-def create_response_type(
+async def create_response_type(
     payload: ResponseTypeBase,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
 ):
-    return crud.create_response_type(db, current_user.tenant_id, payload)
+    return await run_sync(db, crud.create_response_type, current_user.tenant_id, payload)
 
 
 @app.delete('/response-types/{response_type_id}', status_code=status.HTTP_204_NO_CONTENT)
-def delete_response_type(
+async def delete_response_type(
     response_type_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    response_type = (
-        db.query(ResponseType)
-        .filter(
-            ResponseType.id == response_type_id,
-            ResponseType.tenant_id == current_user.tenant_id,
-        )
-        .first()
-    )
-    if not response_type:
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
+):
+    if not await run_sync(db, crud.delete_response_type, current_user.tenant_id, response_type_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Response type not found')
-    crud.delete_response_type(db, response_type)
 
 
 @app.get('/templates', response_model=list[AuditTemplateOut])
-def list_templates(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def list_templates(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(page_params),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
 ):
-    return crud.list_templates(db, current_user.tenant_id)
+    if page.stream:
+        return ndjson_response(crud.select_tenant_rows(AuditTemplate, current_user.tenant_id), AuditTemplateOut)
+    if page.limit is None and page.cursor is None:
+        return await cached_list_response(
+            request, db, current_user.tenant_id, 'templates', crud.list_templates, AuditTemplateOut
+        )
+    if settings.fast_list_json:
+        return await fast_list_response(db, AuditTemplate, AuditTemplateOut, current_user.tenant_id, page)
+    templates = await run_sync(db, crud.list_templates, current_user.tenant_id, page.limit, page.cursor)
+    set_next_cursor(response, templates, page.limit)
+    return templates
 
 
 @app.post('/templates', response_model=AuditTemplateOut, status_code=status.HTTP_201_CREATED)
-def create_template(
+async def create_template(
     payload: AuditTemplateBase,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
 ):
-    return crud.create_template(db, current_user.tenant_id, payload)
+    return await run_sync(db, crud.create_template, current_user.tenant_id, payload)
 
 
 @app.delete('/templates/{template_id}', status_code=status.HTTP_204_NO_CONTENT)
-def delete_template(
+async def delete_template(
     template_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    template = (
-        db.query(AuditTemplate)
-        .filter(
-            AuditTemplate.id == template_id,
-            AuditTemplate.tenant_id == current_user.tenant_id,
-        )
-        .first()
-    )
-    if not template:
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
+):
+    if not await run_sync(db, crud.delete_template, current_user.tenant_id, template_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Template not found')
-    crud.delete_template(db, template)
 
 
 @app.put('/templates/{template_id}', response_model=AuditTemplateOut)
-def update_template(
+async def update_template(
     template_id: int,
     payload: AuditTemplateBase,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    template = (
-        db.query(AuditTemplate)
-        .filter(
-            AuditTemplate.id == template_id,
-            AuditTemplate.tenant_id == current_user.tenant_id,
-        )
-        .first()
-    )
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
+):
+    template = await run_sync(db, crud.update_template, current_user.tenant_id, template_id, payload)
     if not template:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Template not found')
-    return crud.update_template(db, template, payload)
+    return template
 
 
 @app.get('/audit-plans', response_model=list[AuditPlanOut])
-def list_audit_plans(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def list_audit_plans(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
 ):
-    return crud.list_audit_plans(db, current_user.tenant_id)
+    if page.stream:
+        return ndjson_response(crud.select_tenant_rows(AuditPlan, current_user.tenant_id), AuditPlanOut)
+    if settings.fast_list_json:
+        return await fast_list_response(db, AuditPlan, AuditPlanOut, current_user.tenant_id, page)
+    plans = await run_sync(db, crud.list_audit_plans, current_user.tenant_id, page.limit, page.cursor)
+    set_next_cursor(response, plans, page.limit)
+    return plans
 
 
 @app.post('/audit-plans', response_model=AuditPlanOut, status_code=status.HTTP_201_CREATED)
-def create_audit_plan(
+async def create_audit_plan(
     payload: AuditPlanCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
+):
+    return await run_sync(db, crud.create_audit_plan, current_user.tenant_id, payload)
+
+
+@app.post('/audit-plans/bulk', response_model=BulkResult, responses={202: {'model': JobOut}})
+async def create_audit_plans_bulk(
+    request: Request,
+    background: bool = False,
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
 ):
-    return crud.create_audit_plan(db, current_user.tenant_id, payload)
+    rows, errors = await read_bulk_rows(request, AuditPlanCreate, settings.bulk_max_rows)
+    if background:
+        params = BulkPlansParams(
+            rows=[payload for _, payload in rows], indexes=[index for index, _ in rows], errors=errors
+        )
+        return await enqueue_job(db, current_user, 'audit_plans.bulk', params)
+    created = await run_sync(
+        db,
+        crud.create_audit_plans,
+        current_user.tenant_id,
+        [payload for _, payload in rows],
+    )
+    results = errors + [
+        BulkRowResult(index=index, id=plan_id, code=code)
+        for (index, _), (plan_id, code) in zip(rows, created)
+    ]
+    results.sort(key=lambda result: result.index)
+    return BulkResult(created=len(created), failed=len(errors), results=results)
 
 
 @app.put('/audit-plans/{plan_id}', response_model=AuditPlanOut)
-def update_audit_plan(
+async def update_audit_plan(
     plan_id: int,
     payload: AuditPlanUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
 ):
-    plan = (
-        db.query(AuditPlan)
-        .filter(AuditPlan.id == plan_id, AuditPlan.tenant_id == current_user.tenant_id)
-        .first()
-    )
+    plan = await run_sync(db, crud.update_audit_plan, current_user.tenant_id, plan_id, payload)
     if not plan:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Audit plan not found')
-    return crud.update_audit_plan(db, plan, payload)
+    return plan
 
 
 @app.delete('/audit-plans/{plan_id}', status_code=status.HTTP_204_NO_CONTENT)
-def delete_audit_plan(
+async def delete_audit_plan(
     plan_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
 ):
-    plan = (
-        db.query(AuditPlan)
-        .filter(AuditPlan.id == plan_id, AuditPlan.tenant_id == current_user.tenant_id)
-        .first()
-    )
+    if not await run_sync(db, crud.delete_audit_plan, current_user.tenant_id, plan_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Audit plan not found')
+
+
+@app.post('/audit-plans/{plan_id}/answers:batch', response_model=list[AuditAnswerOut])
+async def upsert_audit_answers(
+    plan_id: int,
+    payload: list[AuditAnswerBase],
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
+):
+    plan = await run_sync(db, crud.get_tenant_row, AuditPlan, current_user.tenant_id, plan_id)
     if not plan:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Audit plan not found')
-    crud.delete_audit_plan(db, plan)
+    blobs = await offload_data_urls(payload) if settings.evidence_offload_data_urls else []
+    return await run_sync(db, crud.upsert_audit_answers, current_user.tenant_id, plan_id, payload, blobs)
+
+
+@app.post('/evidence', response_model=list[EvidenceOut], status_code=status.HTTP_201_CREATED)
+async def upload_evidence(
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
+):
+    if current_user.role == 'Customer':
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not authorized')
+    blobs = await receive_uploads(request)
+    if not blobs:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No files uploaded')
+    await run_sync(db, crud.register_evidence, current_user.tenant_id, blobs)
+    return [EvidenceOut(**blob._asdict(), url=evidence_url(blob.sha256)) for blob in blobs]
+
+
+@app.get('/evidence/{digest}')
+async def download_evidence(
+    request: Request,
+    digest: str = Path(pattern=DIGEST_PATTERN),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
+):
+    blob = await run_sync(db, crud.get_evidence_blob, current_user.tenant_id, digest)
+    if not blob:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Evidence not found')
+    return evidence_response(blob, request)
+
+
+async def _customer_id(db: DbSession, current_user: Principal) -> str | None:
+    if current_user.role != 'Customer':
+        return None
+    user = await run_sync(db, crud.get_tenant_row, User, current_user.tenant_id, current_user.id)
+    return user.email.lower() if user else None
+
+
+@app.get('/nc-register', response_model=list[NcRegisterOut])
+async def list_nc_register(
+    response: Response,
+    nc_status: str | None = Query(default=None, alias='status'),
+    assigned_nc: str | None = None,
+    audit_code: str | None = None,
+    assigned_user_id: int | None = None,
+    page: PageParams = Depends(page_params),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
+):
+    entries = await run_sync(
+        db,
+        crud.list_nc_register,
+        current_user.tenant_id,
+        await _customer_id(db, current_user),
+        nc_status,
+        assigned_nc,
+        audit_code,
+        assigned_user_id,
+        page.limit,
+        page.cursor,
+    )
+    if page.limit and len(entries) == page.limit:
+        last = entries[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.submitted_at, last.answer_id)
+    return entries
+
+
+@app.get('/nc-register/counts', response_model=NcRegisterCounts)
+async def count_nc_register(
+    assigned_nc: str | None = None,
+    audit_code: str | None = None,
+    assigned_user_id: int | None = None,
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
+):
+    by_status = await run_sync(
+        db,
+        crud.count_nc_register,
+        current_user.tenant_id,
+        await _customer_id(db, current_user),
+        assigned_nc,
+        audit_code,
+        assigned_user_id,
+    )
+    return NcRegisterCounts(total=sum(by_status.values()), by_status=by_status)
+
+
+@app.post('/nc-actions', response_model=NcActionOut)
+async def upsert_nc_action(
+    payload: NcActionCreate,
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
+):
+    if current_user.role == 'Customer':
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not authorized')
+    user, answer, assignee_department = await run_sync(
+        db,
+        crud.get_nc_action_context,
+        current_user.tenant_id,
+        current_user.id,
+        payload.answer_id,
+        payload.assigned_user_id,
+    )
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid user')
+    if not answer:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Answer not found')
+    auditor_name = (answer.auditor_name or '').lower()
+    assigned_department = (answer.assigned_nc or '').lower()
+    user_full_name = f'{user.first_name or ""} {user.last_name or ""}'.strip().lower()
+    if payload.assigned_user_id and (
+        not assignee_department or assignee_department.lower() != assigned_department
+    ):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid assignee for department')
+    if payload.status in ('Closed', 'Rework'):
+        if current_user.role.strip().lower() != 'manager' and (
+            not user_full_name or user_full_name != auditor_name
+        ):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not authorized to change status')
+    if payload.status in ('Resolution Submitted', 'In Progress'):
+        user_department = (user.department or '').lower()
+        if not user_department or user_department != assigned_department:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail='Not authorized to submit resolution'
+            )
+    return await run_sync(db, crud.upsert_nc_action, current_user.tenant_id, payload)
+
+
+@app.get('/dashboard/summary', response_model=DashboardSummary)
+async def dashboard_summary(
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
+):
+    customer_id = await _customer_id(db, current_user)
+    return await run_sync(db, crud.get_dashboard_summary, current_user.tenant_id, customer_id)
+
+
+@app.get('/search', response_model=list[SearchResult])
+async def search(
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = Query(default=20, ge=1, le=100),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
+):
+    customer_id = await _customer_id(db, current_user)
+    return await run_sync(db, crud.search, current_user.tenant_id, q, limit, customer_id)
+
+
+@app.post('/batch', response_model=BatchResponse)
+async def run_batch_operations(
+    payload: BatchRequest,
+    idempotency_key: str | None = Header(default=None, max_length=255),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
+):
+    await close_session(db)
+    return await run_batch(current_user.tenant_id, payload, idempotency_key)
+
+
+@app.get('/events')
+async def stream_events(
+    last_event_id: int | None = Header(default=None),
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
+):
+    if not settings.events_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Not Found')
+    customer_id = await _customer_id(db, current_user)
+    await close_session(db)
+    return event_response(current_user.tenant_id, customer_id, last_event_id)
+
+
+@app.get('/sync', response_model=SyncResponse)
+async def sync_changes(
+    since: str | None = None,
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
+):
+    stamp = decode_sync_token(since) if since else None
+    now, full, changes, deleted = await run_sync(db, crud.list_changes, current_user.tenant_id, stamp)
+    return SyncResponse(
+        token=encode_sync_token(now),
+        full=full,
+        deleted=deleted,
+        **{entity: rows for entity, rows in changes.items()},
+    )
+
+
+@app.post('/imports/{entity}', response_model=BulkResult)
+async def import_entity(
+    entity: ImportEntity,
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
+):
+    if current_user.role == 'Customer':
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not authorized')
+    return await import_records(request, db, current_user.tenant_id, entity)
+
+
+@app.get('/exports/{entity}')
+async def export_entity(
+    entity: str,
+    format: ExportFormat = ExportFormat.ndjson,
+    gzip: bool = False,
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
+):
+    customer_id = await _customer_id(db, current_user)
+    await close_session(db)
+    statement = export_statement(entity, current_user.tenant_id, customer_id)
+    return export_response(statement, format, gzip, entity)
+
+
+@app.post('/jobs', response_model=JobOut, status_code=status.HTTP_202_ACCEPTED)
+async def create_job(
+    payload: JobCreate,
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
+):
+    if current_user.role == 'Customer':
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not authorized')
+    if payload.type not in JOB_TYPES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Unknown job type')
+    return await enqueue_job(db, current_user, payload.type, parse_params(payload.type, payload.payload))
+
+
+@app.get('/jobs/{job_id}', response_model=JobOut)
+async def get_job(
+    job_id: int,
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
+):
+    job = await run_sync(db, crud.get_job, current_user.tenant_id, job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Job not found')
+    return job
+
+
+@app.get('/jobs/{job_id}/artifact')
+async def download_job_artifact(
+    job_id: int,
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: DbSession = Depends(get_db),
+):
+    artifact = await run_sync(db, crud.get_job_artifact, current_user.tenant_id, current_user.id, job_id)
+    if not artifact:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Job artifact not found')
+    return evidence_response(artifact, request, get_artifact_store(), cache_control='private, no-store')
@@ -0,0 +1,260 @@
+import threading
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from contextvars import ContextVar
+from time import perf_counter
+
+from anyio import to_thread
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+Labels = tuple[str, ...]
+
+
+def _format_labels(names: Labels, values: Labels, extra: str = '') -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Histogram:
+    # Each thread observes into its own shard, so the hot path takes no lock.
+    # Shards are only summed when /metrics is scraped.
+    def __init__(self, name: str, documentation: str, labelnames: Labels, buckets: tuple) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._local = threading.local()
+        self._shards: list[dict[Labels, list]] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> dict[Labels, list]:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = {}
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        shard = self._shard()
+        series = shard.get(labels)
+        if series is None:
+            series = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def _collect(self) -> dict[Labels, list]:
+        with self._lock:
+            shards = list(self._shards)
+        totals: dict[Labels, list] = {}
+        for shard in shards:
+            for labels, series in list(shard.items()):
+                total = totals.setdefault(labels, [0] * len(series))
+                for index, value in enumerate(series):
+                    total[index] += value
+        return totals
+
+    def render(self) -> Iterable[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} histogram'
+        for labels, series in sorted(self._collect().items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), series):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, f'le="{bound}"')
+                yield f'{self.name}_bucket{le} {cumulative}'
+            plain = _format_labels(self.labelnames, labels)
+            yield f'{self.name}_sum{plain} {series[-1]}'
+            yield f'{self.name}_count{plain} {cumulative}'
+
+
+class Gauge:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], Iterable[tuple[Labels, float]]],
+        labelnames: Labels = (),
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.collect = collect
+        self.labelnames = labelnames
+
+    def render(self) -> Iterable[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} gauge'
+        for labels, value in self.collect():
+            yield f'{self.name}{_format_labels(self.labelnames, labels)} {value}'
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: list[Histogram | Gauge] = []
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Labels = (),
+        buckets: tuple = LATENCY_BUCKETS,
+    ) -> Histogram:
+        histogram = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(histogram)
+        return histogram
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], Iterable[tuple[Labels, float]]],
+        labelnames: Labels = (),
+    ) -> Gauge:
+        gauge = Gauge(name, documentation, collect, labelnames)
+        self._metrics.append(gauge)
+        return gauge
+
+    def render(self) -> str:
+        return '\n'.join(line for metric in self._metrics for line in metric.render()) + '\n'
+
+
+registry = Registry()
+
+request_duration = registry.histogram(
+    'http_request_duration_seconds', 'Request latency by route.', ('method', 'route', 'status')
+)
+request_statements = registry.histogram(
+    'http_request_db_statements', 'SQL statements executed per request.', ('route',), COUNT_BUCKETS
+)
+request_db_time = registry.histogram(
+    'http_request_db_seconds', 'Time spent in SQL statements per request.', ('route',)
+)
+statement_duration = registry.histogram(
+    'db_statement_duration_seconds', 'SQL statement execution time.', ('engine',)
+)
+pool_wait = registry.histogram(
+    'db_pool_checkout_wait_seconds', 'Time spent waiting for a pooled connection.', ('engine',)
+)
+
+# [statement count, seconds] for the current request. Session work runs in
+# the request's context (greenlet or threadpool), so it lands here.
+_request_queries: ContextVar[list | None] = ContextVar('request_queries', default=None)
+
+
+def _pool_label(pool: QueuePool) -> str:
+    return 'async' if isinstance(pool, AsyncAdaptedQueuePool) else 'sync'
+
+
+class _TimedCheckout:
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait.observe(perf_counter() - start, (_pool_label(self),))
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    context._metrics_started = perf_counter()
+
+
+def _statement_observer(label: str):
+    labels = (label,)
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        elapsed = perf_counter() - context._metrics_started
+        statement_duration.observe(elapsed, labels)
+        queries = _request_queries.get()
+        if queries is not None:
+            queries[0] += 1
+            queries[1] += elapsed
+
+    return after_cursor_execute
+
+
+engines: dict[str, Engine] = {}
+
+
+def instrument_engine(engine: Engine, label: str) -> None:
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _statement_observer(label))
+    engines[label] = engine
+
+
+def _pool_stats(read: Callable[[QueuePool], int]) -> Callable[[], Iterable[tuple[Labels, float]]]:
+    def collect() -> Iterable[tuple[Labels, float]]:
+        for label, engine in engines.items():
+            if isinstance(engine.pool, QueuePool):
+                yield (label,), read(engine.pool)
+
+    return collect
+
+
+registry.gauge('db_pool_size', 'Configured pool size.', _pool_stats(QueuePool.size), ('engine',))
+registry.gauge(
+    'db_pool_checked_out', 'Connections currently checked out.', _pool_stats(QueuePool.checkedout), ('engine',)
+)
+registry.gauge(
+    'db_pool_overflow', 'Connections open beyond the pool size.', _pool_stats(lambda pool: max(pool.overflow(), 0)), ('engine',)
+)
+
+
+def _threadpool_stats(field: str) -> Callable[[], Iterable[tuple[Labels, float]]]:
+    def collect() -> Iterable[tuple[Labels, float]]:
+        yield (), getattr(to_thread.current_default_thread_limiter().statistics(), field)
+
+    return collect
+
+
+registry.gauge('threadpool_threads_busy', 'Threadpool tokens in use.', _threadpool_stats('borrowed_tokens'))
+registry.gauge('threadpool_threads_total', 'Threadpool size.', _threadpool_stats('total_tokens'))
+registry.gauge('threadpool_tasks_waiting', 'Tasks queued for a threadpool thread.', _threadpool_stats('tasks_waiting'))
+
+
+class MetricsMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        queries = [0, 0.0]
+        token = _request_queries.set(queries)
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = perf_counter() - start
+            _request_queries.reset(token)
+            route = scope.get('route')
+            path = route.path if route is not None else 'unmatched'
+            request_duration.observe(elapsed, (scope['method'], path, str(status_code)))
+            request_statements.observe(queries[0], (path,))
+            request_db_time.observe(queries[1], (path,))
@@ -0,0 +1,92 @@
+import base64
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime
+from typing import NamedTuple, TypeVar
+
+from fastapi import HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Select, tuple_
+from sqlalchemy.orm import Query as OrmQuery
+
+from .config import settings
+from .db import AsyncSessionLocal, SessionLocal
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+MAX_PAGE_SIZE = 1000
+
+QueryT = TypeVar('QueryT', OrmQuery, Select)
+
+
+class Cursor(NamedTuple):
+    created_at: datetime
+    id: int
+
+
+class PageParams(NamedTuple):
+    limit: int | None
+    cursor: Cursor | None
+    stream: bool
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f'{created_at.isoformat()}|{row_id}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(value: str) -> Cursor:
+    try:
+        padded = value + '=' * (-len(value) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode().split('|', 1)
+        return Cursor(datetime.fromisoformat(created_at), int(row_id))
+    except Exception as exc:  # noqa: BLE001
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid cursor') from exc
+
+
+def page_params(
+    request: Request,
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+) -> PageParams:
+    stream = NDJSON_MEDIA_TYPE in request.headers.get('accept', '')
+    return PageParams(limit, decode_cursor(cursor) if cursor else None, stream)
+
+
+def keyset(query: QueryT, model, limit: int | None, cursor: Cursor | None) -> QueryT:
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if cursor:
+        query = query.filter(tuple_(model.created_at, model.id) < tuple_(cursor.created_at, cursor.id))
+    if limit:
+        query = query.limit(limit)
+    return query
+
+
+def set_next_cursor(response: Response, rows: list, limit: int | None) -> None:
+    if limit and len(rows) == limit:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+
+
+def _encode_lines(rows, schema: type[BaseModel]) -> bytes:
+    return ''.join(schema.model_validate(row).model_dump_json() + '\n' for row in rows).encode()
+
+
+def ndjson_response(statement: Select, schema: type[BaseModel]) -> StreamingResponse:
+    # The request-scoped session is closed before the body is sent, so the
+    # stream holds its own session for the lifetime of the cursor.
+    statement = statement.execution_options(yield_per=settings.list_stream_chunk_size)
+
+    async def generate_async() -> AsyncIterator[bytes]:
+        async with AsyncSessionLocal() as db:
+            result = await db.stream_scalars(statement)
+            async for rows in result.partitions():
+                yield _encode_lines(rows, schema)
+
+    def generate_sync() -> Iterator[bytes]:
+        with SessionLocal() as db:
+            for rows in db.scalars(statement).partitions():
+                yield _encode_lines(rows, schema)
+
+    body = generate_async() if AsyncSessionLocal is not None else generate_sync()
+    return StreamingResponse(body, media_type=NDJSON_MEDIA_TYPE)
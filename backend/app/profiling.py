@@ -0,0 +1,201 @@
+import json
+import logging
+import random
+import re
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from time import perf_counter
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER = re.compile(r'%\(\w+\)s|\$\d+|\?|\b\d+(\.\d+)?\b|\'(?:[^\']|\'\')*\'')
+_REPEATED = re.compile(r'\?(?:\s*,\s*\?)+')
+_VALUE_ROWS = re.compile(r'\(\?\.\.\.\)(?:\s*,\s*\(\?\.\.\.\))+|\(\?\)(?:\s*,\s*\(\?\))+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    normalized = _PLACEHOLDER.sub('?', statement)
+    normalized = _REPEATED.sub('?...', normalized)
+    normalized = _VALUE_ROWS.sub('(?...)...', normalized)
+    return _WHITESPACE.sub(' ', normalized).strip()
+
+
+def parameter_shape(parameters: object) -> object:
+    if isinstance(parameters, dict):
+        return {name: parameter_shape(value) for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return {'rows': len(parameters), 'row': parameter_shape(parameters[0])}
+        return [parameter_shape(value) for value in parameters]
+    return type(parameters).__name__
+
+
+class QueryProfile:
+    def __init__(self) -> None:
+        self.statements: dict[str, list] = {}
+
+    def record(self, statement: str, elapsed: float) -> None:
+        entry = self.statements.get(statement)
+        if entry is None:
+            entry = self.statements[statement] = [0, 0.0]
+        entry[0] += 1
+        entry[1] += elapsed
+
+    @property
+    def count(self) -> int:
+        return sum(count for count, _ in self.statements.values())
+
+    def fingerprints(self) -> dict[str, tuple[int, float]]:
+        grouped: dict[str, list] = {}
+        for statement, (count, elapsed) in self.statements.items():
+            entry = grouped.setdefault(fingerprint(statement), [0, 0.0])
+            entry[0] += count
+            entry[1] += elapsed
+        return {key: (count, elapsed) for key, (count, elapsed) in grouped.items()}
+
+
+_profile: ContextVar[QueryProfile | None] = ContextVar('query_profile', default=None)
+_scope: ContextVar[dict | None] = ContextVar('query_profile_scope', default=None)
+
+
+def _route(scope: dict | None) -> str | None:
+    if scope is None:
+        return None
+    route = scope.get('route')
+    return route.path if route is not None else scope.get('path')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    context._profile_started = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = perf_counter() - context._profile_started
+    profile = _profile.get()
+    if profile is not None:
+        profile.record(statement, elapsed)
+    if settings.slow_query_ms and elapsed * 1000 >= settings.slow_query_ms:
+        scope = _scope.get()
+        logger.warning(
+            json.dumps(
+                {
+                    'event': 'slow_query',
+                    'route': _route(scope),
+                    'method': scope['method'] if scope else None,
+                    'duration_ms': round(elapsed * 1000, 3),
+                    'fingerprint': fingerprint(statement),
+                    'parameters': parameter_shape(parameters),
+                    'executemany': executemany,
+                }
+            )
+        )
+
+
+def instrument_engine(engine: Engine) -> None:
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def report(profile: QueryProfile, scope: dict) -> None:
+    threshold = settings.query_profile_repeat_threshold
+    fingerprints = profile.fingerprints()
+    for key, (count, elapsed) in fingerprints.items():
+        if count > threshold:
+            logger.warning(
+                json.dumps(
+                    {
+                        'event': 'repeated_query',
+                        'route': _route(scope),
+                        'method': scope['method'],
+                        'count': count,
+                        'total_ms': round(elapsed * 1000, 3),
+                        'fingerprint': key,
+                    }
+                )
+            )
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            json.dumps(
+                {
+                    'event': 'query_profile',
+                    'route': _route(scope),
+                    'method': scope['method'],
+                    'statements': [
+                        {'fingerprint': key, 'count': count, 'total_ms': round(elapsed * 1000, 3)}
+                        for key, (count, elapsed) in fingerprints.items()
+                    ],
+                }
+            )
+        )
+
+
+class QueryProfileMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        sampled = random.random() < settings.query_profile_sample_rate
+        profile = QueryProfile() if sampled else None
+        scope_token = _scope.set(scope)
+        profile_token = _profile.set(profile)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _profile.reset(profile_token)
+            _scope.reset(scope_token)
+            if profile is not None:
+                report(profile, scope)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(
+    max_statements: int | None = None,
+    max_repeats: int | None = None,
+) -> Iterator[QueryProfile]:
+    # Listens on every engine rather than the request context, so it also sees
+    # statements issued from TestClient's worker thread.
+    profile = QueryProfile()
+
+    def before(conn, cursor, statement, parameters, context, executemany) -> None:
+        context._budget_started = perf_counter()
+
+    def after(conn, cursor, statement, parameters, context, executemany) -> None:
+        profile.record(statement, perf_counter() - context._budget_started)
+
+    event.listen(Engine, 'before_cursor_execute', before)
+    event.listen(Engine, 'after_cursor_execute', after)
+    try:
+        yield profile
+    finally:
+        event.remove(Engine, 'before_cursor_execute', before)
+        event.remove(Engine, 'after_cursor_execute', after)
+
+    if max_statements is not None and profile.count > max_statements:
+        raise QueryBudgetExceeded(
+            f'{profile.count} statements executed, budget is {max_statements}:\n'
+            + '\n'.join(f'{count}x {key}' for key, (count, _) in profile.fingerprints().items())
+        )
+    if max_repeats is not None:
+        repeated = {key: count for key, (count, _) in profile.fingerprints().items() if count > max_repeats}
+        if repeated:
+            raise QueryBudgetExceeded(
+                f'Statements repeated more than {max_repeats} times:\n'
+                + '\n'.join(f'{count}x {key}' for key, count in repeated.items())
+            )
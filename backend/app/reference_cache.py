@@ -0,0 +1,81 @@
+from collections.abc import Callable
+from functools import lru_cache
+
+from fastapi import Request, Response, status
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .cache import TTLCache
+from .config import settings
+from .db import DbSession, run_sync
+from .models import ReferenceVersion
+
+CACHE_CONTROL = 'private, no-cache'
+
+# Versions are authoritative in reference_versions; each worker trusts its
+# copy for a few seconds so that revalidation does not touch the database.
+versions = TTLCache(
+    maxsize=settings.reference_cache_max_entries,
+    ttl=settings.reference_version_ttl_seconds,
+)
+bodies = TTLCache(maxsize=settings.reference_cache_max_entries)
+
+
+def remember_version(tenant_id: int, resource: str, version: int) -> None:
+    versions.set((tenant_id, resource), version)
+
+
+def _load_version(db: Session, tenant_id: int, resource: str) -> int:
+    version = db.scalar(
+        select(ReferenceVersion.version).where(
+            ReferenceVersion.tenant_id == tenant_id,
+            ReferenceVersion.resource == resource,
+        )
+    )
+    return version or 0
+
+
+async def current_version(db: DbSession, tenant_id: int, resource: str) -> int:
+    version = versions.get((tenant_id, resource))
+    if version is None:
+        version = await run_sync(db, _load_version, tenant_id, resource)
+        remember_version(tenant_id, resource, version)
+    return version
+
+
+@lru_cache
+def _list_adapter(schema: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[schema])
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    candidates = {value.strip().removeprefix('W/') for value in header.split(',')}
+    return '*' in candidates or etag in candidates
+
+
+async def cached_list_response(
+    request: Request,
+    db: DbSession,
+    tenant_id: int,
+    resource: str,
+    load: Callable[[Session, int], list],
+    schema: type[BaseModel],
+) -> Response:
+    version = await current_version(db, tenant_id, resource)
+    etag = f'"{resource}-{tenant_id}-{version}"'
+    headers = {'ETag': etag, 'Cache-Control': CACHE_CONTROL}
+    if _etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    key = (tenant_id, resource, version)
+    body = bodies.get(key)
+    if body is None:
+        rows = await run_sync(db, load, tenant_id)
+        adapter = _list_adapter(schema)
+        body = adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+        bodies.set(key, body)
+    return Response(content=body, media_type='application/json', headers=headers)
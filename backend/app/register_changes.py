@@ -0,0 +1,26 @@
+import asyncio
+import logging
+
+from . import crud
+from .config import settings
+from .db import open_session, run_sync
+
+logger = logging.getLogger(__name__)
+
+
+async def apply_pending() -> int:
+    async with open_session() as db:
+        return await run_sync(db, crud.apply_nc_register_changes, settings.nc_register_sync_batch_size)
+
+
+async def run() -> None:
+    # Drains nc_register_changes, which the triggers fill for writes made
+    # outside this API. A full batch is followed straight away by the next.
+    while True:
+        try:
+            applied = await apply_pending()
+        except Exception:  # noqa: BLE001
+            logger.exception('Failed to apply NC register changes')
+            applied = 0
+        if applied < settings.nc_register_sync_batch_size:
+            await asyncio.sleep(settings.nc_register_sync_seconds)
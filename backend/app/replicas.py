@@ -0,0 +1,205 @@
+import asyncio
+import hashlib
+import hmac
+import itertools
+import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Engine, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from .config import settings
+from .db import DbSession, build_database_url, close_session, make_async_engine, make_engine, open_session, run_sync
+
+logger = logging.getLogger(__name__)
+
+WRITE_MARKER_COOKIE = 'write_marker'
+
+
+def _ping(engine: Engine) -> None:
+    with engine.connect() as connection:
+        connection.execute(text('SELECT 1'))
+
+
+def current_wal_lsn(db: Session) -> str:
+    return db.scalar(text('SELECT pg_current_wal_lsn()::text'))
+
+
+def _replayed(db: Session, lsn: str) -> bool:
+    # NULL on a server that is not replaying WAL, which is not trusted either.
+    return bool(db.scalar(text('SELECT pg_last_wal_replay_lsn() >= CAST(:lsn AS pg_lsn)'), {'lsn': lsn}))
+
+
+def _parse_host(value: str) -> tuple[str, int | None]:
+    host, _, port = value.strip().partition(':')
+    return host, int(port) if port else None
+
+
+class Replica:
+    def __init__(self, name: str, host: str, port: int | None) -> None:
+        self.name = name
+        self.down_until = 0.0
+        url = build_database_url(host, port)
+        if settings.db_async:
+            self.engine = make_async_engine(url, name, read_only=True)
+            self.sessions = async_sessionmaker(bind=self.engine, autoflush=False, expire_on_commit=False)
+        else:
+            self.engine = make_engine(url, name, read_only=True)
+            self.sessions = sessionmaker(
+                bind=self.engine, autoflush=False, autocommit=False, expire_on_commit=False
+            )
+
+    @property
+    def healthy(self) -> bool:
+        return self.down_until <= time.monotonic()
+
+    def mark_down(self) -> None:
+        if self.healthy:
+            logger.warning('Replica %s is unavailable, reading from the primary', self.name)
+        self.down_until = time.monotonic() + settings.replica_retry_seconds
+
+    async def probe(self) -> None:
+        try:
+            if isinstance(self.engine, AsyncEngine):
+                async with self.engine.connect() as connection:
+                    await connection.execute(text('SELECT 1'))
+            else:
+                await run_in_threadpool(_ping, self.engine)
+        except DBAPIError:
+            self.mark_down()
+            return
+        if not self.healthy:
+            logger.info('Replica %s is back', self.name)
+        self.down_until = 0.0
+
+    async def open(self) -> DbSession:
+        db = self.sessions()
+        try:
+            if settings.db_async:
+                await db.connection()
+            else:
+                await run_in_threadpool(db.connection)
+        except DBAPIError:
+            self.mark_down()
+            if settings.db_async:
+                await db.close()
+            else:
+                await run_in_threadpool(db.close)
+            raise
+        return db
+
+    async def dispose(self) -> None:
+        if isinstance(self.engine, AsyncEngine):
+            await self.engine.dispose()
+        else:
+            self.engine.dispose()
+
+
+class ReplicaRouter:
+    def __init__(self, hosts: list[str]) -> None:
+        self.replicas = [
+            Replica(f'replica-{index}', *_parse_host(host)) for index, host in enumerate(hosts, start=1)
+        ]
+        self._turn = itertools.count()
+
+    def _candidates(self) -> list[Replica]:
+        if not self.replicas:
+            return []
+        start = next(self._turn) % len(self.replicas)
+        ordered = self.replicas[start:] + self.replicas[:start]
+        return [replica for replica in ordered if replica.healthy]
+
+    @asynccontextmanager
+    async def read_session(self, after: str | None = None) -> AsyncIterator[DbSession]:
+        # `after` is the WAL position of the client's last write. A replica that
+        # has not replayed up to it is skipped, so the client sees its own write.
+        for replica in self._candidates():
+            try:
+                db = await replica.open()
+            except DBAPIError:
+                continue
+            if after is not None:
+                try:
+                    replayed = await run_sync(db, _replayed, after)
+                except DBAPIError:
+                    replica.mark_down()
+                    replayed = False
+                if not replayed:
+                    await close_session(db)
+                    continue
+            try:
+                yield db
+            finally:
+                await close_session(db)
+            return
+        async with open_session() as db:
+            yield db
+
+    async def run(self) -> None:
+        # Probes every replica, so one that went down is skipped before a
+        # request has to fail over, and one that came back is used again
+        # without waiting out REPLICA_RETRY_SECONDS.
+        while True:
+            await asyncio.sleep(settings.replica_probe_seconds)
+            await asyncio.gather(*(replica.probe() for replica in self.replicas), return_exceptions=True)
+
+    def stats(self) -> list[dict]:
+        return [{'name': replica.name, 'healthy': replica.healthy} for replica in self.replicas]
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.dispose()
+
+
+router = ReplicaRouter([host for host in settings.db_replica_hosts.split(',') if host.strip()])
+
+
+def _sign(tenant_id: int, lsn: str) -> str:
+    return hmac.new(settings.jwt_secret.encode(), f'{tenant_id}.{lsn}'.encode(), hashlib.sha256).hexdigest()
+
+
+def encode_write_marker(tenant_id: int, lsn: str) -> str:
+    return f'{tenant_id}.{lsn}.{_sign(tenant_id, lsn)}'
+
+
+def decode_write_marker(value: str | None, tenant_id: int | None) -> str | None:
+    # Returns the WAL position of the tenant's last write, or None when the
+    # marker is missing, forged or from another tenant.
+    if not value or tenant_id is None:
+        return None
+    marker_tenant, _, rest = value.partition('.')
+    lsn, _, signature = rest.partition('.')
+    if marker_tenant != str(tenant_id) or not hmac.compare_digest(signature, _sign(tenant_id, lsn)):
+        return None
+    return lsn
+
+
+class WriteMarkerMiddleware:
+    # The marker travels with the client rather than living in a per-worker
+    # cache, so read-your-writes holds whichever worker serves the next read.
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault('state', {})
+
+        async def send_wrapper(message) -> None:
+            marker = state.get('write_marker')
+            if message['type'] == 'http.response.start' and marker is not None:
+                cookie = (
+                    f'{WRITE_MARKER_COOKIE}={marker}; Max-Age={settings.replica_read_your_writes_seconds}; '
+                    'Path=/; HttpOnly; SameSite=lax'
+                )
+                message['headers'] = [*message.get('headers', []), (b'set-cookie', cookie.encode())]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,4 +1,5 @@
 from datetime import date, datetime
+from typing import Any, Literal
 
 from pydantic import BaseModel, EmailStr, Field
 
@@ -150,3 +151,187 @@ class AuditPlanOut(AuditPlanBase):
 
     class Config:
         from_attributes = True
+
+
+class AuditAnswerBase(BaseModel):
+    asset_number: int = 1
+    question_index: int
+    question_text: str = ''
+    response: str | None = None
+    response_is_negative: bool = False
+    assigned_nc: str | None = None
+    note: str | None = None
+    evidence_name: str | None = None
+    evidence_data_url: str | None = None
+    evidence_urls: list[str] | None = None
+    status: str = 'Saved'
+
+
+class AuditAnswerOut(AuditAnswerBase):
+    id: int
+    audit_plan_id: int
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class NcActionCreate(BaseModel):
+    answer_id: int
+    root_cause: str | None = None
+    containment_action: str | None = None
+    corrective_action: str | None = None
+    preventive_action: str | None = None
+    evidence_name: str | None = None
+    assigned_user_id: int | None = None
+    status: str = 'In Progress'
+
+
+class NcActionOut(BaseModel):
+    id: int
+    audit_answer_id: int
+    root_cause: str | None = None
+    containment_action: str | None = None
+    corrective_action: str | None = None
+    preventive_action: str | None = None
+    evidence_name: str | None = None
+    assigned_user_id: int | None = None
+    status: str
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class NcRegisterOut(BaseModel):
+    answer_id: int
+    audit_plan_id: int
+    audit_code: str
+    audit_type: str
+    audit_subtype: str | None = None
+    start_date: date
+    end_date: date
+    auditor_name: str | None = None
+    asset_number: int
+    question_text: str
+    response: str | None = None
+    assigned_nc: str | None = None
+    note: str | None = None
+    submitted_at: datetime
+    root_cause: str | None = None
+    containment_action: str | None = None
+    corrective_action: str | None = None
+    preventive_action: str | None = None
+    evidence_name: str | None = None
+    assigned_user_id: int | None = None
+    assigned_user_first_name: str | None = None
+    assigned_user_last_name: str | None = None
+    assigned_user_email: str | None = None
+    nc_status: str
+
+    class Config:
+        from_attributes = True
+
+
+class NcRegisterCounts(BaseModel):
+    total: int
+    by_status: dict[str, int]
+
+
+class DashboardSummary(BaseModel):
+    plans: dict[str, int] = {}
+    ncs: dict[str, int] = {}
+    plans_by_site: dict[str, dict[str, int]] = {}
+    plans_by_region: dict[str, dict[str, int]] = {}
+    plans_by_department: dict[str, dict[str, int]] = {}
+    ncs_by_department: dict[str, dict[str, int]] = {}
+
+
+class EvidenceOut(BaseModel):
+    sha256: str
+    url: str
+    size: int
+    content_type: str
+    filename: str | None = None
+
+
+class SearchResult(BaseModel):
+    type: str
+    id: int
+    title: str | None = None
+    detail: str | None = None
+    rank: float
+
+    class Config:
+        from_attributes = True
+
+
+class BulkRowResult(BaseModel):
+    index: int
+    id: int | None = None
+    code: str | None = None
+    error: str | None = None
+
+
+class BulkResult(BaseModel):
+    created: int
+    failed: int
+    results: list[BulkRowResult]
+
+
+class JobCreate(BaseModel):
+    type: str
+    payload: dict = {}
+
+
+class JobOut(BaseModel):
+    id: int
+    type: str
+    status: str
+    progress: int
+    total: int | None = None
+    result: dict | None = None
+    error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    class Config:
+        from_attributes = True
+
+
+class BatchOperation(BaseModel):
+    method: Literal['POST', 'PUT', 'DELETE']
+    path: str
+    body: dict | None = None
+
+
+class BatchRequest(BaseModel):
+    operations: list[BatchOperation] = Field(min_length=1)
+    atomic: bool = True
+
+
+class BatchOperationResult(BaseModel):
+    index: int
+    status: int
+    body: Any = None
+
+
+class BatchResponse(BaseModel):
+    committed: bool
+    results: list[BatchOperationResult]
+
+
+class SyncResponse(BaseModel):
+    token: str
+    full: bool
+    users: list[UserOut] = []
+    departments: list[DepartmentOut] = []
+    sites: list[SiteOut] = []
+    regions: list[RegionOut] = []
+    response_types: list[ResponseTypeOut] = []
+    templates: list[AuditTemplateOut] = []
+    audit_plans: list[AuditPlanOut] = []
+    deleted: dict[str, list[int]] = {}
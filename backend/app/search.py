@@ -0,0 +1,60 @@
+from sqlalchemy import Select, String, cast, func, literal_column, select, union_all
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+from .models import AuditPlan, AuditTemplate, NcRegisterEntry
+
+SEARCH_CONFIG = 'english'
+
+
+def _vector(model):
+    # The generated search_vector columns are not mapped, so row loads,
+    # RETURNING and exports never carry them.
+    return literal_column(f'{model.__tablename__}.search_vector', TSVECTOR)
+
+
+def _matches(model, kind: str, row_id, title, detail, query, tenant_id: int, limit: int) -> Select:
+    vector = _vector(model)
+    rank = func.ts_rank_cd(vector, query)
+    return (
+        select(
+            literal_column(f"'{kind}'").label('type'),
+            row_id.label('id'),
+            cast(title, String).label('title'),
+            cast(detail, String).label('detail'),
+            rank.label('rank'),
+        )
+        .where(model.tenant_id == tenant_id, vector.op('@@')(query))
+        .order_by(rank.desc())
+        .limit(limit)
+    )
+
+
+def search_statement(tenant_id: int, text: str, limit: int, customer_id: str | None = None) -> Select:
+    query = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), text)
+    plans = _matches(
+        AuditPlan, 'audit_plan', AuditPlan.id, AuditPlan.code, AuditPlan.audit_note, query, tenant_id, limit
+    )
+    ncs = _matches(
+        NcRegisterEntry,
+        'nc',
+        NcRegisterEntry.answer_id,
+        NcRegisterEntry.question_text,
+        NcRegisterEntry.audit_code,
+        query,
+        tenant_id,
+        limit,
+    )
+    if customer_id is not None:
+        parts = [
+            plans.where(AuditPlan.customer_id == customer_id),
+            ncs.where(NcRegisterEntry.customer_id == customer_id),
+        ]
+    else:
+        templates = _matches(
+            AuditTemplate, 'template', AuditTemplate.id, AuditTemplate.name, AuditTemplate.note, query, tenant_id, limit
+        )
+        parts = [templates, plans, ncs]
+    # Each branch keeps only its own top rows, then the union is ranked once.
+    combined = union_all(*(part.subquery().select() for part in parts)).subquery()
+    return select(combined).order_by(combined.c.rank.desc(), combined.c.type, combined.c.id).limit(limit)
+
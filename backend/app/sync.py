@@ -0,0 +1,34 @@
+import base64
+from datetime import datetime
+
+from fastapi import HTTPException, status
+
+from .models import AuditPlan, AuditTemplate, Department, Region, ResponseType, Site, User
+
+SYNC_MODELS = {
+    'users': User,
+    'departments': Department,
+    'sites': Site,
+    'regions': Region,
+    'response_types': ResponseType,
+    'templates': AuditTemplate,
+    'audit_plans': AuditPlan,
+}
+SYNC_ENTITIES = {model: entity for entity, model in SYNC_MODELS.items()}
+
+
+def encode_sync_token(stamp: datetime) -> str:
+    return base64.urlsafe_b64encode(stamp.isoformat().encode()).decode().rstrip('=')
+
+
+def decode_sync_token(value: str) -> datetime:
+    try:
+        padded = value + '=' * (-len(value) % 4)
+        stamp = datetime.fromisoformat(base64.urlsafe_b64decode(padded).decode())
+    except Exception as exc:  # noqa: BLE001
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid sync token') from exc
+    # Tokens are always issued with the database's offset; a naive stamp cannot
+    # be compared with it.
+    if stamp.tzinfo is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid sync token')
+    return stamp
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .config import settings
+from .db import async_engine, engine
+from .hashing import hashing
+from .replicas import router
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    def __init__(self) -> None:
+        self.ready = False
+        self.connections: dict[str, int] = {}
+
+    def stats(self) -> dict:
+        return {'ready': self.ready, 'connections': self.connections}
+
+
+readiness = Readiness()
+
+
+async def _open_async(target: AsyncEngine, count: int) -> None:
+    results = await asyncio.gather(
+        *(target.connect().start() for _ in range(count)), return_exceptions=True
+    )
+    connections = [result for result in results if not isinstance(result, BaseException)]
+    await asyncio.gather(*(connection.close() for connection in connections))
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
+def _open_sync(target: Engine, count: int) -> None:
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(target.connect())
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+async def _prewarm(target: Engine | AsyncEngine, count: int) -> None:
+    if isinstance(target, AsyncEngine):
+        await _open_async(target, count)
+    else:
+        await run_in_threadpool(_open_sync, target, count)
+
+
+async def prewarm_replicas(count: int) -> None:
+    # Replicas are best effort: the router already falls back to the primary,
+    # so a replica that is down must not keep the worker unready.
+    for replica in router.replicas:
+        try:
+            await _prewarm(replica.engine, count)
+        except Exception:  # noqa: BLE001
+            logger.warning('Could not prewarm %s', replica.name, exc_info=True)
+            replica.mark_down()
+            readiness.connections[replica.name] = 0
+        else:
+            readiness.connections[replica.name] = count
+
+
+async def prewarm_pools() -> None:
+    # Opening the connections concurrently and holding them until all are up
+    # leaves that many distinct connections idle in each pool.
+    count = min(settings.db_pool_prewarm, settings.db_pool_size)
+    await _prewarm(async_engine if async_engine is not None else engine, count)
+    readiness.connections['primary'] = count
+
+
+async def warm_up() -> None:
+    delay = 1.0
+    while True:
+        try:
+            await prewarm_pools()
+            await hashing.prewarm()
+        except Exception:  # noqa: BLE001
+            logger.exception('Warm-up failed, retrying in %.0fs', delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+            continue
+        readiness.ready = True
+        break
+    await prewarm_replicas(min(settings.db_pool_prewarm, settings.db_pool_size))
@@ -0,0 +1,6 @@
+CREATE TABLE IF NOT EXISTS reference_versions (
+  tenant_id BIGINT NOT NULL REFERENCES tenants(id),
+  resource TEXT NOT NULL,
+  version BIGINT NOT NULL DEFAULT 1,
+  PRIMARY KEY (tenant_id, resource)
+);
@@ -0,0 +1,34 @@
+ALTER TABLE users
+  ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
+ALTER TABLE departments
+  ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
+ALTER TABLE sites
+  ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
+ALTER TABLE regions
+  ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
+ALTER TABLE response_types
+  ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
+ALTER TABLE audit_templates
+  ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
+CREATE TABLE IF NOT EXISTS sync_tombstones (
+  id BIGSERIAL PRIMARY KEY,
+  tenant_id BIGINT NOT NULL REFERENCES tenants(id),
+  entity TEXT NOT NULL,
+  entity_id BIGINT NOT NULL,
+  deleted_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS users_tenant_updated_at_idx ON users (tenant_id, updated_at);
+CREATE INDEX IF NOT EXISTS departments_tenant_updated_at_idx ON departments (tenant_id, updated_at);
+CREATE INDEX IF NOT EXISTS sites_tenant_updated_at_idx ON sites (tenant_id, updated_at);
+CREATE INDEX IF NOT EXISTS regions_tenant_updated_at_idx ON regions (tenant_id, updated_at);
+CREATE INDEX IF NOT EXISTS response_types_tenant_updated_at_idx ON response_types (tenant_id, updated_at);
+CREATE INDEX IF NOT EXISTS audit_templates_tenant_updated_at_idx ON audit_templates (tenant_id, updated_at);
+CREATE INDEX IF NOT EXISTS audit_plans_tenant_updated_at_idx ON audit_plans (tenant_id, updated_at);
+CREATE INDEX IF NOT EXISTS sync_tombstones_tenant_deleted_at_idx ON sync_tombstones (tenant_id, deleted_at);
@@ -0,0 +1,15 @@
+-- Keyset listing: WHERE tenant_id = ? ORDER BY created_at DESC, id DESC.
+CREATE INDEX IF NOT EXISTS users_tenant_created_at_idx ON users (tenant_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS departments_tenant_created_at_idx ON departments (tenant_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS sites_tenant_created_at_idx ON sites (tenant_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS regions_tenant_created_at_idx ON regions (tenant_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS response_types_tenant_created_at_idx ON response_types (tenant_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS audit_templates_tenant_created_at_idx ON audit_templates (tenant_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS audit_plans_tenant_created_at_idx ON audit_plans (tenant_id, created_at DESC, id DESC);
+
+-- Audit code collision checks.
+CREATE INDEX IF NOT EXISTS audit_plans_tenant_code_idx ON audit_plans (tenant_id, code);
+
+-- User lookups: per tenant, and by email alone at login.
+CREATE INDEX IF NOT EXISTS users_tenant_email_idx ON users (tenant_id, email);
+CREATE INDEX IF NOT EXISTS users_email_idx ON users (email);
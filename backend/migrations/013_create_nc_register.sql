@@ -0,0 +1,59 @@
+CREATE TABLE IF NOT EXISTS nc_register (
+  answer_id BIGINT PRIMARY KEY REFERENCES audit_answers(id) ON DELETE CASCADE,
+  tenant_id BIGINT NOT NULL REFERENCES tenants(id),
+  audit_plan_id BIGINT NOT NULL,
+  audit_code TEXT NOT NULL,
+  audit_type TEXT NOT NULL,
+  audit_subtype TEXT,
+  start_date DATE NOT NULL,
+  end_date DATE NOT NULL,
+  auditor_name TEXT,
+  customer_id TEXT,
+  asset_number INT NOT NULL,
+  question_text TEXT NOT NULL,
+  response TEXT,
+  assigned_nc TEXT,
+  note TEXT,
+  submitted_at TIMESTAMPTZ NOT NULL,
+  root_cause TEXT,
+  containment_action TEXT,
+  corrective_action TEXT,
+  preventive_action TEXT,
+  evidence_name TEXT,
+  assigned_user_id BIGINT,
+  assigned_user_first_name TEXT,
+  assigned_user_last_name TEXT,
+  assigned_user_email TEXT,
+  nc_status TEXT NOT NULL DEFAULT 'Assigned'
+);
+
+CREATE INDEX IF NOT EXISTS nc_register_tenant_submitted_idx
+  ON nc_register (tenant_id, submitted_at DESC, answer_id DESC);
+CREATE INDEX IF NOT EXISTS nc_register_tenant_status_idx ON nc_register (tenant_id, nc_status);
+CREATE INDEX IF NOT EXISTS nc_register_tenant_assigned_nc_idx ON nc_register (tenant_id, assigned_nc);
+CREATE INDEX IF NOT EXISTS nc_register_tenant_audit_code_idx ON nc_register (tenant_id, audit_code);
+CREATE INDEX IF NOT EXISTS nc_register_tenant_assigned_user_idx ON nc_register (tenant_id, assigned_user_id);
+CREATE INDEX IF NOT EXISTS nc_register_tenant_customer_idx ON nc_register (tenant_id, customer_id);
+CREATE INDEX IF NOT EXISTS nc_register_tenant_plan_idx ON nc_register (tenant_id, audit_plan_id);
+
+-- Backfill. To rebuild after writes that bypassed the FastAPI app, TRUNCATE
+-- nc_register and re-run this statement.
+INSERT INTO nc_register (
+  answer_id, tenant_id, audit_plan_id, audit_code, audit_type, audit_subtype,
+  start_date, end_date, auditor_name, customer_id, asset_number, question_text,
+  response, assigned_nc, note, submitted_at, root_cause, containment_action,
+  corrective_action, preventive_action, evidence_name, assigned_user_id,
+  assigned_user_first_name, assigned_user_last_name, assigned_user_email, nc_status
+)
+SELECT a.id, a.tenant_id, a.audit_plan_id, p.code, p.audit_type, p.audit_subtype,
+       p.start_date, p.end_date, p.auditor_name, p.customer_id, a.asset_number, a.question_text,
+       a.response, a.assigned_nc, a.note, a.updated_at, n.root_cause, n.containment_action,
+       n.corrective_action, n.preventive_action, n.evidence_name, n.assigned_user_id,
+       u.first_name, u.last_name, u.email, COALESCE(n.status, 'Assigned')
+FROM audit_answers a
+JOIN audit_plans p ON p.id = a.audit_plan_id
+LEFT JOIN nc_actions n ON n.audit_answer_id = a.id AND n.tenant_id = a.tenant_id
+LEFT JOIN users u ON u.id = n.assigned_user_id AND u.tenant_id = a.tenant_id
+WHERE a.status = 'Submitted'
+  AND a.response_is_negative = TRUE
+ON CONFLICT (answer_id) DO NOTHING;
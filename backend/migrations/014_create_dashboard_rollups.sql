@@ -0,0 +1,26 @@
+CREATE TABLE IF NOT EXISTS audit_plan_progress (
+  audit_plan_id BIGINT PRIMARY KEY,
+  tenant_id BIGINT NOT NULL REFERENCES tenants(id),
+  status TEXT NOT NULL,
+  site TEXT,
+  region TEXT,
+  department TEXT,
+  customer_id TEXT,
+  answer_count INT NOT NULL DEFAULT 0,
+  submitted_count INT NOT NULL DEFAULT 0,
+  open_nc_count INT NOT NULL DEFAULT 0,
+  pending_review_count INT NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS audit_plan_progress_tenant_idx ON audit_plan_progress (tenant_id);
+
+CREATE TABLE IF NOT EXISTS dashboard_counters (
+  tenant_id BIGINT NOT NULL REFERENCES tenants(id),
+  dimension TEXT NOT NULL,
+  dimension_value TEXT NOT NULL,
+  metric TEXT NOT NULL,
+  value BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (tenant_id, dimension, dimension_value, metric)
+);
+
+-- Populate with: python -m scripts.rebuild_dashboard
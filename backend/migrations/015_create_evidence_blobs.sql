@@ -0,0 +1,9 @@
+CREATE TABLE IF NOT EXISTS evidence_blobs (
+  tenant_id BIGINT NOT NULL REFERENCES tenants(id),
+  sha256 TEXT NOT NULL,
+  size BIGINT NOT NULL,
+  content_type TEXT NOT NULL,
+  filename TEXT,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (tenant_id, sha256)
+);
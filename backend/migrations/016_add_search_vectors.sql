@@ -0,0 +1,35 @@
+-- Composite (tenant_id, tsvector) GIN indexes need btree_gin, a trusted
+-- extension that the database owner can create.
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+ALTER TABLE audit_templates
+  ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(name, '')), 'A')
+    || setweight(jsonb_to_tsvector('english', coalesce(tags, '[]'::jsonb), '["string"]'), 'B')
+    || setweight(jsonb_to_tsvector('english', coalesce(questions, '[]'::jsonb), '["string"]'), 'C')
+  ) STORED;
+
+ALTER TABLE audit_plans
+  ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce(code, '')), 'A')
+    || setweight(to_tsvector('english', coalesce(site, '') || ' ' || coalesce(auditor_name, '')), 'B')
+    || setweight(to_tsvector('english', coalesce(audit_note, '')), 'C')
+  ) STORED;
+
+ALTER TABLE nc_register
+  ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(question_text, '')), 'A')
+    || setweight(to_tsvector('simple', coalesce(audit_code, '') || ' ' || coalesce(assigned_nc, '')), 'B')
+    || setweight(
+      to_tsvector(
+        'english',
+        coalesce(note, '') || ' ' || coalesce(root_cause, '') || ' ' || coalesce(containment_action, '')
+          || ' ' || coalesce(corrective_action, '') || ' ' || coalesce(preventive_action, '')
+      ),
+      'C'
+    )
+  ) STORED;
+
+CREATE INDEX IF NOT EXISTS audit_templates_search_idx ON audit_templates USING GIN (tenant_id, search_vector);
+CREATE INDEX IF NOT EXISTS audit_plans_search_idx ON audit_plans USING GIN (tenant_id, search_vector);
+CREATE INDEX IF NOT EXISTS nc_register_search_idx ON nc_register USING GIN (tenant_id, search_vector);
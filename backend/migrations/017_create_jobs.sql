@@ -0,0 +1,22 @@
+CREATE TABLE IF NOT EXISTS jobs (
+  id BIGSERIAL PRIMARY KEY,
+  tenant_id BIGINT NOT NULL REFERENCES tenants(id),
+  user_id BIGINT REFERENCES users(id),
+  type TEXT NOT NULL,
+  status TEXT NOT NULL DEFAULT 'queued',
+  payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+  result JSONB,
+  error TEXT,
+  progress INT NOT NULL DEFAULT 0,
+  total INT,
+  attempts INT NOT NULL DEFAULT 0,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  started_at TIMESTAMPTZ,
+  heartbeat_at TIMESTAMPTZ,
+  finished_at TIMESTAMPTZ
+);
+
+-- Dequeue scans only queued rows of one type, oldest first.
+CREATE INDEX IF NOT EXISTS jobs_queued_idx ON jobs (type, id) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS jobs_running_heartbeat_idx ON jobs (heartbeat_at) WHERE status = 'running';
+CREATE INDEX IF NOT EXISTS jobs_tenant_created_at_idx ON jobs (tenant_id, created_at DESC);
@@ -0,0 +1,12 @@
+CREATE TABLE IF NOT EXISTS events (
+  id BIGSERIAL PRIMARY KEY,
+  tenant_id BIGINT NOT NULL REFERENCES tenants(id),
+  customer_id TEXT,
+  type TEXT NOT NULL,
+  data JSONB NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Resuming reads one tenant's events after an id; pruning deletes by age.
+CREATE INDEX IF NOT EXISTS events_tenant_id_idx ON events (tenant_id, id);
+CREATE INDEX IF NOT EXISTS events_created_at_idx ON events (created_at);
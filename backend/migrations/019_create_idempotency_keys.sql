@@ -0,0 +1,10 @@
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+  tenant_id BIGINT NOT NULL REFERENCES tenants(id),
+  key TEXT NOT NULL,
+  request_hash TEXT NOT NULL,
+  response JSONB,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (tenant_id, key)
+);
+
+CREATE INDEX IF NOT EXISTS idempotency_keys_tenant_created_at_idx ON idempotency_keys (tenant_id, created_at);
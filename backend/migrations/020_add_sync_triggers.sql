@@ -0,0 +1,44 @@
+-- Tombstones and updated_at are maintained by triggers so that writes which
+-- bypass the FastAPI app (the Node function) show up in GET /sync as well.
+CREATE OR REPLACE FUNCTION record_sync_tombstone() RETURNS trigger AS $$
+BEGIN
+  INSERT INTO sync_tombstones (tenant_id, entity, entity_id) VALUES (OLD.tenant_id, TG_ARGV[0], OLD.id);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION touch_updated_at() RETURNS trigger AS $$
+BEGIN
+  NEW.updated_at := NOW();
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+  synced RECORD;
+BEGIN
+  FOR synced IN
+    SELECT * FROM (VALUES
+      ('users', 'users'),
+      ('departments', 'departments'),
+      ('sites', 'sites'),
+      ('regions', 'regions'),
+      ('response_types', 'response_types'),
+      ('audit_templates', 'templates'),
+      ('audit_plans', 'audit_plans')
+    ) AS t (table_name, entity)
+  LOOP
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', synced.table_name || '_sync_tombstone', synced.table_name);
+    EXECUTE format(
+      'CREATE TRIGGER %I AFTER DELETE ON %I FOR EACH ROW EXECUTE FUNCTION record_sync_tombstone(%L)',
+      synced.table_name || '_sync_tombstone', synced.table_name, synced.entity
+    );
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', synced.table_name || '_touch_updated_at', synced.table_name);
+    EXECUTE format(
+      'CREATE TRIGGER %I BEFORE UPDATE ON %I FOR EACH ROW EXECUTE FUNCTION touch_updated_at()',
+      synced.table_name || '_touch_updated_at', synced.table_name
+    );
+  END LOOP;
+END;
+$$;
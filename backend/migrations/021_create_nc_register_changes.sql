@@ -0,0 +1,139 @@
+-- Writes that bypass the FastAPI app (the Node function, manual SQL) are
+-- captured here by triggers, and each API worker folds them into nc_register
+-- and the dashboard rollups. The API maintains both in the writing
+-- transaction, so its own connections (application_name 'audir-api') are
+-- skipped.
+CREATE TABLE IF NOT EXISTS nc_register_changes (
+  id BIGSERIAL PRIMARY KEY,
+  tenant_id BIGINT NOT NULL,
+  audit_plan_id BIGINT,
+  answer_id BIGINT,
+  user_id BIGINT,
+  template_name TEXT,
+  queued_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Register rows are removed by the refresh, which also moves their counters;
+-- a cascade from audit_answers would drop them without doing so.
+ALTER TABLE nc_register DROP CONSTRAINT IF EXISTS nc_register_answer_id_fkey;
+
+CREATE OR REPLACE FUNCTION nc_register_external_write() RETURNS boolean AS $$
+  SELECT current_setting('application_name') IS DISTINCT FROM 'audir-api';
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION queue_answer_changes() RETURNS trigger AS $$
+BEGIN
+  IF NOT nc_register_external_write() THEN
+    RETURN NULL;
+  END IF;
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    INSERT INTO nc_register_changes (tenant_id, audit_plan_id, answer_id)
+    SELECT tenant_id, audit_plan_id, id FROM old_rows;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO nc_register_changes (tenant_id, audit_plan_id, answer_id)
+    SELECT tenant_id, audit_plan_id, id FROM new_rows;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION queue_nc_action_changes() RETURNS trigger AS $$
+BEGIN
+  IF NOT nc_register_external_write() THEN
+    RETURN NULL;
+  END IF;
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    INSERT INTO nc_register_changes (tenant_id, answer_id) SELECT tenant_id, audit_answer_id FROM old_rows;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO nc_register_changes (tenant_id, answer_id) SELECT tenant_id, audit_answer_id FROM new_rows;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION queue_plan_changes() RETURNS trigger AS $$
+BEGIN
+  IF NOT nc_register_external_write() THEN
+    RETURN NULL;
+  END IF;
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    INSERT INTO nc_register_changes (tenant_id, audit_plan_id) SELECT tenant_id, id FROM old_rows;
+  END IF;
+  IF TG_OP = 'INSERT' THEN
+    INSERT INTO nc_register_changes (tenant_id, audit_plan_id) SELECT tenant_id, id FROM new_rows;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION queue_template_changes() RETURNS trigger AS $$
+BEGIN
+  IF NOT nc_register_external_write() THEN
+    RETURN NULL;
+  END IF;
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    INSERT INTO nc_register_changes (tenant_id, template_name) SELECT tenant_id, name FROM old_rows;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO nc_register_changes (tenant_id, template_name) SELECT tenant_id, name FROM new_rows;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION queue_user_changes() RETURNS trigger AS $$
+BEGIN
+  IF nc_register_external_write() THEN
+    INSERT INTO nc_register_changes (tenant_id, user_id) VALUES (NEW.tenant_id, NEW.id);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+  queued RECORD;
+BEGIN
+  FOR queued IN
+    SELECT * FROM (VALUES
+      ('audit_answers', 'queue_answer_changes'),
+      ('nc_actions', 'queue_nc_action_changes'),
+      ('audit_plans', 'queue_plan_changes'),
+      ('audit_templates', 'queue_template_changes')
+    ) AS t (table_name, function_name)
+  LOOP
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', queued.table_name || '_nc_register_insert', queued.table_name);
+    EXECUTE format(
+      'CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS new_rows '
+      'FOR EACH STATEMENT EXECUTE FUNCTION %I()',
+      queued.table_name || '_nc_register_insert', queued.table_name, queued.function_name
+    );
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', queued.table_name || '_nc_register_update', queued.table_name);
+    EXECUTE format(
+      'CREATE TRIGGER %I AFTER UPDATE ON %I REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows '
+      'FOR EACH STATEMENT EXECUTE FUNCTION %I()',
+      queued.table_name || '_nc_register_update', queued.table_name, queued.function_name
+    );
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', queued.table_name || '_nc_register_delete', queued.table_name);
+    EXECUTE format(
+      'CREATE TRIGGER %I AFTER DELETE ON %I REFERENCING OLD TABLE AS old_rows '
+      'FOR EACH STATEMENT EXECUTE FUNCTION %I()',
+      queued.table_name || '_nc_register_delete', queued.table_name, queued.function_name
+    );
+  END LOOP;
+END;
+$$;
+
+-- Register rows copy the assignee's name and email.
+DROP TRIGGER IF EXISTS users_nc_register_update ON users;
+CREATE TRIGGER users_nc_register_update
+  AFTER UPDATE OF first_name, last_name, email ON users
+  FOR EACH ROW
+  WHEN (
+    OLD.first_name IS DISTINCT FROM NEW.first_name
+    OR OLD.last_name IS DISTINCT FROM NEW.last_name
+    OR OLD.email IS DISTINCT FROM NEW.email
+  )
+  EXECUTE FUNCTION queue_user_changes();
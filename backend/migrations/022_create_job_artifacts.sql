@@ -0,0 +1,28 @@
+-- Output of background jobs (exports). Kept apart from evidence_blobs so it
+-- expires and is only readable by the user who ran the job.
+CREATE TABLE IF NOT EXISTS job_artifacts (
+  job_id BIGINT PRIMARY KEY REFERENCES jobs(id) ON DELETE CASCADE,
+  tenant_id BIGINT NOT NULL REFERENCES tenants(id),
+  sha256 TEXT NOT NULL,
+  size BIGINT NOT NULL,
+  content_type TEXT NOT NULL,
+  filename TEXT,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  expires_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS job_artifacts_expires_at_idx ON job_artifacts (expires_at);
+CREATE INDEX IF NOT EXISTS job_artifacts_sha256_idx ON job_artifacts (sha256);
+
+-- Exports written before this migration were registered as tenant evidence;
+-- unregister them (unless an answer links the same content) so they are no
+-- longer served by GET /evidence/{sha256}.
+DELETE FROM evidence_blobs e
+USING jobs j
+WHERE j.type = 'export'
+  AND j.tenant_id = e.tenant_id
+  AND j.result ->> 'sha256' = e.sha256
+  AND NOT EXISTS (
+    SELECT 1 FROM audit_answers a
+    WHERE a.tenant_id = e.tenant_id AND a.evidence_urls ? ('/evidence/' || e.sha256)
+  );
@@ -0,0 +1,4 @@
+-- Deleting a user checks every row that references it. Without these the
+-- check scans jobs and nc_actions once per deleted user.
+CREATE INDEX IF NOT EXISTS jobs_user_id_idx ON jobs (user_id);
+CREATE INDEX IF NOT EXISTS nc_actions_assigned_user_id_idx ON nc_actions (assigned_user_id);
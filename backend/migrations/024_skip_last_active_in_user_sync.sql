@@ -0,0 +1,8 @@
+-- Logins only stamp last_active. Leave updated_at alone for those, so that
+-- GET /sync does not send every user who logged in to every client again.
+DROP TRIGGER IF EXISTS users_touch_updated_at ON users;
+CREATE TRIGGER users_touch_updated_at
+  BEFORE UPDATE ON users
+  FOR EACH ROW
+  WHEN (to_jsonb(OLD) - 'last_active' - 'updated_at' IS DISTINCT FROM to_jsonb(NEW) - 'last_active' - 'updated_at')
+  EXECUTE FUNCTION touch_updated_at();
@@ -0,0 +1,70 @@
+"""Measure cold-start time of `import app.main` in fresh interpreters.
+
+Run from backend/ with the usual DB_* / JWT_SECRET environment (no database is contacted):
+
+    python -m scripts.bench_import --runs 10 --top 15
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+PROBE = 'import time; start = time.perf_counter(); import app.main; print(time.perf_counter() - start)'
+IMPORTTIME = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+def run_once() -> float:
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE],
+        cwd=BACKEND,
+        env=os.environ,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def slowest_modules(top: int) -> list[tuple[int, int, str]]:
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app.main'],
+        cwd=BACKEND,
+        env=os.environ,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    modules = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME.match(line)
+        if match and len(match.group(3)) <= 3:
+            modules.append((int(match.group(2)), int(match.group(1)), match.group(4)))
+    return sorted(modules, reverse=True)[:top]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=15, help='top-level imports to list, 0 to skip')
+    args = parser.parse_args()
+
+    timings = [run_once() * 1000 for _ in range(args.runs)]
+    print(
+        f'import app.main over {args.runs} runs: '
+        f'median {statistics.median(timings):.1f} ms, '
+        f'min {min(timings):.1f} ms, max {max(timings):.1f} ms'
+    )
+    if args.top:
+        print(f'\n{"cumulative":>12} {"self":>10}  module (direct imports of app.main and below)')
+        for cumulative, own, module in slowest_modules(args.top):
+            print(f'{cumulative / 1000:10.1f}ms {own / 1000:8.1f}ms  {module}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
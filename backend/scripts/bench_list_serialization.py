@@ -0,0 +1,89 @@
+"""Compare the default response_model path with the FAST_LIST_JSON path for list endpoints.
+
+Runs in-process without a database, from backend/:
+
+    python -m scripts.bench_list_serialization --rows 10000 --repeat 5
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.fast_json import encode_rows
+from app.models import AuditPlan
+from app.schemas import AuditPlanOut
+
+
+def make_plans(count: int) -> list[AuditPlan]:
+    now = datetime.now(timezone.utc)
+    return [
+        AuditPlan(
+            id=index,
+            tenant_id=1,
+            code=f'PC{index:06d}',
+            start_date=date(2024, 1, 1),
+            end_date=date(2024, 1, 31),
+            audit_type='Internal',
+            audit_subtype='Process',
+            auditor_name='Auditor Name',
+            department='Quality',
+            location_city='Pune',
+            site='Plant 1',
+            country='India',
+            region='West',
+            audit_note='Quarterly audit – ünïcode note',
+            response_type='Yes/No',
+            asset_scope=[1, 2, 3],
+            created_at=now - timedelta(minutes=index),
+            updated_at=now,
+        )
+        for index in range(count)
+    ]
+
+
+def default_path(plans: list[AuditPlan]) -> bytes:
+    field = create_model_field('Response_list_audit_plans', list[AuditPlanOut], mode='serialization')
+    content = asyncio.run(serialize_response(field=field, response_content=plans))
+    return JSONResponse(content).body
+
+
+def fast_path(fields: list[str], rows: list[tuple]) -> bytes:
+    return encode_rows(fields, rows)
+
+
+def timed(fn, *args) -> tuple[float, bytes]:
+    start = time.perf_counter()
+    body = fn(*args)
+    return (time.perf_counter() - start) * 1000, body
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    plans = make_plans(args.rows)
+    fields = list(AuditPlanOut.model_fields)
+    rows = [tuple(getattr(plan, field) for field in fields) for plan in plans]
+
+    default_ms, default_body = zip(*(timed(default_path, plans) for _ in range(args.repeat)))
+    fast_ms, fast_body = zip(*(timed(fast_path, fields, rows) for _ in range(args.repeat)))
+
+    identical = default_body[0] == fast_body[0]
+    print(f'rows: {args.rows}, body: {len(default_body[0])} bytes, identical: {identical}')
+    print(f'default: {statistics.median(default_ms):8.2f} ms (median of {args.repeat})')
+    print(f'fast:    {statistics.median(fast_ms):8.2f} ms (median of {args.repeat})')
+    print(f'speedup: {statistics.median(default_ms) / statistics.median(fast_ms):.1f}x')
+    return 0 if identical else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,820 @@
+"""Seed a benchmark dataset, replay a mixed workload against the API and compare runs.
+
+Point DB_* at a local Postgres with the migrations applied, start the API, then run from backend/:
+
+    python -m scripts.bench_load seed --tenants 5 --users 40 --plans 5000 --manifest bench.json
+    python -m scripts.bench_load run --manifest bench.json --url http://localhost:8000 \\
+        --concurrency 32 --duration 60 --output before.json
+    python -m scripts.bench_load compare before.json after.json --threshold 10
+    python -m scripts.bench_load cleanup --manifest bench.json
+
+`run` drives every route of app.main from --concurrency threads, each logged in as a seeded user
+of one tenant, and reports p50/p95/p99 latency and throughput per route as JSON. `compare` exits
+non-zero when a route's p95, its error rate or the overall throughput regressed past --threshold.
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from pathlib import Path
+from time import perf_counter, sleep
+from urllib.parse import urlencode, urlsplit
+
+from sqlalchemy import text
+
+from app import crud
+from app.db import SessionLocal, engine
+from app.hashing import hashing
+
+ROLES = ('Manager', 'Auditor', 'Auditor', 'Customer')
+
+TENANT_TABLES = (
+    'evidence_blobs',
+    'dashboard_counters',
+    'audit_plan_progress',
+    'nc_register',
+    'nc_actions',
+    'audit_answers',
+    'audit_plans',
+    'audit_templates',
+    'response_types',
+    'regions',
+    'sites',
+    'departments',
+    'reference_versions',
+    'sync_tombstones',
+    'users',
+)
+
+_SERIES = 'FROM unnest(CAST(:tenants AS BIGINT[])) AS t, generate_series(1, {count}) AS n'
+
+SEED_STATEMENTS = (
+    f"""
+    INSERT INTO users (tenant_id, email, password_hash, first_name, last_name, department, role, status)
+    SELECT t, 'load-bench-' || t || '-' || n || '@example.com', :password_hash, 'Bench', 'User ' || n,
+           'Department ' || (1 + n % :departments), (CAST(:roles AS TEXT[]))[1 + (n - 1) % :nroles], 'active'
+    {_SERIES.format(count=':users')}
+    """,
+    f"INSERT INTO departments (tenant_id, name) SELECT t, 'Department ' || n {_SERIES.format(count=':departments')}",
+    f"INSERT INTO sites (tenant_id, name) SELECT t, 'Site ' || n {_SERIES.format(count=':sites')}",
+    f"INSERT INTO regions (tenant_id, name) SELECT t, 'Region ' || n {_SERIES.format(count='5')}",
+    f"""
+    INSERT INTO response_types (tenant_id, name, types)
+    SELECT t, 'Response ' || n, '["Yes", "No", "N/A"]'::jsonb {_SERIES.format(count='3')}
+    """,
+    f"""
+    INSERT INTO audit_templates (tenant_id, name, note, tags, questions)
+    SELECT t, 'Template ' || n, 'Seeded for load benchmarks', '["bench"]'::jsonb,
+           to_jsonb(ARRAY(SELECT 'Question ' || q || ' of template ' || n FROM generate_series(1, :questions) AS q))
+    {_SERIES.format(count=':templates')}
+    """,
+    f"""
+    INSERT INTO audit_plans (tenant_id, code, start_date, end_date, audit_type, auditor_name, department,
+                             site, region, audit_note, response_type, customer_id, created_at, updated_at)
+    SELECT t, 'LB' || LPAD(n::text, 7, '0'), CURRENT_DATE - n % 365, CURRENT_DATE - n % 365 + 7,
+           'Template ' || (1 + n % :templates), 'Bench User ' || (1 + n % :users),
+           'Department ' || (1 + n % :departments), 'Site ' || (1 + n % :sites), 'Region ' || (1 + n % 5),
+           'Routine inspection of site ' || (1 + n % :sites), 'Response 1',
+           CASE WHEN n % 3 = 0 THEN 'load-bench-' || t || '-4@example.com' END,
+           NOW() - n * INTERVAL '1 minute', NOW() - n * INTERVAL '1 minute'
+    {_SERIES.format(count=':plans')}
+    """,
+    """
+    INSERT INTO audit_answers (tenant_id, audit_plan_id, asset_number, question_index, question_text,
+                               response, response_is_negative, assigned_nc, note, status)
+    SELECT p.tenant_id, p.id, 1, q, 'Question ' || (q + 1), CASE WHEN (p.id + q) % 5 = 0 THEN 'No' ELSE 'Yes' END,
+           (p.id + q) % 5 = 0, CASE WHEN (p.id + q) % 5 = 0 THEN p.department END,
+           'Observed during walkthrough', CASE WHEN p.id % 4 = 0 THEN 'Saved' ELSE 'Submitted' END
+    FROM audit_plans p, generate_series(0, :questions - 1) AS q
+    WHERE p.tenant_id = ANY(CAST(:tenants AS BIGINT[])) AND p.id % 3 <> 0
+    """,
+    """
+    INSERT INTO nc_actions (tenant_id, audit_answer_id, root_cause, corrective_action, status)
+    SELECT a.tenant_id, a.id, 'Missed during handover', 'Retrain the shift team',
+           (ARRAY['Assigned', 'In Progress', 'Resolution Submitted', 'Closed'])[1 + a.id % 4]
+    FROM audit_answers a
+    WHERE a.tenant_id = ANY(CAST(:tenants AS BIGINT[])) AND a.response_is_negative AND a.id % 2 = 0
+    """,
+)
+
+
+def percentile(timings: list[float], fraction: float) -> float:
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+def seed(args: argparse.Namespace) -> int:
+    if args.users < len(ROLES):
+        print(f'--users must be at least {len(ROLES)}', file=sys.stderr)
+        return 2
+    start = perf_counter()
+    password_hash = asyncio.run(hashing.hash(args.password))
+    hashing.shutdown()
+    parameters = {
+        'password_hash': password_hash,
+        'roles': list(ROLES),
+        'nroles': len(ROLES),
+        'users': args.users,
+        'departments': args.departments,
+        'sites': args.sites,
+        'templates': args.templates,
+        'questions': args.questions,
+        'plans': args.plans,
+    }
+    with engine.begin() as conn:
+        tenant_ids = list(
+            conn.scalars(
+                text(
+                    "INSERT INTO tenants (name, status) "
+                    "SELECT 'load-bench-' || n, 'active' FROM generate_series(1, :count) AS n "
+                    "RETURNING id"
+                ),
+                {'count': args.tenants},
+            )
+        )
+        parameters['tenants'] = tenant_ids
+        for statement in SEED_STATEMENTS:
+            conn.execute(text(statement), parameters)
+        users = conn.execute(
+            text('SELECT tenant_id, email, role FROM users WHERE tenant_id = ANY(:tenants) ORDER BY id'),
+            {'tenants': tenant_ids},
+        ).all()
+    with SessionLocal() as db:
+        for tenant_id in tenant_ids:
+            crud.rebuild_dashboard(db, tenant_id)
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        for table in TENANT_TABLES:
+            conn.exec_driver_sql(f'ANALYZE {table}')
+
+    tenants: dict[int, dict[str, list[str]]] = {tenant_id: {} for tenant_id in tenant_ids}
+    for tenant_id, email, role in users:
+        tenants[tenant_id].setdefault(role, []).append(email)
+    manifest = {
+        'password': args.password,
+        'tenants': [{'id': tenant_id, 'users': by_role} for tenant_id, by_role in tenants.items()],
+    }
+    with open(args.manifest, 'w') as handle:
+        json.dump(manifest, handle, indent=2)
+    print(
+        f'seeded {len(tenant_ids)} tenants, {len(users)} users and {args.plans * len(tenant_ids)} plans '
+        f'in {perf_counter() - start:.0f} s; manifest written to {args.manifest}',
+        file=sys.stderr,
+    )
+    return 0
+
+
+def cleanup(args: argparse.Namespace) -> int:
+    with open(args.manifest) as handle:
+        tenant_ids = [tenant['id'] for tenant in json.load(handle)['tenants']]
+    with engine.begin() as conn:
+        for table in TENANT_TABLES:
+            conn.execute(text(f'DELETE FROM {table} WHERE tenant_id = ANY(:tenants)'), {'tenants': tenant_ids})
+        conn.execute(text('DELETE FROM tenants WHERE id = ANY(:tenants)'), {'tenants': tenant_ids})
+    print(f'removed {len(tenant_ids)} tenants', file=sys.stderr)
+    return 0
+
+
+class UnexpectedStatus(Exception):
+    pass
+
+
+class Client:
+    # One keep-alive connection per worker; every request is timed around
+    # sending it and reading the whole body.
+    def __init__(self, url: str, timeout: float, recorder: 'Recorder') -> None:
+        parts = urlsplit(url)
+        self.connection_class = (
+            http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        )
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.recorder = recorder
+        self.token: str | None = None
+        self.connection = self.connection_class(self.netloc, timeout=timeout)
+
+    def request(
+        self,
+        operation: str,
+        method: str,
+        path: str,
+        body: bytes | None = None,
+        headers: dict[str, str] | None = None,
+        expect: tuple[int, ...] = (200,),
+        json_body=None,
+    ) -> tuple[int, dict[str, str], bytes]:
+        headers = dict(headers or {})
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        start = perf_counter()
+        try:
+            self.connection.request(method, self.prefix + path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException) as exc:
+            self.recorder.record(operation, perf_counter() - start, False)
+            self.connection.close()
+            self.connection = self.connection_class(self.netloc, timeout=self.timeout)
+            raise UnexpectedStatus(f'{operation}: {exc}') from exc
+        ok = response.status in expect
+        self.recorder.record(operation, perf_counter() - start, ok)
+        if not ok:
+            raise UnexpectedStatus(f'{operation}: HTTP {response.status} {data[:200]!r}')
+        return response.status, {key.lower(): value for key, value in response.getheaders()}, data
+
+    def json(self, operation: str, method: str, path: str, **kwargs):
+        return json.loads(self.request(operation, method, path, **kwargs)[2] or b'null')
+
+    def login(self, email: str, password: str) -> None:
+        self.token = None
+        body = urlencode({'username': email, 'password': password}).encode()
+        self.token = self.json(
+            'POST /auth/login',
+            'POST',
+            '/auth/login',
+            body=body,
+            headers={'Content-Type': 'application/x-www-form-urlencoded'},
+        )['access_token']
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.measuring = False
+        self.timings: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    def record(self, operation: str, elapsed: float, ok: bool) -> None:
+        if not self.measuring:
+            return
+        self.timings[operation].append(elapsed * 1000)
+        if not ok:
+            self.errors[operation] += 1
+
+
+REFERENCE_ENTITIES = ('users', 'departments', 'sites', 'regions', 'response-types', 'templates')
+REFERENCE_WRITES = (
+    ('departments', 'department_id'),
+    ('sites', 'site_id'),
+    ('regions', 'region_id'),
+    ('response-types', 'response_type_id'),
+)
+EXPORT_ENTITIES = ('audit-plans', 'audit-answers', 'nc-actions')
+SEARCH_TERMS = ('inspection', 'site 3', 'question', 'walkthrough', 'template -site', 'LB0000042')
+
+
+class Worker:
+    def __init__(self, client: Client, email: str, password: str, rng: random.Random) -> None:
+        self.client = client
+        self.email = email
+        self.password = password
+        self.rng = rng
+        self.etags: dict[str, str] = {}
+        self.sync_token: str | None = None
+
+    def setup(self) -> None:
+        client = self.client
+        client.login(self.email, self.password)
+        self.plans = client.json('GET /audit-plans', 'GET', '/audit-plans?limit=100')
+        self.templates = client.json('GET /templates', 'GET', '/templates?limit=20')
+        self.users = client.json('GET /users', 'GET', '/users?limit=100')
+        self.ncs = client.json('GET /nc-register', 'GET', '/nc-register?limit=100')
+        self.evidence: list[str] = []
+
+    def payload_plan(self) -> dict:
+        template = self.rng.choice(self.templates)
+        return {
+            'start_date': date.today().isoformat(),
+            'end_date': date.today().isoformat(),
+            'audit_type': template['name'],
+            'auditor_name': 'Bench User 1',
+            'department': f'Department {self.rng.randint(1, 8)}',
+            'site': f'Site {self.rng.randint(1, 20)}',
+            'region': f'Region {self.rng.randint(1, 5)}',
+            'audit_note': 'Load benchmark plan',
+            'response_type': 'Response 1',
+        }
+
+    def list_reference(self) -> None:
+        entity = self.rng.choice(REFERENCE_ENTITIES)
+        headers = {'If-None-Match': self.etags[entity]} if entity in self.etags else {}
+        _, response_headers, _ = self.client.request(
+            f'GET /{entity}', 'GET', f'/{entity}', headers=headers, expect=(200, 304)
+        )
+        if 'etag' in response_headers:
+            self.etags[entity] = response_headers['etag']
+
+    def list_plans(self) -> None:
+        _, headers, _ = self.client.request('GET /audit-plans', 'GET', '/audit-plans?limit=50')
+        if 'x-next-cursor' in headers:
+            self.client.request(
+                'GET /audit-plans',
+                'GET',
+                f'/audit-plans?{urlencode({"limit": 50, "cursor": headers["x-next-cursor"]})}',
+            )
+
+    def nc_register(self) -> None:
+        query = {'limit': 50}
+        if self.rng.random() < 0.5:
+            query['status'] = self.rng.choice(('Assigned', 'In Progress', 'Closed'))
+        self.client.request('GET /nc-register', 'GET', f'/nc-register?{urlencode(query)}')
+
+    def nc_counts(self) -> None:
+        self.client.request('GET /nc-register/counts', 'GET', '/nc-register/counts')
+
+    def dashboard(self) -> None:
+        self.client.request('GET /dashboard/summary', 'GET', '/dashboard/summary')
+
+    def search(self) -> None:
+        query = urlencode({'q': self.rng.choice(SEARCH_TERMS), 'limit': 20})
+        self.client.request('GET /search', 'GET', f'/search?{query}')
+
+    def sync(self) -> None:
+        path = f'/sync?{urlencode({"since": self.sync_token})}' if self.sync_token else '/sync'
+        self.sync_token = self.client.json('GET /sync', 'GET', path)['token']
+
+    def export(self) -> None:
+        entity = self.rng.choice(EXPORT_ENTITIES)
+        self.client.request('GET /exports/{entity}', 'GET', f'/exports/{entity}?format=csv')
+
+    def export_job(self) -> None:
+        payload = {'entity': self.rng.choice(EXPORT_ENTITIES), 'gzip': True}
+        job = self.client.json(
+            'POST /jobs', 'POST', '/jobs', json_body={'type': 'export', 'payload': payload}, expect=(202,)
+        )
+        while job['status'] in ('queued', 'running'):
+            sleep(0.25)
+            job = self.client.json('GET /jobs/{job_id}', 'GET', f'/jobs/{job["id"]}')
+
+    def probes(self) -> None:
+        path = self.rng.choice(('/health', '/ready', '/metrics'))
+        self.client.request(f'GET {path}', 'GET', path, expect=(200, 404, 503))
+
+    def login(self) -> None:
+        self.client.login(self.email, self.password)
+
+    def plan_lifecycle(self) -> None:
+        client = self.client
+        plan = client.json(
+            'POST /audit-plans', 'POST', '/audit-plans', json_body=self.payload_plan(), expect=(201,)
+        )
+        client.request(
+            'PUT /audit-plans/{plan_id}',
+            'PUT',
+            f'/audit-plans/{plan["id"]}',
+            json_body={'audit_note': 'Rescheduled by load benchmark'},
+        )
+        client.request('DELETE /audit-plans/{plan_id}', 'DELETE', f'/audit-plans/{plan["id"]}', expect=(204,))
+
+    def bulk_plans(self) -> None:
+        result = self.client.json(
+            'POST /audit-plans/bulk',
+            'POST',
+            '/audit-plans/bulk',
+            json_body=[self.payload_plan() for _ in range(20)],
+        )
+        for row in result['results']:
+            if row.get('id'):
+                self.client.request(
+                    'DELETE /audit-plans/{plan_id}', 'DELETE', f'/audit-plans/{row["id"]}', expect=(204,)
+                )
+
+    def update_plan(self) -> None:
+        plan = self.rng.choice(self.plans)
+        self.client.request(
+            'PUT /audit-plans/{plan_id}',
+            'PUT',
+            f'/audit-plans/{plan["id"]}',
+            json_body={'audit_note': f'Updated at {datetime.now(timezone.utc).isoformat()}'},
+        )
+
+    def answers(self) -> None:
+        plan = self.rng.choice(self.plans)
+        negative = self.rng.random() < 0.2
+        answers = [
+            {
+                'question_index': index,
+                'question_text': f'Question {index + 1}',
+                'response': 'No' if negative and index == 0 else 'Yes',
+                'response_is_negative': negative and index == 0,
+                'assigned_nc': plan['department'] if negative and index == 0 else None,
+                'note': 'Answered by load benchmark',
+                'status': self.rng.choice(('Saved', 'Submitted')),
+            }
+            for index in range(self.rng.randint(5, 20))
+        ]
+        self.client.request(
+            'POST /audit-plans/{plan_id}/answers:batch',
+            'POST',
+            f'/audit-plans/{plan["id"]}/answers:batch',
+            json_body=answers,
+        )
+
+    def nc_action(self) -> None:
+        if not self.ncs:
+            return
+        nc = self.rng.choice(self.ncs)
+        self.client.request(
+            'POST /nc-actions',
+            'POST',
+            '/nc-actions',
+            json_body={
+                'answer_id': nc['answer_id'],
+                'root_cause': 'Found by load benchmark',
+                'corrective_action': 'Retrain the shift team',
+                'status': self.rng.choice(('Rework', 'Closed')),
+            },
+            # Answers re-saved by the answers scenario can drop out of the register.
+            expect=(200, 404),
+        )
+
+    def template_lifecycle(self) -> None:
+        client = self.client
+        payload = {
+            'name': f'Bench template {uuid.uuid4().hex[:8]}',
+            'tags': ['bench'],
+            'questions': [f'Question {index}' for index in range(1, 11)],
+        }
+        template = client.json('POST /templates', 'POST', '/templates', json_body=payload, expect=(201,))
+        client.request(
+            'PUT /templates/{template_id}',
+            'PUT',
+            f'/templates/{template["id"]}',
+            json_body={**payload, 'note': 'Revised'},
+        )
+        client.request('DELETE /templates/{template_id}', 'DELETE', f'/templates/{template["id"]}', expect=(204,))
+
+    def reference_lifecycle(self) -> None:
+        entity, key = self.rng.choice(REFERENCE_WRITES)
+        payload = {'name': f'Bench {uuid.uuid4().hex[:8]}'}
+        if entity == 'response-types':
+            payload['types'] = ['Yes', 'No']
+        row = self.client.json(f'POST /{entity}', 'POST', f'/{entity}', json_body=payload, expect=(201,))
+        self.client.request(f'DELETE /{entity}/{{{key}}}', 'DELETE', f'/{entity}/{row["id"]}', expect=(204,))
+
+    def user_lifecycle(self) -> None:
+        client = self.client
+        user = client.json(
+            'POST /users',
+            'POST',
+            '/users',
+            json_body={
+                'email': f'load-bench-{uuid.uuid4().hex[:12]}@example.com',
+                'first_name': 'Bench',
+                'last_name': 'Temp',
+                'department': 'Department 1',
+                'role': 'Auditor',
+                'status': 'active',
+                'password': self.password,
+            },
+            expect=(201,),
+        )
+        client.request('PUT /users/{user_id}', 'PUT', f'/users/{user["id"]}', json_body={'phone': '555-0100'})
+        client.request(
+            'POST /users/{user_id}/reset-password',
+            'POST',
+            f'/users/{user["id"]}/reset-password',
+            json_body={'new_password': self.password},
+        )
+
+    def evidence_upload(self) -> None:
+        boundary = uuid.uuid4().hex
+        content = os.urandom(self.rng.randint(16, 256) * 1024)
+        body = (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="photo.jpg"\r\n'
+            f'Content-Type: image/jpeg\r\n\r\n'.encode()
+            + content
+            + f'\r\n--{boundary}--\r\n'.encode()
+        )
+        stored = self.client.json(
+            'POST /evidence',
+            'POST',
+            '/evidence',
+            body=body,
+            headers={'Content-Type': f'multipart/form-data; boundary={boundary}'},
+            expect=(201,),
+        )
+        self.evidence = (self.evidence + [blob['sha256'] for blob in stored])[-20:]
+
+    def evidence_download(self) -> None:
+        if not self.evidence:
+            return self.evidence_upload()
+        self.client.request('GET /evidence/{digest}', 'GET', f'/evidence/{self.rng.choice(self.evidence)}')
+
+
+# Relative weights of the scenarios a staff user picks from; override with --weight name=N.
+STAFF_SCENARIOS = {
+    'list_reference': 20,
+    'list_plans': 15,
+    'nc_register': 8,
+    'nc_counts': 4,
+    'dashboard': 8,
+    'search': 6,
+    'sync': 4,
+    'evidence_download': 3,
+    'probes': 2,
+    'export': 1,
+    'export_job': 1,
+    'login': 2,
+    'answers': 10,
+    'update_plan': 5,
+    'nc_action': 4,
+    'plan_lifecycle': 3,
+    'evidence_upload': 2,
+    'template_lifecycle': 1,
+    'reference_lifecycle': 1,
+    'bulk_plans': 1,
+    'user_lifecycle': 1,
+}
+
+# Customers only see their own plans and NCs.
+CUSTOMER_SCENARIOS = {'nc_register': 4, 'nc_counts': 2, 'dashboard': 4, 'search': 2, 'login': 1}
+
+
+def _staff_email(tenant: dict, index: int) -> str:
+    staff = tenant['users'].get('Manager', [])
+    return staff[index % len(staff)]
+
+
+def run_worker(
+    index: int,
+    args: argparse.Namespace,
+    manifest: dict,
+    weights: dict[str, int],
+    recorder: Recorder,
+    ready: threading.Barrier,
+    failures: list[str],
+) -> None:
+    tenant = manifest['tenants'][index % len(manifest['tenants'])]
+    customers = tenant['users'].get('Customer', [])
+    customer = bool(customers) and index < round(args.concurrency * args.customer_share)
+    email = customers[index % len(customers)] if customer else _staff_email(tenant, index // len(manifest['tenants']))
+    scenarios = CUSTOMER_SCENARIOS if customer else weights
+    rng = random.Random(args.seed + index)
+    client = Client(args.url, args.timeout, recorder)
+    worker = Worker(client, email, manifest['password'], rng)
+    try:
+        worker.setup()
+    except UnexpectedStatus as exc:
+        failures.append(str(exc))
+        ready.abort()
+        return
+    try:
+        ready.wait()
+    except threading.BrokenBarrierError:
+        return
+
+    names = [name for name, weight in scenarios.items() if weight > 0]
+    chances = [scenarios[name] for name in names]
+    deadline = perf_counter() + args.warmup + args.duration
+    while perf_counter() < deadline:
+        try:
+            getattr(worker, rng.choices(names, chances)[0])()
+        except UnexpectedStatus as exc:
+            if len(failures) < 50:
+                failures.append(str(exc))
+    client.close()
+
+
+def summarize(timings: list[float], errors: int, elapsed: float) -> dict:
+    return {
+        'count': len(timings),
+        'errors': errors,
+        'rps': round(len(timings) / elapsed, 2),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'max_ms': round(max(timings), 3),
+    }
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_run(result: dict) -> None:
+    print(f'{"count":>7} {"err":>5} {"rps":>8} {"p50":>9} {"p95":>9} {"p99":>9}  operation')
+    for operation, row in [*sorted(result['operations'].items()), ('TOTAL', result['total'])]:
+        print(
+            f"{row['count']:7} {row['errors']:5} {row['rps']:8.1f} {row['p50_ms']:7.2f}ms"
+            f" {row['p95_ms']:7.2f}ms {row['p99_ms']:7.2f}ms  {operation}"
+        )
+
+
+def run(args: argparse.Namespace) -> int:
+    with open(args.manifest) as handle:
+        manifest = json.load(handle)
+    weights = dict(STAFF_SCENARIOS)
+    for override in args.weight or ():
+        name, _, weight = override.partition('=')
+        if name not in weights:
+            print(f'unknown scenario {name!r}; choose from {", ".join(weights)}', file=sys.stderr)
+            return 2
+        weights[name] = int(weight)
+
+    recorder = Recorder()
+    failures: list[str] = []
+    ready = threading.Barrier(args.concurrency + 1)
+    threads = [
+        threading.Thread(
+            target=run_worker, args=(index, args, manifest, weights, recorder, ready, failures), daemon=True
+        )
+        for index in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        ready.wait()
+    except threading.BrokenBarrierError:
+        print('worker setup failed:', *failures[:5], sep='\n  ', file=sys.stderr)
+        return 2
+    started_at = datetime.now(timezone.utc)
+    if args.warmup:
+        threading.Event().wait(args.warmup)
+    recorder.measuring = True
+    start = perf_counter()
+    for thread in threads:
+        thread.join()
+    recorder.measuring = False
+    elapsed = perf_counter() - start
+
+    operations = {
+        operation: summarize(timings, recorder.errors[operation], elapsed)
+        for operation, timings in recorder.timings.items()
+        if timings
+    }
+    everything = [timing for timings in recorder.timings.values() for timing in timings]
+    if not everything:
+        print('no requests completed', file=sys.stderr)
+        return 2
+    result = {
+        'meta': {
+            'url': args.url,
+            'concurrency': args.concurrency,
+            'duration_s': round(elapsed, 3),
+            'warmup_s': args.warmup,
+            'seed': args.seed,
+            'customer_share': args.customer_share,
+            'weights': weights,
+            'tenants': len(manifest['tenants']),
+            'started_at': started_at.isoformat(),
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+        },
+        'total': summarize(everything, sum(recorder.errors.values()), elapsed),
+        'operations': operations,
+    }
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(result, handle, indent=2)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_run(result)
+    for failure in failures[:10]:
+        print(f'  {failure}', file=sys.stderr)
+    return 1 if result['total']['errors'] else 0
+
+
+def _change(before: float, after: float) -> float | None:
+    return round((after - before) / before * 100, 1) if before else None
+
+
+def compare(args: argparse.Namespace) -> int:
+    with open(args.baseline) as handle:
+        baseline = json.load(handle)
+    with open(args.candidate) as handle:
+        candidate = json.load(handle)
+
+    rows = []
+    for operation in sorted(baseline['operations'].keys() | candidate['operations'].keys()):
+        before = baseline['operations'].get(operation)
+        after = candidate['operations'].get(operation)
+        if before is None or after is None:
+            rows.append({'operation': operation, 'missing_from': 'baseline' if before is None else 'candidate'})
+            continue
+        reasons = []
+        p95_change = _change(before['p95_ms'], after['p95_ms'])
+        if (
+            after['p95_ms'] - before['p95_ms'] > args.min_ms
+            and after['p95_ms'] > before['p95_ms'] * (1 + args.threshold / 100)
+        ):
+            reasons.append('p95')
+        if after['count'] and after['errors'] / after['count'] > before['errors'] / max(before['count'], 1) + 0.001:
+            reasons.append('errors')
+        rows.append(
+            {
+                'operation': operation,
+                'p50_change_pct': _change(before['p50_ms'], after['p50_ms']),
+                'p95_before_ms': before['p95_ms'],
+                'p95_after_ms': after['p95_ms'],
+                'p95_change_pct': p95_change,
+                'p99_change_pct': _change(before['p99_ms'], after['p99_ms']),
+                'rps_change_pct': _change(before['rps'], after['rps']),
+                'regressed': reasons,
+            }
+        )
+    rps_change = _change(baseline['total']['rps'], candidate['total']['rps'])
+    throughput_regressed = rps_change is not None and rps_change < -args.threshold
+    regressions = [row['operation'] for row in rows if row.get('regressed')]
+    if throughput_regressed:
+        regressions.append('TOTAL throughput')
+
+    if args.json:
+        print(json.dumps({'total_rps_change_pct': rps_change, 'regressions': regressions, 'operations': rows}, indent=2))
+    else:
+        print(f'{"p95 before":>11} {"p95 after":>10} {"p95":>8} {"p99":>8} {"rps":>8}  operation')
+        for row in rows:
+            if 'missing_from' in row:
+                print(f'{"":49}{row["operation"]} (missing from {row["missing_from"]})')
+                continue
+            changes = [
+                f'{value:+7.1f}%' if value is not None else f'{"n/a":>8}'
+                for value in (row['p95_change_pct'], row['p99_change_pct'], row['rps_change_pct'])
+            ]
+            print(
+                f"{row['p95_before_ms']:9.2f}ms {row['p95_after_ms']:8.2f}ms {' '.join(changes)}  {row['operation']}"
+                + (f"  REGRESSED ({', '.join(row['regressed'])})" if row['regressed'] else '')
+            )
+        print(f'total throughput: {baseline["total"]["rps"]:.1f} -> {candidate["total"]["rps"]:.1f} rps', end='')
+        print(f' ({rps_change:+.1f}%)' if rps_change is not None else '')
+        for name in ('concurrency', 'tenants', 'weights'):
+            if baseline['meta'].get(name) != candidate['meta'].get(name):
+                print(f'warning: runs differ in {name}', file=sys.stderr)
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seeding = commands.add_parser('seed', help='seed tenants into the database and write a manifest')
+    seeding.add_argument('--manifest', default='bench-load.json')
+    seeding.add_argument('--tenants', type=int, default=5)
+    seeding.add_argument('--users', type=int, default=40, help='users per tenant')
+    seeding.add_argument('--departments', type=int, default=8)
+    seeding.add_argument('--sites', type=int, default=20)
+    seeding.add_argument('--templates', type=int, default=30)
+    seeding.add_argument('--questions', type=int, default=25, help='questions per template')
+    seeding.add_argument('--plans', type=int, default=5000, help='audit plans per tenant')
+    seeding.add_argument('--password', default='load-bench-password')
+    seeding.set_defaults(handler=seed)
+
+    running = commands.add_parser('run', help='replay the mixed workload against a running API')
+    running.add_argument('--manifest', default='bench-load.json')
+    running.add_argument('--url', default='http://localhost:8000')
+    running.add_argument('--concurrency', type=int, default=16)
+    running.add_argument('--duration', type=float, default=60.0, help='measured seconds')
+    running.add_argument('--warmup', type=float, default=5.0, help='unmeasured seconds before the run')
+    running.add_argument('--timeout', type=float, default=30.0)
+    running.add_argument('--seed', type=int, default=1)
+    running.add_argument('--customer-share', type=float, default=0.1, help='fraction of workers logged in as customers')
+    running.add_argument('--weight', action='append', help='scenario weight override, e.g. export=0; repeatable')
+    running.add_argument('--output', help='write the results as JSON to this file')
+    running.add_argument('--json', action='store_true', help='print results as JSON')
+    running.set_defaults(handler=run)
+
+    comparing = commands.add_parser('compare', help='diff two run outputs')
+    comparing.add_argument('baseline')
+    comparing.add_argument('candidate')
+    comparing.add_argument('--threshold', type=float, default=10.0, help='allowed regression in percent')
+    comparing.add_argument('--min-ms', type=float, default=2.0, help='ignore p95 changes smaller than this')
+    comparing.add_argument('--json', action='store_true')
+    comparing.set_defaults(handler=compare)
+
+    cleaning = commands.add_parser('cleanup', help='delete the tenants listed in a manifest')
+    cleaning.add_argument('--manifest', default='bench-load.json')
+    cleaning.set_defaults(handler=cleanup)
+
+    args = parser.parse_args()
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""Measure GET /search latency against a seeded database.
+
+Point DB_* at a local Postgres with the migrations applied, then run from backend/:
+
+    python -m scripts.bench_search --rows 1000000 --tenants 10 --repeat 20
+
+Seeds templates, audit plans and NCs (10/60/30 % of --rows) with random audit vocabulary, runs a
+mix of queries through crud.search for one tenant and prints p50/p95/p99 per query. Exits non-zero
+when a query does not use the search indexes or its p95 is over --budget-ms.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+from time import perf_counter
+
+from sqlalchemy import text
+
+from app import crud
+from app.db import SessionLocal, engine
+from app.search import search_statement
+
+WORDS = (
+    'fire extinguisher exit sign blocked emergency lighting alarm panel sprinkler hose reel '
+    'first aid kit eyewash station ladder guard rail scaffold harness helmet gloves goggles '
+    'forklift pallet racking aisle spill kit chemical label storage cabinet ventilation fume '
+    'hood electrical cable socket isolation lockout tagout permit confined space hot work '
+    'noise dust housekeeping waste segregation drainage oil leak compressor boiler valve '
+    'gauge calibration inspection record training induction signage barrier pedestrian '
+    'walkway trip hazard lighting ergonomics manual handling lifting machine guarding '
+    'interlock emergency stop conveyor maintenance logbook contractor visitor badge'
+).split()
+
+QUERIES = (
+    'extinguisher',
+    'fire extinguisher',
+    '"emergency stop"',
+    'forklift -pallet',
+    'chemical storage cabinet label',
+    'sprinkler OR boiler',
+    'PC000042',
+)
+
+TABLES = ('nc_register', 'nc_actions', 'audit_answers', 'audit_plans', 'audit_templates')
+
+_SENTENCE = "array_to_string(ARRAY(SELECT (CAST(:words AS TEXT[]))[1 + floor(random() * :nwords)::int] FROM generate_series(1, {length})), ' ')"
+
+SEED_STATEMENTS = (
+    f"""
+    INSERT INTO audit_templates (tenant_id, name, tags, questions)
+    SELECT t, 'Template ' || n || ' ' || {_SENTENCE.format(length='2 + n % 2')},
+           to_jsonb(ARRAY[{_SENTENCE.format(length='1 + n % 2')}]),
+           to_jsonb(ARRAY(SELECT {_SENTENCE.format(length='6 + q % 3')} FROM generate_series(1, 5 + n % 4) AS q))
+    FROM unnest(CAST(:tenants AS BIGINT[])) AS t, generate_series(1, :templates) AS n
+    """,
+    f"""
+    INSERT INTO audit_plans (tenant_id, code, start_date, end_date, audit_type, site, auditor_name, audit_note)
+    SELECT t, 'PC' || LPAD(n::text, 6, '0'), CURRENT_DATE, CURRENT_DATE, 'Internal',
+           'Site ' || (n % 50), 'Auditor ' || (n % 40), {_SENTENCE.format(length='10 + n % 6')}
+    FROM unnest(CAST(:tenants AS BIGINT[])) AS t, generate_series(1, :plans) AS n
+    """,
+    f"""
+    INSERT INTO audit_answers (tenant_id, audit_plan_id, asset_number, question_index, question_text,
+                               response, response_is_negative, assigned_nc, note, status)
+    SELECT p.tenant_id, p.id, 1, q, {_SENTENCE.format(length='6 + q + p.id % 3')}, 'No', TRUE,
+           'Department ' || (p.id % 8), {_SENTENCE.format(length='5 + q + p.id % 4')}, 'Submitted'
+    FROM audit_plans p, generate_series(0, 1) AS q
+    WHERE p.tenant_id = ANY(CAST(:tenants AS BIGINT[])) AND p.id % 4 = 0
+    """,
+    f"""
+    INSERT INTO nc_actions (tenant_id, audit_answer_id, root_cause, corrective_action, status)
+    SELECT a.tenant_id, a.id, {_SENTENCE.format(length='8 + a.id % 5')}, {_SENTENCE.format(length='8 + a.id % 3')},
+           (ARRAY['Assigned', 'In Progress', 'Closed'])[1 + a.id % 3]
+    FROM audit_answers a
+    WHERE a.tenant_id = ANY(CAST(:tenants AS BIGINT[])) AND a.id % 2 = 0
+    """,
+)
+
+
+def seed(tenants: int, rows: int) -> tuple[list[int], int]:
+    per_tenant = max(rows // tenants, 10)
+    parameters = {
+        'words': list(WORDS),
+        'nwords': len(WORDS),
+        'templates': per_tenant // 10,
+        'plans': per_tenant * 6 // 10,
+    }
+    with engine.begin() as conn:
+        tenant_ids = list(
+            conn.scalars(
+                text(
+                    "INSERT INTO tenants (name, status) "
+                    "SELECT 'search-bench-' || n, 'active' FROM generate_series(1, :count) AS n "
+                    "RETURNING id"
+                ),
+                {'count': tenants},
+            )
+        )
+        parameters['tenants'] = tenant_ids
+        for statement in SEED_STATEMENTS:
+            conn.execute(text(statement), parameters)
+    with SessionLocal() as db:
+        for tenant_id in tenant_ids:
+            crud.rebuild_dashboard(db, tenant_id)
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        for table in TABLES:
+            conn.exec_driver_sql(f'ANALYZE {table}')
+        seeded = sum(
+            conn.execute(
+                text(f'SELECT count(*) FROM {table} WHERE tenant_id = ANY(:tenants)'), {'tenants': tenant_ids}
+            ).scalar_one()
+            for table in ('audit_templates', 'audit_plans', 'nc_register')
+        )
+    return tenant_ids, seeded
+
+
+def cleanup(tenant_ids: list[int]) -> None:
+    with engine.begin() as conn:
+        for table in (*TABLES, 'audit_plan_progress', 'dashboard_counters'):
+            conn.execute(text(f'DELETE FROM {table} WHERE tenant_id = ANY(:tenants)'), {'tenants': tenant_ids})
+        conn.execute(text('DELETE FROM tenants WHERE id = ANY(:tenants)'), {'tenants': tenant_ids})
+
+
+def uses_search_indexes(tenant_id: int, query: str, limit: int) -> bool:
+    statement = search_statement(tenant_id, query, limit)
+    compiled = statement.compile(engine)
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + str(compiled), compiled.params).scalar_one()
+    plan = plan if isinstance(plan, list) else json.loads(plan)
+    return 'Seq Scan' not in json.dumps(plan)
+
+
+def percentile(timings: list[float], fraction: float) -> float:
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+def run(tenant_id: int, repeat: int, limit: int, budget_ms: float) -> list[dict]:
+    results = []
+    with SessionLocal() as db:
+        crud.search(db, tenant_id, QUERIES[0], limit)
+        for query in QUERIES:
+            timings = []
+            for _ in range(repeat):
+                start = perf_counter()
+                hits = crud.search(db, tenant_id, query, limit)
+                timings.append((perf_counter() - start) * 1000)
+            indexed = uses_search_indexes(tenant_id, query, limit)
+            p95 = percentile(timings, 0.95)
+            results.append(
+                {
+                    'query': query,
+                    'hits': len(hits),
+                    'p50_ms': round(statistics.median(timings), 3),
+                    'p95_ms': round(p95, 3),
+                    'p99_ms': round(percentile(timings, 0.99), 3),
+                    'indexed': indexed,
+                    'ok': indexed and p95 <= budget_ms,
+                }
+            )
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000, help='searchable rows across all tenants')
+    parser.add_argument('--tenants', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--budget-ms', type=float, default=50.0)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    parser.add_argument('--keep', action='store_true', help='leave the seeded rows in place')
+    args = parser.parse_args()
+
+    start = perf_counter()
+    tenant_ids, seeded = seed(args.tenants, args.rows)
+    print(f'seeded {seeded} searchable rows in {perf_counter() - start:.0f} s', file=sys.stderr)
+    try:
+        results = run(tenant_ids[0], args.repeat, args.limit, args.budget_ms)
+    finally:
+        if not args.keep:
+            cleanup(tenant_ids)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f'{"":4}  {"p50":>9} {"p95":>9} {"p99":>9}  {"hits":>4}  query')
+        for result in results:
+            status = 'ok' if result['ok'] else 'FAIL'
+            print(
+                f"{status:4}  {result['p50_ms']:7.2f}ms {result['p95_ms']:7.2f}ms {result['p99_ms']:7.2f}ms"
+                f"  {result['hits']:4}  {result['query']}"
+                + ('' if result['indexed'] else '  (sequential scan)')
+            )
+    return 0 if all(result['ok'] for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
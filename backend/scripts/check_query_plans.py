@@ -0,0 +1,302 @@
+"""Run the crud queries under EXPLAIN (ANALYZE, BUFFERS) against a seeded database.
+
+Point DB_* at a local Postgres with the migrations applied, then run from backend/:
+
+    python -m scripts.check_query_plans --tenants 20 --rows 5000 --budget-ms 25
+
+Exits non-zero when a query sequentially scans a tenant-scoped table or runs over budget. Tables
+created by later migrations (register, dashboard, jobs, events) are seeded and checked when present.
+"""
+
+import argparse
+import json
+import sys
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app import crud, jobs
+from app.dashboard import read_summary
+from app.db import SessionLocal, engine
+from app.events import read_events
+from app.models import AuditPlan
+from app.pagination import Cursor
+from app.search import search_statement
+
+TENANT_TABLES = (
+    # Cleanup deletes in reverse, so tombstones written by its deletes go last.
+    'sync_tombstones',
+    'users',
+    'departments',
+    'sites',
+    'regions',
+    'response_types',
+    'audit_templates',
+    'audit_plans',
+    'nc_register',
+    'dashboard_counters',
+    'jobs',
+    'events',
+)
+
+_SERIES = 'FROM unnest(CAST(:tenants AS BIGINT[])) AS t, generate_series(1, :rows) AS n'
+_STAMP = "NOW() - n * INTERVAL '1 minute'"
+
+SEED_STATEMENTS = {
+    'users': f"""
+        INSERT INTO users (tenant_id, email, password_hash, role, status, created_at, updated_at)
+        SELECT t, 'plan-check-' || t || '-' || n || '@example.com', 'x', 'Auditor', 'active',
+               {_STAMP}, {_STAMP}
+        {_SERIES}
+    """,
+    'departments': f"""
+        INSERT INTO departments (tenant_id, name, created_at, updated_at)
+        SELECT t, 'Department ' || n, {_STAMP}, {_STAMP} {_SERIES}
+    """,
+    'sites': f"""
+        INSERT INTO sites (tenant_id, name, created_at, updated_at)
+        SELECT t, 'Site ' || n, {_STAMP}, {_STAMP} {_SERIES}
+    """,
+    'regions': f"""
+        INSERT INTO regions (tenant_id, name, created_at, updated_at)
+        SELECT t, 'Region ' || n, {_STAMP}, {_STAMP} {_SERIES}
+    """,
+    'response_types': f"""
+        INSERT INTO response_types (tenant_id, name, types, created_at, updated_at)
+        SELECT t, 'Response ' || n, '["Yes", "No"]'::jsonb, {_STAMP}, {_STAMP} {_SERIES}
+    """,
+    'audit_templates': f"""
+        INSERT INTO audit_templates (tenant_id, name, questions, created_at, updated_at)
+        SELECT t, 'Template ' || n, '["Q1", "Q2"]'::jsonb, {_STAMP}, {_STAMP} {_SERIES}
+    """,
+    'audit_plans': f"""
+        INSERT INTO audit_plans (tenant_id, code, start_date, end_date, audit_type, created_at, updated_at)
+        SELECT t, 'PC' || LPAD(n::text, 6, '0'), CURRENT_DATE, CURRENT_DATE, 'Internal',
+               {_STAMP}, {_STAMP}
+        {_SERIES}
+    """,
+    'sync_tombstones': f"""
+        INSERT INTO sync_tombstones (tenant_id, entity, entity_id, deleted_at)
+        SELECT t, 'audit_plans', n, {_STAMP} {_SERIES}
+    """,
+    'nc_register': f"""
+        INSERT INTO nc_register (
+          answer_id, tenant_id, audit_plan_id, audit_code, audit_type, start_date, end_date, asset_number,
+          question_text, assigned_nc, assigned_user_id, submitted_at, nc_status
+        )
+        SELECT nextval(pg_get_serial_sequence('audit_answers', 'id')), t, n, 'PC' || LPAD(n::text, 6, '0'),
+               'Internal', CURRENT_DATE, CURRENT_DATE, 1, 'Question ' || n || ' missing guard',
+               'Department ' || n % 20, n % 50, {_STAMP}, (ARRAY['Assigned', 'In Progress', 'Closed'])[n % 3 + 1]
+        {_SERIES}
+    """,
+    'dashboard_counters': f"""
+        INSERT INTO dashboard_counters (tenant_id, dimension, dimension_value, metric, value)
+        SELECT t, (ARRAY['site', 'region', 'department', 'customer'])[n % 4 + 1], 'Value ' || n, 'plans:Created', 1
+        {_SERIES}
+    """,
+    'jobs': f"""
+        INSERT INTO jobs (tenant_id, type, status, created_at, finished_at)
+        SELECT t, 'export', CASE WHEN n % 100 = 0 THEN 'queued' ELSE 'succeeded' END, {_STAMP},
+               CASE WHEN n % 100 = 0 THEN NULL ELSE {_STAMP} END
+        {_SERIES}
+    """,
+    'events': f"""
+        INSERT INTO events (tenant_id, type, data, created_at)
+        SELECT t, 'audit_plan.status', jsonb_build_object('id', n, 'status', 'Created'), {_STAMP} {_SERIES}
+    """,
+}
+
+
+def existing_tables() -> set[str]:
+    with engine.connect() as conn:
+        return {
+            table
+            for table in TENANT_TABLES
+            if conn.scalar(text('SELECT to_regclass(:table)'), {'table': table}) is not None
+        }
+
+
+def seed(tenants: int, rows: int, tables: set[str]) -> list[int]:
+    with engine.begin() as conn:
+        tenant_ids = list(
+            conn.scalars(
+                text(
+                    "INSERT INTO tenants (name, status) "
+                    "SELECT 'plan-check-' || n, 'active' FROM generate_series(1, :count) AS n "
+                    "RETURNING id"
+                ),
+                {'count': tenants},
+            )
+        )
+        for table, statement in SEED_STATEMENTS.items():
+            if table not in tables:
+                continue
+            conn.execute(text(statement), {'tenants': tenant_ids, 'rows': rows})
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        for table in TENANT_TABLES:
+            if table in tables:
+                conn.exec_driver_sql(f'ANALYZE {table}')
+    return tenant_ids
+
+
+def cleanup(tenant_ids: list[int], tables: set[str]) -> None:
+    with engine.begin() as conn:
+        for table in reversed(TENANT_TABLES):
+            if table not in tables:
+                continue
+            conn.execute(
+                text(f'DELETE FROM {table} WHERE tenant_id = ANY(:tenants)'),
+                {'tenants': tenant_ids},
+            )
+        conn.execute(text('DELETE FROM tenants WHERE id = ANY(:tenants)'), {'tenants': tenant_ids})
+
+
+def build_checks(tenant_id: int, rows: int, tables: set[str]) -> dict[str, Callable[[Session], object]]:
+    now = datetime.now(timezone.utc)
+    cursor = Cursor(now - timedelta(minutes=rows // 2), 0)
+    email = f'plan-check-{tenant_id}-{rows // 2}@example.com'
+    listings = {
+        'users': crud.list_users,
+        'departments': crud.list_departments,
+        'sites': crud.list_sites,
+        'regions': crud.list_regions,
+        'response_types': crud.list_response_types,
+        'templates': crud.list_templates,
+        'audit_plans': crud.list_audit_plans,
+    }
+    checks: dict[str, Callable[[Session], object]] = {}
+    for name, fn in listings.items():
+        checks[f'list_{name}'] = lambda db, fn=fn: fn(db, tenant_id, 50)
+        checks[f'list_{name}_cursor'] = lambda db, fn=fn: fn(db, tenant_id, 50, cursor)
+    checks.update(
+        {
+            'list_departments_full': lambda db: crud.list_departments(db, tenant_id),
+            'get_user_by_email': lambda db: crud.get_user_by_email(db, email),
+            'get_audit_plan': lambda db: crud.get_tenant_row(db, AuditPlan, tenant_id, 0),
+            'generate_audit_codes': lambda db: crud.generate_audit_codes(db, tenant_id, 20),
+            'list_changes': lambda db: crud.list_changes(db, tenant_id, now - timedelta(minutes=2)),
+        }
+    )
+    if 'nc_register' in tables:
+        checks.update(
+            {
+                'list_nc_register': lambda db: crud.list_nc_register(db, tenant_id, limit=50),
+                'list_nc_register_cursor': lambda db: crud.list_nc_register(db, tenant_id, limit=50, cursor=cursor),
+                'list_nc_register_status': lambda db: crud.list_nc_register(
+                    db, tenant_id, nc_status='Assigned', limit=50
+                ),
+                'list_nc_register_assignee': lambda db: crud.list_nc_register(
+                    db, tenant_id, assigned_user_id=7, limit=50
+                ),
+                'count_nc_register': lambda db: crud.count_nc_register(db, tenant_id),
+                'search': lambda db: db.execute(search_statement(tenant_id, 'guard', 20)).all(),
+            }
+        )
+    if 'dashboard_counters' in tables:
+        checks['read_summary'] = lambda db: read_summary(db, tenant_id, None)
+        checks['read_summary_customer'] = lambda db: read_summary(db, tenant_id, 'Value 3')
+    if 'jobs' in tables:
+        checks['claim_jobs'] = lambda db: jobs._claim(db, 'export', 2)
+    if 'events' in tables:
+        checks['read_events'] = lambda db: read_events(db, tenant_id, 0, None, 100)
+    return checks
+
+
+@contextmanager
+def capture_statements() -> Iterator[list[tuple[str, object]]]:
+    captured: list[tuple[str, object]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        # The job claim is an UPDATE ... RETURNING; explain() rolls it back.
+        if statement.lstrip().upper().startswith(('SELECT', 'UPDATE')):
+            captured.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def iter_nodes(node: dict) -> Iterator[dict]:
+    yield node
+    for child in node.get('Plans', []):
+        yield from iter_nodes(child)
+
+
+def explain(statement: str, parameters: object) -> dict:
+    with engine.connect() as conn:
+        result = conn.exec_driver_sql(
+            'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + statement, parameters
+        ).scalar_one()
+        conn.rollback()
+    plan = result if isinstance(result, list) else json.loads(result)
+    return plan[0]
+
+
+def evaluate(name: str, statement: str, plan: dict, budget_ms: float) -> dict:
+    problems = [
+        f"seq scan on {node['Relation Name']}"
+        for node in iter_nodes(plan['Plan'])
+        if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') in TENANT_TABLES
+    ]
+    if plan['Execution Time'] > budget_ms:
+        problems.append(f"{plan['Execution Time']:.2f} ms over {budget_ms} ms budget")
+    root = plan['Plan']
+    return {
+        'check': name,
+        'statement': ' '.join(statement.split()),
+        'execution_ms': round(plan['Execution Time'], 3),
+        'shared_hit': root.get('Shared Hit Blocks', 0),
+        'shared_read': root.get('Shared Read Blocks', 0),
+        'problems': problems,
+    }
+
+
+def run_checks(tenant_id: int, rows: int, budget_ms: float, tables: set[str]) -> list[dict]:
+    results = []
+    for name, check in build_checks(tenant_id, rows, tables).items():
+        with capture_statements() as captured, SessionLocal() as db:
+            check(db)
+            db.rollback()
+        for statement, parameters in captured:
+            plan = explain(statement, parameters)
+            if 'Relation Name' not in json.dumps(plan):
+                continue
+            results.append(evaluate(name, statement, plan, budget_ms))
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenants', type=int, default=20)
+    parser.add_argument('--rows', type=int, default=5000, help='rows per tenant per table')
+    parser.add_argument('--budget-ms', type=float, default=25.0)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    parser.add_argument('--keep', action='store_true', help='leave the seeded rows in place')
+    args = parser.parse_args()
+
+    tables = existing_tables()
+    tenant_ids = seed(args.tenants, args.rows, tables)
+    try:
+        results = run_checks(tenant_ids[0], args.rows, args.budget_ms, tables)
+    finally:
+        if not args.keep:
+            cleanup(tenant_ids, tables)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            status = 'FAIL' if result['problems'] else 'ok'
+            print(f"{status:4}  {result['execution_ms']:8.2f} ms  {result['check']}")
+            for problem in result['problems']:
+                print(f'      {problem}')
+    return 1 if any(result['problems'] for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
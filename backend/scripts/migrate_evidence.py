@@ -0,0 +1,94 @@
+"""Move base64 evidence data URLs out of audit_answers into the evidence store.
+
+Uses the EVIDENCE_* settings of the app. Run from backend/ with the usual DB_* environment:
+
+    python -m scripts.migrate_evidence --batch-size 200
+    python -m scripts.migrate_evidence --tenant 3 --dry-run
+
+Each batch is stored and committed on its own, so the tool can be interrupted and re-run. Every
+migrated answer gets the blob's /evidence/<sha256> URL appended to evidence_urls and its
+evidence_data_url cleared. Values that are not data URLs are left in place and reported.
+"""
+
+import argparse
+import sys
+from time import perf_counter
+
+from sqlalchemy import select, update
+
+from app import crud
+from app.db import SessionLocal, engine
+from app.evidence import decode_data_url, evidence_url, store_bytes
+from app.models import AuditAnswer
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch-size', type=int, default=200)
+    parser.add_argument('--tenant', type=int, action='append', help='tenant id, repeatable')
+    parser.add_argument('--dry-run', action='store_true', help='decode and count, but store nothing')
+    args = parser.parse_args()
+
+    moved = skipped = stored_bytes = 0
+    last_id = 0
+    start = perf_counter()
+    with SessionLocal() as db:
+        while True:
+            query = (
+                select(
+                    AuditAnswer.id,
+                    AuditAnswer.tenant_id,
+                    AuditAnswer.evidence_name,
+                    AuditAnswer.evidence_data_url,
+                    AuditAnswer.evidence_urls,
+                )
+                .where(AuditAnswer.evidence_data_url.is_not(None), AuditAnswer.id > last_id)
+                .order_by(AuditAnswer.id)
+                .limit(args.batch_size)
+            )
+            if args.tenant:
+                query = query.where(AuditAnswer.tenant_id.in_(args.tenant))
+            rows = db.execute(query).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            changes = []
+            blobs: dict[int, list] = {}
+            for row in rows:
+                decoded = decode_data_url(row.evidence_data_url)
+                if decoded is None:
+                    skipped += 1
+                    print(f'answer {row.id}: evidence_data_url is not a data URL, left in place')
+                    continue
+                moved += 1
+                stored_bytes += len(decoded[0])
+                if args.dry_run:
+                    continue
+                blob = store_bytes(*decoded, row.evidence_name)
+                blobs.setdefault(row.tenant_id, []).append(blob)
+                urls = row.evidence_urls or []
+                if evidence_url(blob.sha256) not in urls:
+                    urls = [*urls, evidence_url(blob.sha256)]
+                changes.append({'id': row.id, 'evidence_urls': urls, 'evidence_data_url': None})
+
+            if changes:
+                db.execute(update(AuditAnswer), changes)
+                for tenant_id, tenant_blobs in blobs.items():
+                    crud.add_evidence_blobs(db, tenant_id, tenant_blobs)
+                db.commit()
+            print(f'up to answer {last_id}: {moved} moved, {skipped} skipped')
+
+    verb = 'would move' if args.dry_run else 'moved'
+    print(
+        f'{verb} {moved} data URLs ({stored_bytes / 1024 / 1024:.1f} MiB decoded), '
+        f'skipped {skipped}, in {perf_counter() - start:.1f} s'
+    )
+    if moved and not args.dry_run:
+        print('Run VACUUM (ANALYZE) audit_answers to reuse the freed space.')
+    engine.dispose()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,36 @@
+"""Rebuild the NC register and dashboard rollups from the source tables.
+
+Run from backend/ after applying migrations 013/014, or after writes that bypassed the API:
+
+    python -m scripts.rebuild_dashboard            # every tenant
+    python -m scripts.rebuild_dashboard --tenant 3 --tenant 7
+"""
+
+import argparse
+import sys
+from time import perf_counter
+
+from sqlalchemy import select
+
+from app import crud
+from app.db import SessionLocal, engine
+from app.models import Tenant
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenant', type=int, action='append', help='tenant id, repeatable')
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        tenant_ids = args.tenant or db.scalars(select(Tenant.id).order_by(Tenant.id)).all()
+        for tenant_id in tenant_ids:
+            start = perf_counter()
+            crud.rebuild_dashboard(db, tenant_id)
+            print(f'tenant {tenant_id}: rebuilt in {(perf_counter() - start) * 1000:.0f} ms')
+    engine.dispose()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,38 @@
+from uuid import uuid4
+
+from sqlalchemy import insert
+
+from app import batch
+from app.models import Department
+
+
+def test_non_atomic_batch_replays_after_failed_first_operation(client, headers, monkeypatch):
+    def violate_foreign_key(db, tenant_id, payload):
+        db.execute(insert(Department).values(tenant_id=0, name=payload.name))
+
+    routes = tuple(
+        route._replace(handler=violate_foreign_key)
+        if route.method == 'POST' and route.pattern.pattern == '^/departments$'
+        else route
+        for route in batch.BATCH_ROUTES
+    )
+    monkeypatch.setattr(batch, 'BATCH_ROUTES', routes)
+    body = {
+        'operations': [
+            {'method': 'POST', 'path': '/departments', 'body': {'name': 'Quality'}},
+            {'method': 'POST', 'path': '/sites', 'body': {'name': 'Plant 1'}},
+        ],
+        'atomic': False,
+    }
+    key_headers = {**headers, 'Idempotency-Key': uuid4().hex}
+
+    first = client.post('/batch', json=body, headers=key_headers)
+    assert first.status_code == 200
+    assert [result['status'] for result in first.json()['results']] == [409, 201]
+    assert batch.REPLAYED_HEADER not in first.headers
+
+    second = client.post('/batch', json=body, headers=key_headers)
+    assert second.status_code == 200
+    assert second.headers[batch.REPLAYED_HEADER] == 'true'
+    assert second.json() == first.json()
+    assert [site['name'] for site in client.get('/sites', headers=headers).json()] == ['Plant 1']
@@ -0,0 +1,56 @@
+import json
+from datetime import date
+
+import pytest
+from sqlalchemy import insert
+
+from app.db import SessionLocal
+from app.models import AuditAnswer, AuditPlan, NcAction
+
+
+def create_plan(tenant_id: int, code: str, customer_id: str) -> None:
+    with SessionLocal() as db:
+        plan_id = db.scalar(
+            insert(AuditPlan)
+            .values(
+                tenant_id=tenant_id,
+                code=code,
+                start_date=date(2026, 1, 1),
+                end_date=date(2026, 1, 31),
+                audit_type='Internal',
+                customer_id=customer_id,
+            )
+            .returning(AuditPlan.id)
+        )
+        answer_id = db.scalar(
+            insert(AuditAnswer)
+            .values(
+                tenant_id=tenant_id,
+                audit_plan_id=plan_id,
+                question_index=0,
+                question_text=f'{code} question',
+                response_is_negative=True,
+            )
+            .returning(AuditAnswer.id)
+        )
+        db.execute(insert(NcAction).values(tenant_id=tenant_id, audit_answer_id=answer_id, root_cause=code))
+        db.commit()
+
+
+def export(client, entity: str, headers: dict[str, str]) -> list[dict]:
+    response = client.get(f'/exports/{entity}', headers=headers)
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.mark.parametrize(
+    ('entity', 'field'),
+    [('audit-plans', 'code'), ('audit-answers', 'question_text'), ('nc-actions', 'root_cause')],
+)
+def test_customer_exports_only_their_audit_plans(client, tenant_id, headers, customer_headers, entity, field):
+    create_plan(tenant_id, 'ACME', 'buyer@acme.test')
+    create_plan(tenant_id, 'OTHER', 'buyer@other.test')
+    customer = customer_headers('Buyer@Acme.test')
+
+    assert sorted(row[field].split()[0] for row in export(client, entity, headers)) == ['ACME', 'OTHER']
+    assert [row[field].split()[0] for row in export(client, entity, customer)] == ['ACME']
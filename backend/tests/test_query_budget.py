@@ -0,0 +1,37 @@
+from app.profiling import query_budget
+
+PLAN = {'start_date': '2026-01-01', 'end_date': '2026-01-31', 'audit_type': 'Internal'}
+
+
+def test_list_reads_a_page_in_one_statement(client, headers):
+    for index in range(25):
+        client.post('/audit-plans', json={**PLAN, 'code': f'A{index}'}, headers=headers)
+
+    with query_budget(max_statements=1):
+        response = client.get('/audit-plans', params={'limit': 20}, headers=headers)
+    assert len(response.json()) == 20
+
+
+def test_sync_reads_each_entity_once(client, headers):
+    for index in range(10):
+        client.post('/sites', json={'name': f'Plant {index}'}, headers=headers)
+        client.post('/audit-plans', json={**PLAN, 'code': f'A{index}'}, headers=headers)
+
+    # The clock, one statement per entity and, for an incremental sync, the tombstones.
+    with query_budget(max_statements=8, max_repeats=1):
+        token = client.get('/sync', headers=headers).json()['token']
+    client.delete(f"/sites/{client.get('/sites', headers=headers).json()[0]['id']}", headers=headers)
+    with query_budget(max_statements=9, max_repeats=1):
+        deleted = client.get('/sync', params={'since': token}, headers=headers).json()['deleted']
+    assert len(deleted['sites']) == 1
+
+
+def test_batch_runs_a_fixed_number_of_statements_per_operation(client, headers):
+    operations = [{'method': 'POST', 'path': '/sites', 'body': {'name': f'Plant {index}'}} for index in range(10)]
+    client.get('/sites', headers=headers)
+
+    # The tenant lock, then a savepoint, the insert, the reference version bump
+    # and the release per operation.
+    with query_budget(max_statements=1 + 4 * len(operations), max_repeats=len(operations)):
+        response = client.post('/batch', json={'operations': operations}, headers=headers)
+    assert [result['status'] for result in response.json()['results']] == [201] * len(operations)
@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from app import auth
+from app.config import settings
+from app.replicas import WRITE_MARKER_COOKIE, ReplicaRouter, decode_write_marker
+
+
+@pytest.fixture
+def replica_router(client, monkeypatch):
+    # A replica pointed at the primary itself: it answers, but never replays WAL.
+    router = ReplicaRouter([settings.db_host])
+    monkeypatch.setattr(auth, 'router', router)
+    yield router
+    client.cookies.clear()
+    asyncio.run(router.dispose())
+
+
+async def _read_bind(router: ReplicaRouter, after: str | None):
+    async with router.read_session(after) as db:
+        return db.bind
+
+
+def test_write_marker_is_signed_for_the_tenant(client, tenant_id, headers, replica_router):
+    response = client.post('/sites', json={'name': 'Plant 1'}, headers=headers)
+    assert response.status_code == 201
+    marker = response.cookies[WRITE_MARKER_COOKIE]
+
+    assert decode_write_marker(marker, tenant_id)
+    assert decode_write_marker(marker, tenant_id + 1) is None
+    assert decode_write_marker(marker[:-1] + ('0' if marker[-1] != '0' else '1'), tenant_id) is None
+    assert client.get('/sites', headers=headers).json()[0]['name'] == 'Plant 1'
+
+
+def test_reads_after_a_write_skip_replicas_that_have_not_replayed_it(client, tenant_id, headers, replica_router):
+    (replica,) = replica_router.replicas
+    response = client.post('/sites', json={'name': 'Plant 1'}, headers=headers)
+    lsn = decode_write_marker(response.cookies[WRITE_MARKER_COOKIE], tenant_id)
+
+    assert asyncio.run(_read_bind(replica_router, None)) is replica.engine
+    assert asyncio.run(_read_bind(replica_router, lsn)) is not replica.engine
@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, insert, select, text, update
+
+from app import crud
+from app.db import SessionLocal
+from app.models import SyncTombstone, User
+
+
+def test_last_active_does_not_resync_users(client, tenant_id, headers):
+    with SessionLocal() as db:
+        db.execute(update(User).where(User.tenant_id == tenant_id).values(updated_at=func.now() - timedelta(hours=1)))
+        db.commit()
+        (user_id,) = db.scalars(select(User.id).where(User.tenant_id == tenant_id)).all()
+    token = client.get('/sync', headers=headers).json()['token']
+
+    with SessionLocal() as db:
+        crud.set_last_active(db, {user_id: datetime.now(timezone.utc)})
+    assert client.get('/sync', params={'since': token}, headers=headers).json()['users'] == []
+
+    with SessionLocal() as db:
+        db.execute(text("UPDATE users SET first_name = 'Renamed' WHERE id = :id"), {'id': user_id})
+        db.commit()
+    users = client.get('/sync', params={'since': token}, headers=headers).json()['users']
+    assert [user['first_name'] for user in users] == ['Renamed']
+
+
+def test_expired_sync_tombstones_are_pruned(tenant_id):
+    now = datetime.now(timezone.utc)
+    with SessionLocal() as db:
+        db.execute(
+            insert(SyncTombstone),
+            [
+                {'tenant_id': tenant_id, 'entity': 'sites', 'entity_id': 1, 'deleted_at': now - timedelta(days=31)},
+                {'tenant_id': tenant_id, 'entity': 'sites', 'entity_id': 2, 'deleted_at': now},
+            ],
+        )
+        db.commit()
+        crud.delete_expired_sync_tombstones(db)
+        assert db.scalars(select(SyncTombstone.entity_id).where(SyncTombstone.tenant_id == tenant_id)).all() == [2]